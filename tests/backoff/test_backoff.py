@@ -0,0 +1,94 @@
+import threading
+from typing import Any, Dict
+
+import pytest
+from pytest_mock import MockerFixture
+
+from zulipterminal.backoff import ReconnectBackoff
+
+
+MODULE = "zulipterminal.backoff"
+
+
+def test_failed__delay_limit_doubles_up_to_cap(mocker: MockerFixture) -> None:
+    uniform = mocker.patch(MODULE + ".random.uniform", return_value=0.5)
+    backoff = ReconnectBackoff(base=1, cap=5)
+
+    delays = [backoff.failed() for _ in range(5)]
+
+    assert delays == [0.5] * 5
+    assert [call.args for call in uniform.call_args_list] == [
+        (0, 1),
+        (0, 2),
+        (0, 4),
+        (0, 5),
+        (0, 5),
+    ]
+    assert backoff.is_disconnected
+
+
+def test_failed__many_failures() -> None:
+    backoff = ReconnectBackoff(base=1, cap=5)
+    backoff.failures = 10000
+
+    assert 0 <= backoff.failed() <= 5
+
+
+@pytest.mark.parametrize(
+    "response, expected_delay",
+    [
+        ({"result": "error", "code": "RATE_LIMIT_HIT", "retry-after": 30}, 30),
+        ({"result": "error", "code": "RATE_LIMIT_HIT", "retry-after": 0.25}, 0.5),
+        ({"result": "error", "code": "BAD_REQUEST"}, 0.5),
+        ({"result": "error", "retry-after": "soon"}, 0.5),
+    ],
+    ids=["longer_retry_after", "shorter_retry_after", "not_limited", "invalid"],
+)
+def test_honour_retry_after(
+    mocker: MockerFixture, response: Dict[str, Any], expected_delay: float
+) -> None:
+    mocker.patch(MODULE + ".random.uniform", return_value=0.5)
+    backoff = ReconnectBackoff()
+
+    backoff.honour_retry_after(response)
+
+    assert backoff.failed() == expected_delay
+    assert backoff.failed() == 0.5  # Only for the next attempt
+
+
+def test_succeeded__telemetry(mocker: MockerFixture) -> None:
+    mocker.patch(MODULE + ".time.monotonic", side_effect=[100, 112, 200, 203])
+    backoff = ReconnectBackoff()
+
+    backoff.succeeded()  # Not disconnected
+    backoff.failed()
+    backoff.failed()
+    backoff.succeeded()
+    backoff.failed()
+    backoff.succeeded()
+
+    assert backoff.reconnect_count == 2
+    assert backoff.downtime == 15
+    assert backoff.failures == 0
+    assert not backoff.is_disconnected
+
+
+def test_retry_now__ends_wait() -> None:
+    backoff = ReconnectBackoff()
+    backoff.failed()
+    waiter = threading.Thread(target=backoff.wait, args=(60,))
+    waiter.start()
+
+    backoff.retry_now()
+
+    waiter.join(timeout=5)
+    assert not waiter.is_alive()
+
+
+def test_retry_now__ignored_while_connected() -> None:
+    backoff = ReconnectBackoff()
+
+    backoff.retry_now()
+
+    # Otherwise the wait after a later failure would end immediately
+    assert not backoff._retry_now.is_set()
@@ -1,6 +1,8 @@
 import builtins
 import os
 import stat
+import subprocess
+import sys
 from pathlib import Path
 from typing import Callable, Dict, Generator, List, Optional, Tuple
 
@@ -20,12 +22,13 @@ from zulipterminal.cli.run import (
     main,
     parse_args,
 )
+from zulipterminal.config.themes import CompiledTheme
 from zulipterminal.model import ServerConnectionFailure
 from zulipterminal.version import ZT_VERSION
 
 
 MODULE = "zulipterminal.cli.run"
-CONTROLLER = MODULE + ".Controller"
+CONTROLLER = "zulipterminal.core.Controller"
 
 
 @pytest.mark.parametrize(
@@ -143,6 +146,12 @@ def test_main_help(capsys: CaptureFixture[str], options: str) -> None:
         "--color-depth",
         "--notify",
         "--no-notify",
+        "--trace-startup FILE",
+        "--record-events FILE",
+        "--replay-events FILE",
+        "--replay-speed SPEED",
+        "--profile-mode",
+        "--profile-thread",
     }
     optional_argument_lines = {
         line[2:] for line in lines if len(line) > 2 and line[2] == "-"
@@ -189,8 +198,10 @@ def test_valid_zuliprc_but_no_connection(
         "   theme 'zt_dark' specified from default config.",
         "   autohide setting 'no_autohide' specified from default config.",
         "   maximum footlinks value '3' specified from default config.",
+        "   maximum message lines value '100' specified from default config.",
         "   color depth setting '256' specified from default config.",
         "   notify setting 'disabled' specified from default config.",
+        "   renderer setting 'fast' specified from default config.",
         "\x1b[91m",
         f"Error connecting to Zulip server: {server_connection_error}.\x1b[0m",
     ]
@@ -226,7 +237,7 @@ def test_warning_regarding_incomplete_theme(
         MODULE + ".complete_and_incomplete_themes",
         return_value=expected_complete_incomplete_themes,
     )
-    mocker.patch(MODULE + ".generate_theme")
+    mocker.patch(MODULE + ".load_theme", return_value=CompiledTheme([], False))
 
     with pytest.raises(SystemExit) as e:
         main(["-c", minimal_zuliprc, "-t", bad_theme])
@@ -244,8 +255,10 @@ def test_warning_regarding_incomplete_theme(
         f"      {expected_warning}\x1b[0m",
         "   autohide setting 'no_autohide' specified from default config.",
         "   maximum footlinks value '3' specified from default config.",
+        "   maximum message lines value '100' specified from default config.",
         "   color depth setting '256' specified from default config.",
         "   notify setting 'disabled' specified from default config.",
+        "   renderer setting 'fast' specified from default config.",
         "\x1b[91m",
         f"Error connecting to Zulip server: {server_connection_error}.\x1b[0m",
     ]
@@ -270,6 +283,26 @@ def test_zt_version(capsys: CaptureFixture[str], options: str) -> None:
     assert captured.err == ""
 
 
+def test_zt_version__ui_not_imported() -> None:
+    # Run separately, since tests have already imported the UI
+    process = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from zulipterminal.cli.run import main\n"
+            "try: main(['--version'])\n"
+            "finally: print(' '.join(sys.modules), file=sys.stderr)",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    assert process.returncode == 0
+    imported_modules = set(process.stderr.split())
+    for module in ("urwid", "bs4", "requests", "zulipterminal.core"):
+        assert module not in imported_modules
+
+
 @pytest.mark.parametrize(
     "option, autohide",
     [
@@ -338,6 +371,25 @@ def test_main_multiple_notify_options(
     assert lines == expected
 
 
+@pytest.mark.parametrize("thread", ["events", "all"])
+def test_main_deterministic_profiling_of_other_threads(
+    capsys: CaptureFixture[str], thread: str
+) -> None:
+    with pytest.raises(SystemExit) as e:
+        main(["--profile-mode", "deterministic", "--profile-thread", thread])
+
+    assert str(e.value) == "1"
+
+    captured = capsys.readouterr()
+    expected = (
+        "\x1b[91m"
+        "Deterministic profiling is only possible of the main loop thread; "
+        f"you used '{thread}'"
+        "\x1b[0m"
+    )
+    assert captured.out.strip() == expected
+
+
 # NOTE: Fixture is necessary to ensure unreadable dir is garbage-collected
 # See pytest issue #7821
 @pytest.fixture
@@ -460,8 +512,10 @@ def test_successful_main_function_with_config(
         "   theme 'zt_dark' specified in zuliprc file (by alias 'default').",
         "   autohide setting 'autohide' specified in zuliprc file.",
         f"   maximum footlinks value {footlinks_output}",
+        "   maximum message lines value '100' specified from default config.",
         "   color depth setting '256' specified in zuliprc file.",
         "   notify setting 'enabled' specified in zuliprc file.",
+        "   renderer setting 'fast' specified from default config.",
     ]
     assert lines == expected_lines
 
@@ -479,6 +533,16 @@ def test_successful_main_function_with_config(
             "Configuration Error: Minimum value allowed for maximum-footlinks"
             " is 0; you used '-3'",
         ),
+        (
+            {"maximum-message-lines": "-1"},
+            "Configuration Error: maximum-message-lines should be 0 (no limit)"
+            " or greater; you used '-1'",
+        ),
+        (
+            {"maximum-message-lines": "many"},
+            "Configuration Error: maximum-message-lines should be 0 (no limit)"
+            " or greater; you used 'many'",
+        ),
     ],
 )
 def test_main_error_with_invalid_zuliprc_options(
@@ -1,27 +1,36 @@
 import re
 from copy import deepcopy
 from enum import Enum
+from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
 import pytest
 from pygments.styles.perldoc import PerldocStyle
+from pygments.token import Token
 from pytest_mock import MockerFixture
 
 from zulipterminal.config.regexes import REGEX_COLOR_VALID_FORMATS
 from zulipterminal.config.themes import (
+    PYGMENTS_ATTRIBUTES,
+    PYGMENTS_PARENT_TOKENS,
     REQUIRED_STYLES,
     THEMES,
+    CompiledTheme,
     InvalidThemeColorCode,
     ThemeSpec,
     add_pygments_style,
     all_themes,
     complete_and_incomplete_themes,
+    generate_theme,
+    load_theme,
     parse_themefile,
     valid_16_color_codes,
     validate_colors,
 )
 
 
+MODULE = "zulipterminal.config.themes"
+
 expected_complete_themes = {
     "zt_dark",
     "gruvbox_dark",
@@ -95,6 +104,69 @@ def test_complete_and_incomplete_themes() -> None:
     assert result == complete_and_incomplete_themes()
 
 
+@pytest.mark.parametrize("color_depth", [1, 16, 256, 2**24])
+def test_load_theme__cached(
+    mocker: MockerFixture, tmp_path: Path, color_depth: int
+) -> None:
+    mocker.patch(MODULE + ".THEME_CACHE_DIR", tmp_path)
+    generate = mocker.patch(MODULE + ".generate_theme", side_effect=generate_theme)
+    expected_theme = CompiledTheme(generate_theme("zt_dark", color_depth), True)
+
+    first_theme = load_theme("zt_dark", color_depth)
+    cached_theme = load_theme("zt_dark", color_depth)
+
+    assert first_theme == cached_theme == expected_theme
+    generate.assert_called_once_with("zt_dark", color_depth)
+    assert [path.suffix for path in tmp_path.iterdir()] == [".json"]
+
+
+@pytest.mark.parametrize(
+    "cache_content",
+    ["", "{", '{"sources": []}', '{"sources": "modified", "palette": []}'],
+    ids=["empty", "invalid_json", "incomplete", "modified_sources"],
+)
+def test_load_theme__cache_invalid(
+    mocker: MockerFixture, tmp_path: Path, cache_content: str
+) -> None:
+    mocker.patch(MODULE + ".THEME_CACHE_DIR", tmp_path)
+    load_theme("zt_dark", 256)
+    (cache_path,) = tmp_path.iterdir()
+    cache_path.write_text(cache_content)
+    generate = mocker.patch(MODULE + ".generate_theme", return_value=[])
+
+    theme = load_theme("zt_dark", 256)
+
+    assert theme == CompiledTheme([], True)
+    generate.assert_called_once_with("zt_dark", 256)
+    assert load_theme("zt_dark", 256) == theme
+
+
+def test_load_theme__theme_source_changed(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    theme_source = tmp_path / "theme.py"
+    theme_source.write_text("STYLES = {}")
+    mocker.patch(MODULE + ".THEME_CACHE_DIR", tmp_path / "cache")
+    mocker.patch(MODULE + "._THEME_SOURCES", [theme_source])
+    generate = mocker.patch(MODULE + ".generate_theme", return_value=[])
+    load_theme("zt_dark", 256)
+
+    theme_source.write_text("STYLES = {None: ()}")
+    load_theme("zt_dark", 256)
+
+    assert generate.call_count == 2
+
+
+def test_load_theme__cache_not_writable(mocker: MockerFixture, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "themes"
+    cache_dir.write_text("Not a directory")
+    mocker.patch(MODULE + ".THEME_CACHE_DIR", cache_dir)
+
+    theme = load_theme("zt_dark", 256)
+
+    assert theme == CompiledTheme(generate_theme("zt_dark", 256), True)
+
+
 @pytest.mark.parametrize(
     "color_depth, expected_urwid_theme",
     [
@@ -197,6 +269,33 @@ def test_add_pygments_style(
         assert style in urwid_theme
 
 
+@pytest.mark.parametrize(
+    "css_class, expected_attribute",
+    [
+        ("k", "pygments:k"),
+        ("s2", "pygments:s2"),
+        ("w", "pygments:w"),
+        ("pg", "pygments:pg"),  # Not a standard class
+    ],
+)
+def test_PYGMENTS_ATTRIBUTES(css_class: str, expected_attribute: str) -> None:
+    assert PYGMENTS_ATTRIBUTES[css_class] == expected_attribute
+
+
+@pytest.mark.parametrize(
+    "token, expected_parent",
+    [
+        (Token.Literal.String.Double, Token.Literal.String),
+        (Token.Keyword.Reserved, Token.Keyword),
+        (Token.Keyword, Token.Keyword),
+        (Token.Name.Builtin.Pseudo, None),  # 'bp' has no 'b' class
+    ],
+)
+def test_PYGMENTS_PARENT_TOKENS(token: Any, expected_parent: Any) -> None:
+    assert PYGMENTS_PARENT_TOKENS[token] == expected_parent
+    assert Token not in PYGMENTS_PARENT_TOKENS  # No class to inherit from
+
+
 # Validate 16-color-codes
 @pytest.mark.parametrize(
     "color_depth, theme_name",
@@ -12,8 +12,9 @@ from zulipterminal.config.keys import (
     keys_for_command,
     primary_key_for_command,
 )
-from zulipterminal.helper import Index, TidiedUserInfo
+from zulipterminal.helper import NEWEST_MESSAGE_ID, Index, TidiedUserInfo
 from zulipterminal.helper import initial_index as helper_initial_index
+from zulipterminal.helper import narrow_keys_of_message
 from zulipterminal.ui_tools.buttons import StreamButton, TopicButton, UserButton
 from zulipterminal.ui_tools.messages import MessageBox
 from zulipterminal.urwid_types import urwid_Size
@@ -42,6 +43,32 @@ def no_asynch(mocker: MockerFixture) -> None:
     mocker.patch("zulipterminal.helper.asynch")
 
 
+@pytest.fixture(autouse=True)
+def no_theme_cache(
+    mocker: MockerFixture, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    """
+    Keep compiled themes from being cached outside of tests.
+    """
+    mocker.patch(
+        "zulipterminal.config.themes.THEME_CACHE_DIR",
+        tmp_path_factory.getbasetemp() / "themes",
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_saved_sessions(
+    mocker: MockerFixture, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    """
+    Keep sessions from being saved or resumed outside of tests.
+    """
+    mocker.patch(
+        "zulipterminal.session.SESSION_DIR",
+        tmp_path_factory.getbasetemp() / "sessions",
+    )
+
+
 # --------------- Controller Fixtures -----------------------------------------
 
 
@@ -109,11 +136,9 @@ def msg_box(
     """
     Mocked MessageBox with stream message
     """
-    return MessageBox(
-        messages_successful_response["messages"][0],
-        mocker.patch("zulipterminal.model.Model"),
-        None,
-    )
+    model = mocker.patch("zulipterminal.model.Model")
+    model.controller.maximum_message_lines = 100
+    return MessageBox(messages_successful_response["messages"][0], model, None)
 
 
 # --------------- Model Fixtures ----------------------------------------------
@@ -824,6 +849,24 @@ def empty_index(
             edited_messages=set(),
             topics=defaultdict(list),
             search=set(),
+            search_terms=defaultdict(
+                set,
+                {
+                    "stream": {stream_msg_template["id"]},
+                    "test": {stream_msg_template["id"]},
+                    "private": {pm_template["id"], group_pm_template["id"]},
+                    "content": {
+                        stream_msg_template["id"],
+                        pm_template["id"],
+                        group_pm_template["id"],
+                    },
+                    "here": {
+                        stream_msg_template["id"],
+                        pm_template["id"],
+                        group_pm_template["id"],
+                    },
+                },
+            ),
             messages=defaultdict(
                 lambda: {},
                 {
@@ -832,51 +875,79 @@ def empty_index(
                     group_pm_template["id"]: group_pm_template,
                 },
             ),
+            contiguous_ranges=dict(),
         )
     )
 
 
 @pytest.fixture
-def index_all_messages(empty_index: Index) -> Index:
+def index_all_narrows(empty_index: Index) -> Index:
     """
-    Expected index of `initial_data` fixture when model.narrow = []
+    Expected index of `initial_data` fixture, when indexed in any narrow
     """
     index = empty_index
     index["all_msg_ids"] = {537286, 537287, 537288}
+    index["private_msg_ids"] = {537287, 537288}
+    index["private_msg_ids_by_user_ids"] = defaultdict(
+        set,
+        {
+            frozenset({5179, 5140}): {537287},
+            frozenset({5179, 5140, 5180}): {537288},
+        },
+    )
+    index["stream_msg_ids_by_stream_id"] = defaultdict(set, {205: {537286}})
+    index["topic_msg_ids"] = defaultdict(dict, {205: {"Test": {537286}}})
     return index
 
 
 @pytest.fixture
-def index_stream(empty_index: Index) -> Index:
+def fetched_index(empty_index: Index) -> Index:
     """
-    Expected index of initial_data when model.narrow = [['stream', '7']]
+    Index of `initial_data` fixture, with all messages of every narrow fetched
     """
     index = empty_index
-    index["stream_msg_ids_by_stream_id"] = defaultdict(set, {205: {537286}})
-    index["private_msg_ids"] = {537287, 537288}
+    narrow_keys = {
+        narrow_key
+        for message in index["messages"].values()
+        for narrow_key in narrow_keys_of_message(message)
+    }
+    narrow_keys.update({("starred",), ("mentioned",)})
+    index["contiguous_ranges"] = {
+        narrow_key: [(0, NEWEST_MESSAGE_ID)] for narrow_key in narrow_keys
+    }
     return index
 
 
 @pytest.fixture
-def index_topic(empty_index: Index) -> Index:
+def index_all_messages(fetched_index: Index) -> Index:
     """
-    Expected index of initial_data when model.narrow = [['stream', '7'],
-                                                        ['topic', 'Test']]
+    Index of `initial_data` fixture, as fetched when model.narrow = []
     """
-    index = empty_index
-    index["topic_msg_ids"] = defaultdict(dict, {205: {"Test": {537286}}})
+    index = fetched_index
+    index["all_msg_ids"] = {537286, 537287, 537288}
+    return index
+
+
+@pytest.fixture
+def index_stream(fetched_index: Index) -> Index:
+    """
+    Index of initial_data, as fetched when model.narrow = [['stream', '7']]
+    """
+    index = fetched_index
+    index["stream_msg_ids_by_stream_id"] = defaultdict(set, {205: {537286}})
+    index["private_msg_ids"] = {537287, 537288}
     return index
 
 
 @pytest.fixture
 def index_multiple_topic_msg(
-    empty_index: Index, extra_stream_msg_template: Message
+    fetched_index: Index, extra_stream_msg_template: Message
 ) -> Index:
     """
     Index of initial_data with multiple message when model.narrow = [['stream, '7'],
                                                                      ['topic', 'Test']]
     """
-    empty_index_with_multiple_topic_msg = empty_index
+    empty_index_with_multiple_topic_msg = fetched_index
     empty_index_with_multiple_topic_msg["messages"].update(
         {extra_stream_msg_template["id"]: extra_stream_msg_template}
     )
@@ -887,31 +958,18 @@ def index_multiple_topic_msg(
 
 
 @pytest.fixture
-def index_user(empty_index: Index) -> Index:
+def index_user(fetched_index: Index) -> Index:
     """
-    Expected index of initial_data when model.narrow = [['pm_with',
+    Index of initial_data, as fetched when model.narrow = [['pm_with',
                                                          'boo@zulip.com'],
     """
     user_ids = frozenset({5179, 5140})
-    index = empty_index
+    index = fetched_index
     index["private_msg_ids_by_user_ids"] = defaultdict(set, {user_ids: {537287}})
     index["private_msg_ids"] = {537287, 537288}
     return index
 
 
-@pytest.fixture
-def index_user_multiple(empty_index: Index) -> Index:
-    """
-    Expected index of initial_data when model.narrow = [['pm_with',
-                                            'boo@zulip.com, bar@zulip.com'],
-    """
-    user_ids = frozenset({5179, 5140, 5180})
-    index = empty_index
-    index["private_msg_ids_by_user_ids"] = defaultdict(set, {user_ids: {537288}})
-    index["private_msg_ids"] = {537287, 537288}
-    return index
-
-
 @pytest.fixture(
     params=[
         {537286, 537287, 537288},
@@ -923,9 +981,9 @@ def index_user_multiple(empty_index: Index) -> Index:
         {537287, 537288},
     ]
 )
-def index_all_starred(empty_index: Index, request: Any) -> Index:
+def index_all_starred(fetched_index: Index, request: Any) -> Index:
     msgs_with_stars = request.param
-    index = empty_index
+    index = fetched_index
     index["starred_msg_ids"] = msgs_with_stars
     index["private_msg_ids"] = {537287, 537288}
     for msg_id, msg in index["messages"].items():
@@ -936,10 +994,10 @@ def index_all_starred(empty_index: Index, request: Any) -> Index:
 
 @pytest.fixture()
 def index_all_mentions(
-    empty_index: Index, mentioned_messages_combination: Tuple[Set[int], Set[int]]
+    fetched_index: Index, mentioned_messages_combination: Tuple[Set[int], Set[int]]
 ) -> Index:
     mentioned_messages, wildcard_mentioned_messages = mentioned_messages_combination
-    index = empty_index
+    index = fetched_index
     index["mentioned_msg_ids"] = mentioned_messages | wildcard_mentioned_messages
     index["private_msg_ids"] = {537287, 537288}
     for msg_id, msg in index["messages"].items():
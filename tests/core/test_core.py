@@ -1,5 +1,8 @@
 import os
+import signal
 import webbrowser
+from collections import OrderedDict
+from pathlib import Path
 from platform import platform
 from threading import Thread, Timer
 from typing import Any, Dict, List, Optional, Set, Tuple
@@ -8,10 +11,23 @@ import pyperclip
 import pytest
 from pytest import param as case
 from pytest_mock import MockerFixture
-
-from zulipterminal.config.themes import generate_theme
-from zulipterminal.core import Controller
-from zulipterminal.helper import Index
+from urwid.display_common import AttrSpecError
+
+from zulipterminal.config.themes import (
+    CompiledTheme,
+    InvalidThemeColorCode,
+    generate_theme,
+)
+from zulipterminal.core import METRICS_LOG_INTERVAL, Controller
+from zulipterminal.helper import (
+    NEWEST_MESSAGE_ID,
+    Index,
+    Narrow,
+    update_contiguous_ranges,
+)
+from zulipterminal.scheduler import ScheduledClient
+from zulipterminal.session import saved_session_path
+from zulipterminal.ui_tools.utils import MessageBoxCache
 from zulipterminal.version import ZT_VERSION
 
 
@@ -52,11 +68,18 @@ class TestController:
         result = Controller(
             config_file=self.config_file,
             maximum_footlinks=self.maximum_footlinks,
+            maximum_message_lines=100,
             theme_name=self.theme_name,
             theme=self.theme,
             color_depth=256,
+            renderer="fast",
             in_explore_mode=self.in_explore_mode,
             debug_path=None,
+            record_events_path=None,
+            replay_events_path=None,
+            replay_speed=1.0,
+            profile_mode="sampling",
+            profile_thread="main",
             **dict(
                 autohide=self.autohide,
                 notify=self.notify_enabled,
@@ -64,6 +87,14 @@ class TestController:
         )
         result.view.message_view = mocker.Mock()  # set in View.__init__
         result.model.server_url = SERVER_URL
+        # These are set in Model.__init__
+        result.model.message_box_cache = MessageBoxCache()
+        result.model.narrow_generation = 0
+        result.model.compiled_narrow = Narrow()
+        result.model.stream_id = None
+        result.model.recipients = frozenset()
+        result.model.user_dict = {}
+        result.model.search_results = OrderedDict()
         return result
 
     def test_initialize_controller(
@@ -73,7 +104,13 @@ class TestController:
             config_file=self.config_file,
             client="ZulipTerminal/" + ZT_VERSION + " " + platform(),
         )
-        self.model.assert_called_once_with(controller)
+        assert isinstance(controller.client, ScheduledClient)
+        self.model.assert_called_once_with(
+            controller,
+            session_path=saved_session_path(
+                controller.client.base_url, controller.client.email
+            ),
+        )
         self.view.assert_called_once_with(controller)
         self.poll_for_events.assert_called_once_with()
         assert controller.theme == self.theme
@@ -86,6 +123,232 @@ class TestController:
             ]
         )
 
+    @pytest.mark.parametrize(
+        "session_saved, deregistered",
+        [(True, False), (False, True)],
+        ids=["session_saved", "session_not_saved"],
+    )
+    def test_exit_handler(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        session_saved: bool,
+        deregistered: bool,
+    ) -> None:
+        save_session = mocker.patch(MODEL + ".save_session", return_value=session_saved)
+        deregister = mocker.patch.object(controller.client, "deregister")
+        controller.model.queue_id = "1"
+
+        with pytest.raises(SystemExit):
+            controller.exit_handler(signal.SIGINT, None)
+
+        save_session.assert_called_once_with()
+        # The event queue is only kept for resuming a saved session
+        assert deregister.called == deregistered
+
+    def test_log_performance_metrics(
+        self, mocker: MockerFixture, controller: Controller, tmp_path: Path
+    ) -> None:
+        mocker.patch(MODULE + ".metrics.report", return_value="METRICS")
+        controller.debug_path = str(tmp_path / "debug.log")
+
+        controller._log_performance_metrics()
+
+        with open(controller.debug_path) as debug_log:
+            assert "METRICS" in debug_log.read()
+        controller.loop.set_alarm_in.assert_called_once_with(
+            METRICS_LOG_INTERVAL, controller._log_performance_metrics
+        )
+
+    def test_trace_first_draw(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        startup_trace = mocker.patch(MODULE + ".startup_trace")
+
+        controller._trace_first_draw()
+        (finish_startup_trace,) = controller.loop.event_loop.enter_idle.call_args[0]
+        finish_startup_trace()
+
+        startup_trace.record.assert_called_once()
+        assert startup_trace.record.call_args[0][0] == "Draw first screen"
+        startup_trace.finish.assert_called_once_with()
+
+    def test_toggle_profiler(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        profiler: Any = mocker.Mock(is_running=False, mode="sampling", thread="main")
+        profiler.stop.return_value = "/tmp/profile.txt"
+        controller.profiler = profiler
+        report_warning = mocker.patch.object(controller, "report_warning")
+        report_success = mocker.patch.object(controller, "report_success")
+
+        controller.toggle_profiler()
+
+        profiler.start.assert_called_once_with()
+        report_warning.assert_called_once()
+
+        profiler.is_running = True
+        controller.toggle_profiler()
+
+        profiler.stop.assert_called_once_with()
+        report_success.assert_called_once_with(
+            ["Profile saved to /tmp/profile.txt"], duration=10
+        )
+
+    @pytest.mark.parametrize(
+        "theme_name, color_depth, stream_colors",
+        [
+            ("zt_blue", 256, []),
+            ("zt_dark", 1, ["#bfd56f"]),
+            ("zt_light", 2**24, ["#bfd56f", "#f5ce6e"]),
+        ],
+    )
+    def test_switch_theme(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        theme_name: str,
+        color_depth: int,
+        stream_colors: List[str],
+    ) -> None:
+        for color in stream_colors:
+            controller.theme.append((color, "", "", "bold", f"{color}, bold", "g19"))
+        palette = generate_theme(theme_name, color_depth)
+        mocker.patch(
+            MODULE + ".load_theme", return_value=CompiledTheme(list(palette), True)
+        )
+        report_success = mocker.patch.object(controller, "report_success")
+        screen = controller.loop.screen
+
+        switched = controller.switch_theme(theme_name, color_depth)
+
+        assert switched
+        assert controller.theme_name == theme_name
+        assert controller.color_depth == color_depth
+        assert controller.theme[: len(palette)] == palette
+        assert [style[0] for style in controller.theme[len(palette) :]] == [
+            name for color in stream_colors for name in (color, "s" + color)
+        ]
+        assert controller.view.palette is controller.theme
+        screen.set_terminal_properties.assert_called_once_with(colors=color_depth)
+        screen.register_palette.assert_called_once_with(controller.theme)
+        screen.clear.assert_called_once_with()
+        report_success.assert_called_once_with(
+            [f"Switched to theme '{theme_name}' at color depth {color_depth}"]
+        )
+
+    def test_switch_theme__invalid_theme(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        mocker.patch(MODULE + ".load_theme", side_effect=InvalidThemeColorCode)
+        report_error = mocker.patch.object(controller, "report_error")
+        screen = controller.loop.screen
+
+        switched = controller.switch_theme("zt_blue", 16)
+
+        assert not switched
+        assert (controller.theme_name, controller.color_depth) == ("zt_dark", 256)
+        screen.register_palette.assert_not_called()
+        report_error.assert_called_once_with(
+            ["Theme 'zt_blue' cannot be shown at color depth 16"]
+        )
+
+    def test_switch_theme__palette_not_displayable(
+        self, mocker: MockerFixture, controller: Controller
+    ) -> None:
+        previous_palette = controller.theme
+        mocker.patch(
+            MODULE + ".load_theme",
+            return_value=CompiledTheme(generate_theme("zt_blue", 2**24), True),
+        )
+        report_error = mocker.patch.object(controller, "report_error")
+        screen = controller.loop.screen
+        screen.register_palette.side_effect = [AttrSpecError, None]
+
+        switched = controller.switch_theme("zt_blue", 2**24)
+
+        assert not switched
+        assert (controller.theme_name, controller.color_depth) == ("zt_dark", 256)
+        assert controller.theme is previous_palette
+        assert screen.set_terminal_properties.call_args_list == [
+            mocker.call(colors=2**24),
+            mocker.call(colors=256),
+        ]
+        screen.register_palette.assert_called_with(previous_palette)
+        screen.clear.assert_not_called()
+        report_error.assert_called_once_with(
+            ["Theme 'zt_blue' cannot be shown at color depth 16777216"]
+        )
+
+    @pytest.mark.parametrize(
+        "switchable, expected_switches",
+        [
+            case(
+                [True],
+                [("zt_light", 256)],
+                id="next_theme",
+            ),
+            case(
+                [False, True],
+                [("zt_light", 256), ("zt_blue", 256)],
+                id="skipping_theme_not_shown",
+            ),
+            case(
+                [False] * 4,
+                [
+                    ("zt_light", 256),
+                    ("zt_blue", 256),
+                    ("gruvbox_dark", 256),
+                    ("gruvbox_light", 256),
+                ],
+                id="no_other_theme_shown",
+            ),
+        ],
+    )
+    def test_cycle_theme(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        switchable: List[bool],
+        expected_switches: List[Tuple[str, int]],
+    ) -> None:
+        switch_theme = mocker.patch.object(
+            controller, "switch_theme", side_effect=switchable
+        )
+
+        controller.cycle_theme()
+
+        assert switch_theme.call_args_list == [
+            mocker.call(*switch) for switch in expected_switches
+        ]
+
+    @pytest.mark.parametrize(
+        "color_depth, switchable, expected_depths",
+        [
+            (256, [True], [2**24]),
+            (2**24, [True], [1]),
+            (1, [False, True], [16, 256]),
+        ],
+    )
+    def test_cycle_color_depth(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        color_depth: int,
+        switchable: List[bool],
+        expected_depths: List[int],
+    ) -> None:
+        controller.color_depth = color_depth
+        switch_theme = mocker.patch.object(
+            controller, "switch_theme", side_effect=switchable
+        )
+
+        controller.cycle_color_depth()
+
+        assert switch_theme.call_args_list == [
+            mocker.call("zt_dark", depth) for depth in expected_depths
+        ]
+
     def test_initial_editor_mode(self, controller: Controller) -> None:
         assert not controller.is_in_editor_mode()
 
@@ -149,6 +412,158 @@ class TestController:
         id_list = index_stream["stream_msg_ids_by_stream_id"][stream_id]
         assert {widget.original_widget.message["id"]} == id_list
 
+    @pytest.mark.parametrize(
+        "stream_ranges, anchor, expected_fetch",
+        [
+            case([(0, 10000000000000000)], None, None, id="oldest_message_known"),
+            case(
+                [(537200, 10000000000000000)],
+                None,
+                dict(num_before=30, num_after=0, anchor=537200),
+                id="few_messages_known:older_fetched",
+            ),
+            case(
+                [(537200, 537300)],
+                None,
+                dict(num_before=30, num_after=10, anchor=None),
+                id="few_messages_known:around_first_unread_fetched",
+            ),
+            case(
+                [],
+                None,
+                dict(num_before=30, num_after=10, anchor=None),
+                id="no_messages_known",
+            ),
+            case(
+                [(0, 537286), (537290, 10000000000000000)],
+                537286,
+                None,
+                id="anchor_known_in_older_range",
+            ),
+            case(
+                [(0, 537200), (537290, 10000000000000000)],
+                537286,
+                dict(num_before=30, num_after=10, anchor=537286),
+                id="anchor_not_known",
+            ),
+        ],
+    )
+    def test_narrow_to_stream__fetch_context(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        index_stream: Index,
+        stream_ranges: List[Tuple[int, int]],
+        anchor: Optional[int],
+        expected_fetch: Optional[Dict[str, Any]],
+        stream_id: int = 205,
+        stream_name: str = "PTEST",
+    ) -> None:
+        controller.model.narrow = []
+        controller.model.index = index_stream
+        index_stream["contiguous_ranges"][("stream", stream_id)] = stream_ranges
+        controller.view.message_view = mocker.patch("urwid.ListBox")
+        controller.model.stream_dict = {
+            stream_id: {
+                "color": "#ffffff",
+                "name": stream_name,
+            }
+        }
+        controller.model.muted_streams = set()
+        mocker.patch(MODEL + ".is_muted_topic", return_value=False)
+        get_messages = mocker.patch(MODEL + ".get_messages")
+        set_footer_text = mocker.patch.object(controller.view, "set_footer_text")
+        mocker.patch.object(controller, "update_screen")
+
+        controller.narrow_to_stream(
+            stream_name=stream_name, contextual_message_id=anchor
+        )
+
+        if expected_fetch is not None:
+            get_messages.assert_called_once_with(**expected_fetch)
+            assert set_footer_text.call_args_list == [
+                mocker.call(["Loading messages..."], "task:warning"),
+                mocker.call(),
+            ]
+        else:
+            get_messages.assert_not_called()
+            set_footer_text.assert_not_called()
+        assert controller.is_loading_narrow is False
+        controller.view.message_view.log.extend.assert_called_once()
+
+    def test_narrow_to_stream__oldest_of_all_messages_known(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        index_stream: Index,
+        messages_successful_response: Dict[str, Any],
+        stream_id: int = 205,
+        stream_name: str = "PTEST",
+    ) -> None:
+        controller.model.narrow = []
+        controller.model.index = index_stream
+        index_stream["contiguous_ranges"] = {}
+        # Fetched all messages, back to the oldest one the user received
+        update_contiguous_ranges(
+            index_stream,
+            (),
+            messages_successful_response["messages"],
+            first_id=0,
+            last_id=NEWEST_MESSAGE_ID,
+        )
+        controller.view.message_view = mocker.patch("urwid.ListBox")
+        controller.model.stream_dict = {
+            stream_id: {
+                "color": "#ffffff",
+                "name": stream_name,
+            }
+        }
+        controller.model.muted_streams = set()
+        mocker.patch(MODEL + ".is_muted_topic", return_value=False)
+        get_messages = mocker.patch(MODEL + ".get_messages")
+        mocker.patch.object(controller.view, "set_footer_text")
+        mocker.patch.object(controller, "update_screen")
+
+        controller.narrow_to_stream(stream_name=stream_name)
+
+        # Messages sent before subscribing to the stream may be older
+        get_messages.assert_called_once_with(num_before=30, num_after=10, anchor=None)
+
+    def test_narrow_to_stream__narrow_changed_while_fetching(
+        self,
+        mocker: MockerFixture,
+        controller: Controller,
+        index_stream: Index,
+        stream_id: int = 205,
+        stream_name: str = "PTEST",
+    ) -> None:
+        controller.model.narrow = []
+        controller.model.index = index_stream
+        index_stream["contiguous_ranges"][("stream", stream_id)] = []
+        controller.view.message_view = mocker.patch("urwid.ListBox")
+        controller.model.stream_dict = {
+            stream_id: {
+                "color": "#ffffff",
+                "name": stream_name,
+            }
+        }
+
+        def change_narrow(**kwargs: Any) -> str:
+            controller.model.narrow_generation += 1
+            return ""
+
+        mocker.patch(MODEL + ".get_messages", side_effect=change_narrow)
+        set_footer_text = mocker.patch.object(controller.view, "set_footer_text")
+        update_screen = mocker.patch.object(controller, "update_screen")
+
+        controller.narrow_to_stream(stream_name=stream_name)
+
+        controller.view.message_view.log.clear.assert_called_once_with()
+        controller.view.message_view.log.extend.assert_not_called()
+        update_screen.assert_not_called()
+        set_footer_text.assert_called_once_with(["Loading messages..."], "task:warning")
+        assert controller.is_loading_narrow is True
+
     @pytest.mark.parametrize(
         ["initial_narrow", "initial_stream_id", "anchor", "expected_final_focus"],
         [
@@ -182,6 +597,7 @@ class TestController:
         controller.model.narrow = initial_narrow
         controller.model.index = index_multiple_topic_msg
         controller.model.stream_id = initial_stream_id
+        controller.model.compiled_narrow = controller.model._compile_narrow()
         controller.view.message_view = mocker.patch("urwid.ListBox")
         controller.model.stream_dict = {
             stream_id: {
@@ -437,9 +853,14 @@ class TestController:
         mocker.patch(MODULE + ".Screen.tty_signal_keys")
         controller.loop.screen.tty_signal_keys = mocker.Mock(return_value={})
 
+        assert isinstance(controller.client, ScheduledClient)
+        assert controller.client.wait_in_main_thread
+
         controller.main()
 
         assert controller.loop.run.call_count == 1
+        # Requests from the UI are not delayed by rate limits
+        assert not controller.client.wait_in_main_thread
 
     @pytest.mark.parametrize(
         "muted_streams, action", [({205, 89}, "unmuting"), ({89}, "muting")]
@@ -506,11 +927,15 @@ class TestController:
         controller.model.index = index_search_messages  # Any initial search index
         controller.view.message_view = mocker.patch("urwid.ListBox")
         controller.model.narrow = initial_narrow
+        controller.model.stream_id = 205
+        controller.model.compiled_narrow = controller.model._compile_narrow()
 
         def set_msg_ids(*args: Any, **kwargs: Any) -> None:
             controller.model.index["search"].update(msg_ids)
 
         get_message.side_effect = set_msg_ids
+        set_footer_text = mocker.patch.object(controller.view, "set_footer_text")
+        update_screen = mocker.patch.object(controller, "update_screen")
         assert controller.model.index["search"] == {500}
 
         controller.search_messages("FOO")
@@ -521,6 +946,65 @@ class TestController:
         )
         create_msg.assert_called_once_with(controller.model, msg_ids)
         assert controller.model.index == dict(index_search_messages, search=msg_ids)
+        assert controller.model.search_results == {
+            controller.model.compiled_narrow: msg_ids
+        }
+        assert set_footer_text.call_args_list == [
+            mocker.call(["Searching..."], "task:warning"),
+            mocker.call(),
+        ]
+        assert controller.is_loading_narrow is False
+        update_screen.assert_called_once_with()
+
+    def test_search_message__refines_local_results(
+        self,
+        controller: Controller,
+        mocker: MockerFixture,
+        index_search_messages: Index,
+    ) -> None:
+        get_messages = mocker.patch(MODEL + ".get_messages")
+        create_msg = mocker.patch(MODULE + ".create_msg_box_list", return_value=[])
+        mocker.patch.object(controller.view, "set_footer_text")
+        mocker.patch.object(controller, "update_screen")
+        controller.model.index = index_search_messages
+        controller.model.index["all_msg_ids"] = {537286, 537287, 537288}
+        controller.model.narrow = []
+        controller.model.compiled_narrow = controller.model._compile_narrow()
+
+        def add_server_result(*args: Any, **kwargs: Any) -> None:
+            controller.model.index["search"].add(600)
+
+        get_messages.side_effect = add_server_result
+
+        controller.search_messages("private")
+
+        # Local results shown first, then those including the server's results
+        assert create_msg.call_args_list == [
+            mocker.call(controller.model, {537287, 537288}),
+            mocker.call(controller.model, {537287, 537288, 600}),
+        ]
+
+    def test_search_message__while_loading_narrow(
+        self,
+        controller: Controller,
+        mocker: MockerFixture,
+        index_search_messages: Index,
+    ) -> None:
+        mocker.patch(MODEL + ".get_messages")
+        mocker.patch(MODULE + ".create_msg_box_list", return_value=[])
+        controller.model.index = index_search_messages
+        controller.view.message_view = mocker.patch("urwid.ListBox")
+        controller.model.narrow = [["stream", "PTEST"]]
+        controller.model.stream_id = 205
+        set_footer_text = mocker.patch.object(controller.view, "set_footer_text")
+        mocker.patch.object(controller, "update_screen")
+        controller.is_loading_narrow = True
+
+        controller.search_messages("FOO")
+
+        assert controller.is_loading_narrow is False
+        # Loading of the narrow stops as soon as local results are shown
+        assert set_footer_text.call_args_list[0] == mocker.call()
 
     @pytest.mark.parametrize(
         "screen_size, expected_popup_size",
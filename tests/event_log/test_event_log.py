@@ -0,0 +1,198 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+import zulip
+from pytest_mock import MockerFixture
+
+from zulipterminal.event_log import RecordingClient, ReplayClient
+
+
+MODULE = "zulipterminal.event_log"
+
+SERVER_URL = "https://chat.zulip.zulip"
+
+
+@pytest.fixture
+def client(mocker: MockerFixture) -> Any:
+    client = mocker.create_autospec(zulip.Client, instance=True)
+    client.base_url = SERVER_URL + "/api/"
+    client.register.return_value = {"result": "success", "queue_id": "1"}
+    client.get_messages.return_value = {"result": "success", "messages": []}
+    client.get_events.return_value = {"result": "success", "events": []}
+    return client
+
+
+@pytest.fixture
+def event_log(tmp_path: Path) -> str:
+    return str(tmp_path / "events.log")
+
+
+def write_log(path: str, entries: List[Dict[str, Any]]) -> None:
+    with open(path, "w") as log_file:
+        log_file.write(json.dumps({"base_url": SERVER_URL + "/api/"}) + "\n")
+        for entry in entries:
+            log_file.write(json.dumps(entry) + "\n")
+
+
+def register_entry(time: float, queue_id: str) -> Dict[str, Any]:
+    return {
+        "time": time,
+        "call": "register",
+        "request": {},
+        "response": {"result": "success", "queue_id": queue_id},
+    }
+
+
+def events_entry(time: float, event_ids: List[int]) -> Dict[str, Any]:
+    return {
+        "time": time,
+        "call": "get_events",
+        "request": {},
+        "response": {
+            "result": "success",
+            "events": [{"id": event_id, "type": "heartbeat"} for event_id in event_ids],
+        },
+    }
+
+
+class TestRecordingClient:
+    def test_records_responses(self, client: Any, event_log: str) -> None:
+        recording_client = RecordingClient(client, event_log)
+
+        recording_client.register(event_types=["message"])
+        recording_client.get_messages({"anchor": "newest"})
+        recording_client.get_events(queue_id="1", last_event_id=-1)
+
+        with open(event_log) as log_file:
+            header, *entries = (json.loads(line) for line in log_file)
+        assert header["base_url"] == SERVER_URL + "/api/"
+        assert [entry["call"] for entry in entries] == [
+            "register",
+            "get_messages",
+            "get_events",
+        ]
+        assert entries[0]["request"]["event_types"] == ["message"]
+        assert entries[1]["request"] == {"message_filters": {"anchor": "newest"}}
+        assert entries[2]["response"] == client.get_events.return_value
+
+    def test_other_calls_not_recorded(self, client: Any, event_log: str) -> None:
+        recording_client = RecordingClient(client, event_log)
+
+        recording_client.update_presence({"status": "active"})
+
+        client.update_presence.assert_called_once_with({"status": "active"})
+        with open(event_log) as log_file:
+            assert len(log_file.readlines()) == 1  # Only the header
+
+
+class TestReplayClient:
+    def test_init__no_registration(self, event_log: str) -> None:
+        write_log(event_log, [events_entry(1, [0])])
+
+        with pytest.raises(ValueError):
+            ReplayClient(event_log, speed=1)
+
+    def test_register__again_after_events(self, event_log: str) -> None:
+        write_log(
+            event_log,
+            [
+                register_entry(0, "1"),
+                events_entry(1, [0]),
+                register_entry(2, "2"),
+                events_entry(3, [0]),
+            ],
+        )
+        replay_client = ReplayClient(event_log, speed=0)
+
+        assert replay_client.register()["queue_id"] == "1"
+        replay_client.get_events()
+        assert replay_client.register()["queue_id"] == "2"
+
+    @pytest.mark.parametrize(
+        "message_filters, expected_messages",
+        [
+            ({"anchor": "newest"}, [{"id": 1}]),
+            ({"anchor": 1}, []),
+        ],
+        ids=["recorded", "not_recorded"],
+    )
+    def test_get_messages(
+        self,
+        event_log: str,
+        message_filters: Dict[str, Any],
+        expected_messages: List[Dict[str, Any]],
+    ) -> None:
+        write_log(
+            event_log,
+            [
+                register_entry(0, "1"),
+                {
+                    "time": 0,
+                    "call": "get_messages",
+                    "request": {"message_filters": {"anchor": "newest"}},
+                    "response": {"result": "success", "messages": [{"id": 1}]},
+                },
+            ],
+        )
+        replay_client = ReplayClient(event_log, speed=1)
+
+        response = replay_client.get_messages(message_filters)
+
+        assert response["result"] == "success"
+        assert response["messages"] == expected_messages
+
+    @pytest.mark.parametrize(
+        "speed, expected_sleeps",
+        [(1, [2, 4]), (2, [1, 2]), (0, [])],
+        ids=["recorded_speed", "double_speed", "fastest"],
+    )
+    def test_get_events__at_speed(
+        self,
+        mocker: MockerFixture,
+        event_log: str,
+        speed: float,
+        expected_sleeps: List[float],
+    ) -> None:
+        write_log(
+            event_log,
+            [
+                register_entry(0, "1"),
+                events_entry(1, [0]),
+                events_entry(3, [1, 2]),
+                events_entry(5, [3]),
+            ],
+        )
+        mocker.patch(MODULE + ".time.monotonic", return_value=100)
+        sleep = mocker.patch(MODULE + ".time.sleep")
+        replay_client = ReplayClient(event_log, speed=speed)
+
+        event_ids = [
+            [event["id"] for event in replay_client.get_events()["events"]]
+            for _ in range(3)
+        ]
+
+        assert event_ids == [[0], [1, 2], [3]]
+        assert [call.args[0] for call in sleep.call_args_list] == expected_sleeps
+
+    def test_get_events__finished(self, mocker: MockerFixture, event_log: str) -> None:
+        write_log(event_log, [register_entry(0, "1"), events_entry(1, [0, 1])])
+        mocker.patch(MODULE + ".time.sleep")
+        replay_client = ReplayClient(event_log, speed=0)
+
+        replay_client.get_events()
+        assert not replay_client.finished.is_set()
+        response = replay_client.get_events()
+
+        assert response["events"] == []
+        assert replay_client.finished.is_set()
+        assert replay_client.event_count == 2
+
+    def test_unrecorded_calls_fail(self, event_log: str) -> None:
+        write_log(event_log, [register_entry(0, "1")])
+        replay_client = ReplayClient(event_log, speed=1)
+
+        response = replay_client.get_raw_message(1)
+
+        assert response == {"result": "error", "msg": "Not available when replaying"}
@@ -1,24 +1,32 @@
-from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pytest
 from pytest import param as case
 from pytest_mock import MockerFixture
 
-from zulipterminal.api_types import Composition
+from zulipterminal.api_types import Composition, Message
 from zulipterminal.config.keys import primary_key_for_command
 from zulipterminal.helper import (
     Index,
+    Narrow,
+    add_search_terms,
     canonicalize_color,
     classify_unread_counts,
     display_error_if_present,
     download_media,
+    find_contiguous_range,
     get_unused_fence,
     hash_util_decode,
     index_messages,
+    narrow_keys_of_message,
     notify_if_message_sent_outside_narrow,
     open_media,
     powerset,
     process_media,
+    remove_search_terms,
+    search_terms_of_message,
+    truncate_newest_contiguous_ranges,
+    update_contiguous_ranges,
 )
 
 
@@ -27,88 +35,47 @@ MODEL = "zulipterminal.model.Model"
 SERVER_URL = "https://chat.zulip.org"
 
 
-def test_index_messages_narrow_all_messages(
-    mocker: MockerFixture,
-    messages_successful_response: Dict[str, Any],
-    index_all_messages: Index,
-    initial_index: Index,
-) -> None:
-    messages = messages_successful_response["messages"]
-    model = mocker.patch(MODEL + ".__init__", return_value=None)
-    model.index = initial_index
-    model.narrow = []
-    assert index_messages(messages, model, model.index) == index_all_messages
-
-
-def test_index_messages_narrow_stream(
-    mocker: MockerFixture,
-    messages_successful_response: Dict[str, Any],
-    index_stream: Index,
-    initial_index: Index,
-) -> None:
-    messages = messages_successful_response["messages"]
-    model = mocker.patch(MODEL + ".__init__", return_value=None)
-    model.index = initial_index
-    model.narrow = [["stream", "PTEST"]]
-    model.is_search_narrow.return_value = False
-    model.stream_id = 205
-    assert index_messages(messages, model, model.index) == index_stream
-
-
-def test_index_messages_narrow_topic(
-    mocker: MockerFixture,
-    messages_successful_response: Dict[str, Any],
-    index_topic: Index,
-    initial_index: Index,
-) -> None:
-    messages = messages_successful_response["messages"]
-    model = mocker.patch(MODEL + ".__init__", return_value=None)
-    model.index = initial_index
-    model.narrow = [["stream", "7"], ["topic", "Test"]]
-    model.is_search_narrow.return_value = False
-    model.stream_id = 205
-    assert index_messages(messages, model, model.index) == index_topic
-
-
-def test_index_messages_narrow_user(
+@pytest.mark.parametrize(
+    "narrow",
+    [
+        [],
+        [["stream", "PTEST"]],
+        [["stream", "PTEST"], ["topic", "Test"]],
+        [["is", "private"]],
+        [["pm_with", "boo@zulip.com"]],
+        [["pm_with", "boo@zulip.com, bar@zulip.com"]],
+        [["is", "starred"]],
+        [["is", "mentioned"]],
+    ],
+)
+def test_index_messages__any_narrow(
     mocker: MockerFixture,
     messages_successful_response: Dict[str, Any],
-    index_user: Index,
+    index_all_narrows: Index,
     initial_index: Index,
+    narrow: List[Any],
 ) -> None:
     messages = messages_successful_response["messages"]
     model = mocker.patch(MODEL + ".__init__", return_value=None)
     model.index = initial_index
-    model.narrow = [["pm_with", "boo@zulip.com"]]
+    model.narrow = narrow
     model.is_search_narrow.return_value = False
-    model.user_id = 5140
-    model.user_dict = {
-        "boo@zulip.com": {
-            "user_id": 5179,
-        }
-    }
-    assert index_messages(messages, model, model.index) == index_user
+    assert index_messages(messages, model, model.index) == index_all_narrows
 
 
-def test_index_messages_narrow_user_multiple(
+def test_index_messages__search_narrow(
     mocker: MockerFixture,
     messages_successful_response: Dict[str, Any],
-    index_user_multiple: Index,
+    index_all_narrows: Index,
     initial_index: Index,
 ) -> None:
     messages = messages_successful_response["messages"]
     model = mocker.patch(MODEL + ".__init__", return_value=None)
     model.index = initial_index
-    model.narrow = [["pm_with", "boo@zulip.com, bar@zulip.com"]]
-    model.is_search_narrow.return_value = False
-    model.user_id = 5140
-    model.user_dict = {
-        "boo@zulip.com": {
-            "user_id": 5179,
-        },
-        "bar@zulip.com": {"user_id": 5180},
-    }
-    assert index_messages(messages, model, model.index) == index_user_multiple
+    model.narrow = [["search", "content"]]
+    model.is_search_narrow.return_value = True
+    expected_index = dict(index_all_narrows, search={537286, 537287, 537288})
+    assert index_messages(messages, model, model.index) == expected_index
 
 
 @pytest.mark.parametrize(
@@ -126,7 +93,7 @@ def test_index_messages_narrow_user_multiple(
 def test_index_edited_message(
     mocker: MockerFixture,
     messages_successful_response: Dict[str, Any],
-    empty_index: Index,
+    index_all_narrows: Index,
     edited_msgs: Set[int],
     initial_index: Index,
 ) -> None:
@@ -137,9 +104,10 @@ def test_index_edited_message(
     model = mocker.patch(MODEL + ".__init__", return_value=None)
     model.index = initial_index
     model.narrow = []
+    model.is_search_narrow.return_value = False
 
     expected_index: Dict[str, Any] = dict(
-        empty_index, edited_messages=edited_msgs, all_msg_ids={537286, 537287, 537288}
+        index_all_narrows, edited_messages=edited_msgs
     )
     for msg_id, msg in expected_index["messages"].items():
         if msg_id in edited_msgs:
@@ -163,7 +131,7 @@ def test_index_edited_message(
 def test_index_starred(
     mocker: MockerFixture,
     messages_successful_response: Dict[str, Any],
-    empty_index: Index,
+    index_all_narrows: Index,
     msgs_with_stars: Set[int],
     initial_index: Index,
 ) -> None:
@@ -177,7 +145,7 @@ def test_index_starred(
     model.narrow = [["is", "starred"]]
     model.is_search_narrow.return_value = False
     expected_index: Dict[str, Any] = dict(
-        empty_index, private_msg_ids={537287, 537288}, starred_msg_ids=msgs_with_stars
+        index_all_narrows, starred_msg_ids=msgs_with_stars
     )
     for msg_id, msg in expected_index["messages"].items():
         if msg_id in msgs_with_stars and "starred" not in msg["flags"]:
@@ -189,7 +157,7 @@ def test_index_starred(
 def test_index_mentioned_messages(
     mocker: MockerFixture,
     messages_successful_response: Dict[str, Any],
-    empty_index: Index,
+    index_all_narrows: Index,
     mentioned_messages_combination: Tuple[Set[int], Set[int]],
     initial_index: Index,
 ) -> None:
@@ -209,8 +177,7 @@ def test_index_mentioned_messages(
     model.narrow = [["is", "mentioned"]]
     model.is_search_narrow.return_value = False
     expected_index: Dict[str, Any] = dict(
-        empty_index,
-        private_msg_ids={537287, 537288},
+        index_all_narrows,
         mentioned_msg_ids=(mentioned_messages | wildcard_mentioned_messages),
     )
 
@@ -226,6 +193,274 @@ def test_index_mentioned_messages(
     assert index_messages(messages, model, model.index) == expected_index
 
 
+@pytest.mark.parametrize(
+    "message_fixture_name, flags, expected_keys",
+    [
+        (
+            "stream_msg_template",
+            [],
+            [(), ("stream", 205), ("stream", 205, "Test")],
+        ),
+        (
+            "pm_template",
+            ["starred"],
+            [(), ("private",), ("private", frozenset({5179, 5140})), ("starred",)],
+        ),
+        (
+            "group_pm_template",
+            ["wildcard_mentioned"],
+            [
+                (),
+                ("private",),
+                ("private", frozenset({5179, 5140, 5180})),
+                ("mentioned",),
+            ],
+        ),
+    ],
+    ids=["stream_message", "starred_pm", "mentioned_group_pm"],
+)
+def test_narrow_keys_of_message(
+    request: Any,
+    message_fixture_name: str,
+    flags: List[str],
+    expected_keys: List[Tuple[Any, ...]],
+) -> None:
+    message = request.getfixturevalue(message_fixture_name)
+    message["flags"] = flags
+
+    assert narrow_keys_of_message(message) == expected_keys
+
+
+@pytest.mark.parametrize(
+    "content, subject, expected_terms",
+    [
+        case("<p>Hello World</p>", "", {"hello", "world"}, id="markup_stripped"),
+        case("<p>a&amp;b</p>", "", {"a", "b"}, id="entities_unescaped"),
+        case("<p>foo</p>", "Bar baz", {"foo", "bar", "baz"}, id="topic_included"),
+        case("<p>foo, FOO!</p>", "", {"foo"}, id="case_insensitive"),
+    ],
+)
+def test_search_terms_of_message(
+    stream_msg_template: Message,
+    content: str,
+    subject: str,
+    expected_terms: Set[str],
+) -> None:
+    message = stream_msg_template.copy()
+    message["content"] = content
+    message["subject"] = subject
+
+    assert search_terms_of_message(message) == expected_terms
+
+
+def test_add_search_terms__remove_search_terms(
+    initial_index: Index, stream_msg_template: Message, pm_template: Message
+) -> None:
+    index = initial_index
+    stream_msg = stream_msg_template.copy()
+    stream_msg["content"] = "<p>foo bar</p>"
+    stream_msg["subject"] = ""
+    pm = pm_template.copy()
+    pm["content"] = "<p>foo</p>"
+    pm["subject"] = ""
+
+    add_search_terms(index, stream_msg)
+    add_search_terms(index, pm)
+
+    assert index["search_terms"] == {"foo": {537286, 537287}, "bar": {537286}}
+
+    remove_search_terms(index, stream_msg)
+
+    assert index["search_terms"] == {"foo": {537287}}
+
+
+@pytest.mark.parametrize(
+    "narrow, contains_stream_msg, contains_pm, contains_group_pm",
+    [
+        case(Narrow(), True, True, True, id="all_messages"),
+        case(Narrow(("stream", 205)), True, False, False, id="stream"),
+        case(Narrow(("stream", 205, "Test")), True, False, False, id="topic"),
+        case(Narrow(("stream", 205, "Other")), False, False, False, id="other_topic"),
+        case(Narrow(("stream", 206)), False, False, False, id="other_stream"),
+        case(Narrow(("private",)), False, True, True, id="all_private"),
+        case(
+            Narrow(("private", frozenset({5179, 5140}))),
+            False,
+            True,
+            False,
+            id="private_with_user",
+        ),
+        case(Narrow(("mentioned",)), False, False, True, id="mentioned"),
+        case(Narrow(("starred",)), False, False, False, id="starred"),
+        case(Narrow(search="FOO"), False, False, False, id="search"),
+    ],
+)
+def test_Narrow_contains_message(
+    stream_msg_template: Message,
+    pm_template: Message,
+    group_pm_template: Message,
+    narrow: Narrow,
+    contains_stream_msg: bool,
+    contains_pm: bool,
+    contains_group_pm: bool,
+) -> None:
+    group_pm_template["flags"] = ["mentioned"]
+
+    assert narrow.contains_message(stream_msg_template) == contains_stream_msg
+    assert narrow.contains_message(pm_template) == contains_pm
+    assert narrow.contains_message(group_pm_template) == contains_group_pm
+
+
+@pytest.mark.parametrize(
+    "narrow_key, new_range, known_ranges, expected_ranges",
+    [
+        case(
+            (),
+            (537286, 537288),
+            {},
+            {
+                key: [(537286, 537288)]
+                for key in [
+                    (),
+                    ("private",),
+                    ("private", frozenset({5179, 5140})),
+                    ("private", frozenset({5179, 5140, 5180})),
+                ]
+            },
+            id="all_messages:narrows_of_messages_added_except_streams",
+        ),
+        case(
+            ("private",),
+            (537286, 537288),
+            {},
+            {
+                ("private",): [(537286, 537288)],
+                ("private", frozenset({5179, 5140})): [(537286, 537288)],
+                ("private", frozenset({5179, 5140, 5180})): [(537286, 537288)],
+            },
+            id="all_pms:only_narrows_within_added",
+        ),
+        case(
+            (),
+            (0, 10000000000000000),
+            {
+                ("stream", 205): [(537100, 537200), (537280, 537290)],
+                ("stream", 205, "Test"): [(537280, 537290)],
+            },
+            {
+                (): [(0, 10000000000000000)],
+                ("stream", 205): [(537100, 537200), (537280, 537290)],
+                ("stream", 205, "Test"): [(537280, 537290)],
+                ("private",): [(0, 10000000000000000)],
+                ("private", frozenset({5179, 5140})): [(0, 10000000000000000)],
+                ("private", frozenset({5179, 5140, 5180})): [(0, 10000000000000000)],
+            },
+            id="all_messages:stream_ranges_not_merged",
+        ),
+        case(
+            ("stream", 205),
+            (0, 537288),
+            {("stream", 205, "Test"): [(537100, 537200), (537300, 537400)]},
+            {
+                ("stream", 205): [(0, 537288)],
+                ("stream", 205, "Test"): [(0, 537288), (537300, 537400)],
+            },
+            id="stream:topics_of_messages_merged",
+        ),
+        case(
+            ("stream", 205, "Test"),
+            (537286, 537288),
+            {("stream", 205, "Test"): [(537200, 537286)]},
+            {("stream", 205, "Test"): [(537200, 537288)]},
+            id="topic:overlapping_range_merged",
+        ),
+        case(
+            ("stream", 205, "Test"),
+            (537286, 537288),
+            {("stream", 205, "Test"): [(537100, 537200), (537300, 537400)]},
+            {
+                ("stream", 205, "Test"): [
+                    (537100, 537200),
+                    (537286, 537288),
+                    (537300, 537400),
+                ]
+            },
+            id="topic:separate_ranges_kept_in_order",
+        ),
+        case(
+            ("stream", 205, "Test"),
+            (537200, 537300),
+            {("stream", 205, "Test"): [(537100, 537200), (537300, 537400)]},
+            {("stream", 205, "Test"): [(537100, 537400)]},
+            id="topic:gap_between_ranges_filled",
+        ),
+        case(
+            ("starred",),
+            (0, 10000000000000000),
+            {("starred",): [(537200, 537286)]},
+            {("starred",): [(0, 10000000000000000)]},
+            id="starred:all_messages_found",
+        ),
+    ],
+)
+def test_update_contiguous_ranges(
+    messages_successful_response: Dict[str, Any],
+    initial_index: Index,
+    narrow_key: Tuple[Any, ...],
+    new_range: Tuple[int, int],
+    known_ranges: Dict[Tuple[Any, ...], List[Tuple[int, int]]],
+    expected_ranges: Dict[Tuple[Any, ...], List[Tuple[int, int]]],
+) -> None:
+    messages = messages_successful_response["messages"]
+    initial_index["contiguous_ranges"] = known_ranges
+    first_id, last_id = new_range
+
+    update_contiguous_ranges(initial_index, narrow_key, messages, first_id, last_id)
+
+    assert initial_index["contiguous_ranges"] == expected_ranges
+
+
+def test_truncate_newest_contiguous_ranges(initial_index: Index) -> None:
+    newest = 10000000000000000
+    initial_index["contiguous_ranges"] = {
+        (): [(100, 200), (300, newest)],
+        ("stream", 205): [(450, newest)],
+        ("starred",): [(100, 200)],
+    }
+
+    keys = truncate_newest_contiguous_ranges(initial_index, 400)
+
+    assert keys == [(), ("stream", 205)]
+    assert initial_index["contiguous_ranges"] == {
+        (): [(100, 200), (300, 400)],
+        ("stream", 205): [(450, 450)],
+        ("starred",): [(100, 200)],
+    }
+
+
+@pytest.mark.parametrize(
+    "message_id, expected_range",
+    [
+        (None, (300, 400)),
+        (100, (100, 200)),
+        (150, (100, 200)),
+        (400, (300, 400)),
+        (250, None),
+    ],
+    ids=["newest", "first_id", "within_range", "last_id", "between_ranges"],
+)
+def test_find_contiguous_range(
+    message_id: Optional[int], expected_range: Optional[Tuple[int, int]]
+) -> None:
+    ranges = [(100, 200), (300, 400)]
+
+    assert find_contiguous_range(ranges, message_id) == expected_range
+
+
+def test_find_contiguous_range__no_ranges() -> None:
+    assert find_contiguous_range([]) is None
+
+
 @pytest.mark.parametrize(
     "iterable, map_func, expected_powerset",
     [
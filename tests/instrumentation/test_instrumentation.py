@@ -0,0 +1,128 @@
+import json
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from zulipterminal.instrumentation import Histogram, Metrics, Trace
+
+
+MODULE = "zulipterminal.instrumentation"
+
+
+@pytest.mark.parametrize(
+    "durations, percentile, expected_duration",
+    [
+        ([], 95, 0.0),
+        ([0.05], 50, 0.05),
+        ([1, 2, 3, 4], 50, 2.5),
+        ([1, 2, 3, 4], 95, 4),
+        ([1] * 99 + [20], 95, 1),
+        ([1] * 99 + [5000], 100, 5000),
+    ],
+)
+def test_histogram_percentile_ms(
+    durations: List[float], percentile: float, expected_duration: float
+) -> None:
+    histogram = Histogram()
+    for duration in durations:
+        histogram.add(duration)
+
+    assert histogram.percentile_ms(percentile) == expected_duration
+
+
+def test_histogram_add() -> None:
+    histogram = Histogram()
+
+    histogram.add(2)
+    histogram.add(6)
+
+    assert histogram.count == 2
+    assert histogram.mean_ms == 4
+    assert histogram.maximum_ms == 6
+
+
+def test_metrics_timed(mocker: MockerFixture) -> None:
+    mocker.patch(MODULE + ".time.perf_counter", side_effect=[1.0, 1.5])
+    metrics = Metrics()
+
+    @metrics.timed("fetch:operation")
+    def operation(value: int) -> int:
+        return value * 2
+
+    assert operation(2) == 4
+    histogram = metrics.snapshot()["fetch:operation"]
+    assert histogram.count == 1
+    assert histogram.total_ms == 500
+
+
+def test_metrics_timer__exception_recorded() -> None:
+    metrics = Metrics()
+
+    with pytest.raises(ValueError), metrics.timer("event:message"):
+        raise ValueError
+
+    assert metrics.snapshot()["event:message"].count == 1
+
+
+def test_metrics_summary() -> None:
+    metrics = Metrics()
+    metrics.record("render:MessageBox", 1)
+    metrics.record("fetch:index_messages", 1)
+    metrics.record("fetch:get_messages", 1)
+
+    summary = metrics.summary()
+
+    assert [
+        (category, [name for name, _ in histograms]) for category, histograms in summary
+    ] == [
+        ("Fetching & indexing", ["get_messages", "index_messages"]),
+        ("Rendering", ["MessageBox"]),
+    ]
+
+
+def test_metrics_reset() -> None:
+    metrics = Metrics()
+    metrics.record("render:MessageBox", 1)
+
+    metrics.reset()
+
+    assert metrics.snapshot() == {}
+    assert metrics.report().count("\n") == 0  # Only the heading
+
+
+def test_trace__not_started(tmp_path: Path) -> None:
+    trace = Trace()
+
+    with trace.span("Parse zuliprc"):
+        pass
+    trace.finish()
+
+    assert not trace.enabled
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace__spans_written(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch(MODULE + ".time.perf_counter", side_effect=[1.0, 1.5, 1.75])
+    trace_path = str(tmp_path / "trace.json")
+    trace = Trace()
+    trace.start(trace_path)
+
+    @trace.traced("Register")
+    def register() -> None:
+        pass
+
+    register()
+    trace.finish()
+
+    assert not trace.enabled
+    with open(trace_path) as trace_file:
+        metadata, span = json.load(trace_file)["traceEvents"]
+    assert metadata["ph"] == "M"
+    assert metadata["args"] == {"name": threading.current_thread().name}
+    assert span["name"] == "Register"
+    assert span["ts"] == 500_000
+    assert span["dur"] == 250_000
+    assert span["tid"] == metadata["tid"] == threading.get_ident()
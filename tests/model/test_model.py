@@ -1,14 +1,21 @@
 import json
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from copy import deepcopy
 from typing import Any, List, Optional, Tuple
 
 import pytest
+import requests
 from pytest import param as case
 from zulip import Client, ZulipError
 
 from zulipterminal.config.symbols import STREAM_TOPIC_SEPARATOR
-from zulipterminal.helper import initial_index, powerset
+from zulipterminal.helper import (
+    NEWEST_MESSAGE_ID,
+    Narrow,
+    initial_index,
+    powerset,
+    search_terms_of_message,
+)
 from zulipterminal.model import (
     MAX_MESSAGE_LENGTH,
     MAX_STREAM_NAME_LENGTH,
@@ -66,7 +73,7 @@ class TestModel:
         assert hasattr(model, "controller")
         assert hasattr(model, "client")
         assert model.narrow == []
-        assert model._have_last_message == {}
+        assert model.compiled_narrow == Narrow()
         assert model.stream_id is None
         assert model.stream_dict == stream_dict
         assert model.recipients == frozenset()
@@ -263,6 +270,87 @@ class TestModel:
             include_subscribers=True,
         )
 
+    def test_init__resumes_saved_session(self, model, tmp_path):
+        model.session_path = tmp_path / "session.json"
+        assert model.save_session()
+        self.client.register.reset_mock()
+        missed_event = {
+            "id": model.last_event_id + 1,
+            "type": "realm_emoji",
+            "op": "update",
+            "realm_emoji": {},
+        }
+        self.client.get_events.return_value = {
+            "result": "success",
+            "events": [missed_event],
+        }
+
+        resumed_model = Model(self.controller, session_path=model.session_path)
+
+        self.client.get_events.assert_called_once_with(
+            queue_id=model.queue_id,
+            last_event_id=model.last_event_id,
+            dont_block=True,
+        )
+        assert not self.client.register.called
+        assert resumed_model.queue_id == model.queue_id
+        assert resumed_model.last_event_id == missed_event["id"]
+        assert resumed_model.initial_data == dict(model.initial_data, realm_emoji={})
+        assert not model.session_path.exists()
+
+    @pytest.mark.parametrize(
+        "get_events_effect",
+        [
+            case(
+                {"result": "error", "code": "BAD_EVENT_QUEUE_ID", "msg": ""},
+                id="queue_removed",
+            ),
+            case(ZulipError("X"), id="ZulipError"),
+            case(
+                {
+                    "result": "success",
+                    "events": [{"id": 1, "type": "message", "flags": []}],
+                },
+                id="event_not_applied",
+            ),
+        ],
+    )
+    def test_init__saved_session_not_resumed(self, model, tmp_path, get_events_effect):
+        model.session_path = tmp_path / "session.json"
+        assert model.save_session()
+        self.client.register.reset_mock()
+        self.client.get_events.side_effect = [get_events_effect]
+
+        Model(self.controller, session_path=model.session_path)
+
+        self.client.register.assert_called_once()
+        assert not model.session_path.exists()
+
+    def test_init__no_saved_session(self, model, tmp_path):
+        self.client.register.reset_mock()
+
+        Model(self.controller, session_path=tmp_path / "session.json")
+
+        assert not self.client.get_events.called
+        self.client.register.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "session_path, initial_data_is_current",
+        [
+            case(None, True, id="not_saving_sessions"),
+            case("session.json", False, id="events_missed"),
+        ],
+    )
+    def test_save_session__not_saved(
+        self, model, tmp_path, session_path, initial_data_is_current
+    ):
+        model.session_path = session_path and tmp_path / session_path
+        model.initial_data_is_current = initial_data_is_current
+
+        assert not model.save_session()
+
+        assert list(tmp_path.iterdir()) == []
+
     @pytest.mark.parametrize(
         [
             "to_vary_in_stream_dict",
@@ -344,8 +432,9 @@ class TestModel:
         ],
     )
     def test_get_focus_in_current_narrow_individually(self, model, msg_id, narrow):
-        model.index = {"pointer": {str(narrow): msg_id}}
         model.narrow = narrow
+        model.compiled_narrow = model._compile_narrow()
+        model.index = {"pointer": {model.compiled_narrow: msg_id}}
         assert model.get_focus_in_current_narrow() == msg_id
 
     @pytest.mark.parametrize("msg_id", [1, 5])
@@ -366,8 +455,9 @@ class TestModel:
 
         model.index = dict(pointer=defaultdict(set))
         model.narrow = narrow
+        model.compiled_narrow = model._compile_narrow()
         model.set_focus_in_current_narrow(msg_id)
-        assert model.index["pointer"][str(narrow)] == msg_id
+        assert model.index["pointer"][model.compiled_narrow] == msg_id
 
     @pytest.mark.parametrize(
         "narrow, is_search_narrow",
@@ -387,8 +477,78 @@ class TestModel:
     )
     def test_is_search_narrow(self, model, narrow, is_search_narrow):
         model.narrow = narrow
+        model.compiled_narrow = model._compile_narrow()
         assert model.is_search_narrow() == is_search_narrow
 
+    @pytest.mark.parametrize(
+        "narrow, expected_compiled_narrow",
+        [
+            ([], Narrow()),
+            ([["stream", "PTEST"]], Narrow(("stream", 205))),
+            ([["stream", "PTEST"], ["topic", "Test"]], Narrow(("stream", 205, "Test"))),
+            ([["is", "private"]], Narrow(("private",))),
+            ([["pm_with", "FOO@zulip.com"]], Narrow(("private", frozenset({1, 2})))),
+            ([["is", "starred"]], Narrow(("starred",))),
+            ([["is", "mentioned"]], Narrow(("mentioned",))),
+            ([["search", "FOO"]], Narrow(search="FOO")),
+            (
+                [["stream", "PTEST"], ["search", "FOO"]],
+                Narrow(("stream", 205), search="FOO"),
+            ),
+        ],
+    )
+    def test__compile_narrow(self, model, narrow, expected_compiled_narrow):
+        model.narrow = narrow
+        model.stream_id = 205
+        model.recipients = frozenset({1, 2})
+
+        assert model._compile_narrow() == expected_compiled_narrow
+
+    @pytest.mark.parametrize(
+        "search, narrow_key, recent_results, expected_ids",
+        [
+            case("foo", (), None, {1, 2, 3}, id="single_term"),
+            case("FOO bar", (), None, {1, 2}, id="all_terms_matched"),
+            case("foo baz", (), None, set(), id="unknown_term"),
+            case("foo", ("stream", 10), None, {1, 3}, id="within_stream"),
+            case("...", (), None, set(), id="no_terms"),
+            case("foo bar", (), {4}, {1, 2, 4}, id="with_recent_results"),
+        ],
+    )
+    def test_get_local_search_results(
+        self, model, search, narrow_key, recent_results, expected_ids
+    ):
+        model.index = dict(
+            model.index,
+            all_msg_ids={1, 2, 3, 4},
+            stream_msg_ids_by_stream_id={10: {1, 3}},
+            search_terms={"foo": {1, 2, 3}, "bar": {1, 2}},
+        )
+        model.compiled_narrow = Narrow(narrow_key, search=search)
+        if recent_results is not None:
+            model.search_results = OrderedDict(
+                [(model.compiled_narrow, recent_results), (Narrow(search="x"), {5})]
+            )
+
+        assert model.get_local_search_results() == expected_ids
+
+        if recent_results is not None:
+            # Most recently used search results are kept longest
+            assert list(model.search_results)[-1] == model.compiled_narrow
+
+    def test_save_search_results(self, mocker, model):
+        mocker.patch(MODULE + ".SEARCH_RESULTS_CACHE_SIZE", 2)
+        model.index = dict(model.index, search={1})
+
+        for search in ["foo", "bar", "baz"]:
+            model.compiled_narrow = Narrow(search=search)
+            model.save_search_results()
+
+        # Results of the least recent search are forgotten
+        assert model.search_results == OrderedDict(
+            [(Narrow(search="bar"), {1}), (Narrow(search="baz"), {1})]
+        )
+
     @pytest.mark.parametrize(
         "bad_args",
         [
@@ -421,6 +581,7 @@ class TestModel:
         model.narrow = narrow
         assert model.set_narrow(**good_args)
         assert model.narrow == narrow
+        assert model.narrow_generation == 0
 
     @pytest.mark.parametrize(
         "initial_narrow, narrow, good_args",
@@ -447,6 +608,8 @@ class TestModel:
         assert not model.set_narrow(**good_args)
         assert model.narrow != initial_narrow
         assert model.narrow == narrow
+        assert model.compiled_narrow == model._compile_narrow()
+        assert model.narrow_generation == 1
         # FIXME: Add assert for recipients being updated (other tests too?)
 
     @pytest.mark.parametrize(
@@ -500,9 +663,73 @@ class TestModel:
         model.recipients = frozenset({1, 2})
         model.stream_id = 1
         model.narrow = narrow
-        model.index = index
+        model.compiled_narrow = model._compile_narrow()
+        model.index = dict(
+            index,
+            contiguous_ranges={
+                narrow_key: [(0, NEWEST_MESSAGE_ID)]
+                for narrow_key in [
+                    (),
+                    ("stream", 1),
+                    ("stream", 1, "BOO"),
+                    ("stream", 1, "BOOBOO"),
+                    ("private",),
+                    ("private", frozenset({1, 2})),
+                    ("starred",),
+                    ("mentioned",),
+                ]
+            },
+        )
         assert current_ids == model.get_message_ids_in_current_narrow()
 
+    @pytest.mark.parametrize(
+        "contiguous_ranges, anchor, expected_range, current_ids",
+        [
+            ({}, None, None, set()),
+            ({(): [(0, NEWEST_MESSAGE_ID)]}, None, None, set()),
+            (
+                {("stream", 1): [(0, NEWEST_MESSAGE_ID)]},
+                None,
+                (0, NEWEST_MESSAGE_ID),
+                {10, 20, 30, 40},
+            ),
+            ({("stream", 1): [(0, 20), (25, 35)]}, None, (25, 35), {30}),
+            ({("stream", 1): [(0, 20), (25, 35)]}, 10, (0, 20), {10, 20}),
+            ({("stream", 1): [(0, 20), (25, 35)]}, 40, None, set()),
+        ],
+        ids=[
+            "no_range",
+            "range_of_other_narrow",
+            "all_messages_known",
+            "newest_range",
+            "range_with_anchor",
+            "anchor_not_in_range",
+        ],
+    )
+    def test_get_contiguous_range_in_current_narrow(
+        self, model, contiguous_ranges, anchor, expected_range, current_ids
+    ):
+        model.stream_id = 1
+        model.narrow = [["stream", "FOO"]]
+        model.compiled_narrow = model._compile_narrow()
+        model.index = dict(
+            model.index,
+            stream_msg_ids_by_stream_id={1: {10, 20, 30, 40}},
+            contiguous_ranges=contiguous_ranges,
+        )
+
+        assert model.get_contiguous_range_in_current_narrow(anchor) == expected_range
+        assert model.get_message_ids_in_current_narrow(anchor) == current_ids
+
+    def test_get_contiguous_range_in_current_narrow__search_narrow(self, model):
+        model.narrow = [["search", "FOO"]]
+        model.compiled_narrow = model._compile_narrow()
+        model.index = dict(
+            model.index, contiguous_ranges={(): [(0, NEWEST_MESSAGE_ID)]}
+        )
+
+        assert model.get_contiguous_range_in_current_narrow() is None
+
     @pytest.mark.parametrize(
         "response, expected_index, return_value",
         [
@@ -1305,8 +1532,8 @@ class TestModel:
         assert model.index == index_all_messages
         anchor = messages_successful_response["anchor"]
         if anchor < 10000000000000000:
-            assert model.index["pointer"][repr(model.narrow)] == anchor
-        assert model._have_last_message[repr(model.narrow)] is True
+            assert model.index["pointer"][model.compiled_narrow] == anchor
+        assert model.get_contiguous_range_in_current_narrow() == (0, NEWEST_MESSAGE_ID)
 
     @pytest.mark.parametrize(
         "messages, expected_messages_response",
@@ -1419,13 +1646,103 @@ class TestModel:
         model = Model(self.controller)
         model.get_messages(num_before=num_before, num_after=num_after, anchor=0)
         self.client.get_messages.return_value = messages_successful_response
-        assert model.index["pointer"][repr(model.narrow)] == 0
+        assert model.index["pointer"][model.compiled_narrow] == 0
 
         # TEST `query_range` < no of messages received
-        # RESET model._have_last_message value
-        model._have_last_message[repr(model.narrow)] = False
+        # RESET model.index["contiguous_ranges"] value
+        model.index["contiguous_ranges"][()] = []
         model.get_messages(num_after=0, num_before=0, anchor=0)
-        assert model._have_last_message[repr(model.narrow)] is False
+        assert model.get_contiguous_range_in_current_narrow() == (0, 537288)
+
+    @pytest.mark.parametrize(
+        "found_oldest, found_newest, expected_range",
+        [
+            (True, True, (0, NEWEST_MESSAGE_ID)),
+            (False, True, (537286, NEWEST_MESSAGE_ID)),
+            (False, False, (537286, 537288)),
+        ],
+        ids=["all_messages_found", "newest_message_found", "no_end_found"],
+    )
+    def test_get_messages__contiguous_ranges(
+        self,
+        mocker,
+        messages_successful_response,
+        initial_index,
+        initial_data,
+        found_oldest,
+        found_newest,
+        expected_range,
+    ):
+        self.client.register.return_value = initial_data
+        mocker.patch(MODEL + ".get_all_users", return_value=[])
+        mocker.patch(MODEL + "._subscribe_to_streams")
+        self.classify_unread_counts = mocker.patch(
+            MODULE + ".classify_unread_counts", return_value=[]
+        )
+        messages_successful_response["found_oldest"] = found_oldest
+        messages_successful_response["found_newest"] = found_newest
+        self.client.get_messages.return_value = messages_successful_response
+        mocker.patch(MODULE + ".index_messages", return_value=initial_index)
+
+        model = Model(self.controller)  # Fetches messages in all-messages narrow
+
+        assert model.index["contiguous_ranges"][()] == [expected_range]
+        assert model.index["contiguous_ranges"][("private",)] == [expected_range]
+        # The stream may have messages from before the user subscribed
+        assert ("stream", 205) not in model.index["contiguous_ranges"]
+        assert ("starred",) not in model.index["contiguous_ranges"]
+
+    @pytest.mark.parametrize(
+        "fetched_narrow, changed_narrow, is_indexed",
+        [
+            ([], [["stream", "PTEST"]], True),
+            ([["search", "FOO"]], [], False),
+            ([], [["search", "FOO"]], False),
+        ],
+        ids=["narrow_changed", "from_search_narrow", "to_search_narrow"],
+    )
+    def test_get_messages__narrow_changed_while_fetching(
+        self,
+        mocker,
+        messages_successful_response,
+        initial_index,
+        initial_data,
+        fetched_narrow,
+        changed_narrow,
+        is_indexed,
+    ):
+        self.client.register.return_value = initial_data
+        mocker.patch(MODEL + ".get_all_users", return_value=[])
+        mocker.patch(MODEL + "._subscribe_to_streams")
+        self.classify_unread_counts = mocker.patch(
+            MODULE + ".classify_unread_counts", return_value=[]
+        )
+        self.client.get_messages.return_value = messages_successful_response
+        index_messages = mocker.patch(
+            MODULE + ".index_messages", return_value=initial_index
+        )
+        model = Model(self.controller)
+        index_messages.reset_mock()
+        model.index = dict(initial_index, contiguous_ranges=dict())
+        model.narrow = fetched_narrow
+        model.compiled_narrow = model._compile_narrow()
+
+        def change_narrow(**kwargs):
+            model.narrow = changed_narrow
+            model.compiled_narrow = model._compile_narrow()
+            model.narrow_generation += 1
+            return messages_successful_response
+
+        self.client.get_messages.side_effect = change_narrow
+
+        model.get_messages(num_before=30, num_after=0, anchor=None)
+
+        if is_indexed:
+            index_messages.assert_called_once()
+            assert () in model.index["contiguous_ranges"]
+        else:
+            index_messages.assert_not_called()
+            assert model.index["contiguous_ranges"] == {}
 
     # FIXME This only tests the case where the get_messages is in __init__
     def test_fail_get_messages(
@@ -1711,7 +2028,10 @@ class TestModel:
     def test__handle_message_event_with_Falsey_log(
         self, mocker, model, message_fixture
     ):
-        model._have_last_message[repr([])] = True
+        mocker.patch(
+            MODEL + ".get_contiguous_range_in_current_narrow",
+            return_value=(0, NEWEST_MESSAGE_ID),
+        )
         mocker.patch(MODEL + "._update_topic_index")
         mocker.patch(MODULE + ".index_messages", return_value={})
         self.controller.view.message_view = mocker.Mock(log=[])
@@ -1730,7 +2050,10 @@ class TestModel:
         )
 
     def test__handle_message_event_with_valid_log(self, mocker, model, message_fixture):
-        model._have_last_message[repr([])] = True
+        mocker.patch(
+            MODEL + ".get_contiguous_range_in_current_narrow",
+            return_value=(0, NEWEST_MESSAGE_ID),
+        )
         mocker.patch(MODEL + "._update_topic_index")
         mocker.patch(MODULE + ".index_messages", return_value={})
         self.controller.view.message_view = mocker.Mock(log=[mocker.Mock()])
@@ -1752,7 +2075,10 @@ class TestModel:
         )
 
     def test__handle_message_event_with_flags(self, mocker, model, message_fixture):
-        model._have_last_message[repr([])] = True
+        mocker.patch(
+            MODEL + ".get_contiguous_range_in_current_narrow",
+            return_value=(0, NEWEST_MESSAGE_ID),
+        )
         mocker.patch(MODEL + "._update_topic_index")
         mocker.patch(MODULE + ".index_messages", return_value={})
         self.controller.view.message_view = mocker.Mock(log=[mocker.Mock()])
@@ -1787,11 +2113,12 @@ class TestModel:
         set_count.assert_called_once_with([event["message"]["id"]], self.controller, 1)
 
     @pytest.mark.parametrize(
-        "response, narrow, recipients, log",
+        "response, narrow, stream_id, recipients, log",
         [
             case(
                 {"type": "stream", "stream_id": 1, "subject": "FOO", "id": 1},
                 [],
+                None,
                 frozenset(),
                 ["msg_w"],
                 id="stream_to_all_messages",
@@ -1799,6 +2126,7 @@ class TestModel:
             case(
                 {"type": "private", "id": 1},
                 [["is", "private"]],
+                None,
                 frozenset(),
                 ["msg_w"],
                 id="private_to_all_private",
@@ -1812,6 +2140,7 @@ class TestModel:
                     "display_recipient": "a",
                 },
                 [["stream", "a"]],
+                1,
                 frozenset(),
                 ["msg_w"],
                 id="stream_to_stream",
@@ -1825,6 +2154,7 @@ class TestModel:
                     "display_recipient": "a",
                 },
                 [["stream", "a"], ["topic", "b"]],
+                1,
                 frozenset(),
                 ["msg_w"],
                 id="stream_to_topic",
@@ -1838,6 +2168,7 @@ class TestModel:
                     "display_recipient": "a",
                 },
                 [["stream", "c"], ["topic", "b"]],
+                2,
                 frozenset(),
                 [],
                 id="stream_to_different_stream_same_topic",
@@ -1849,6 +2180,7 @@ class TestModel:
                     "display_recipient": [{"id": 5827}, {"id": 5}],
                 },
                 [["pm_with", "notification-bot@zulip.com"]],
+                None,
                 frozenset({5827, 5}),
                 ["msg_w"],
                 id="user_pm_x_appears_in_narrow_with_x",
@@ -1856,6 +2188,7 @@ class TestModel:
             case(
                 {"type": "private", "id": 1},
                 [["is", "search"]],
+                None,
                 frozenset(),
                 [],
                 id="search",
@@ -1867,6 +2200,7 @@ class TestModel:
                     "display_recipient": [{"id": 5827}, {"id": 3212}],
                 },
                 [["pm_with", "notification-bot@zulip.com"]],
+                None,
                 frozenset({5827, 5}),
                 [],
                 id="user_pm_x_does_not_appear_in_narrow_without_x",
@@ -1881,6 +2215,7 @@ class TestModel:
                     "flags": ["mentioned"],
                 },
                 [["is", "mentioned"]],
+                None,
                 frozenset(),
                 ["msg_w"],
                 id="mentioned_msg_in_mentioned_msg_narrow",
@@ -1888,9 +2223,12 @@ class TestModel:
         ],
     )
     def test__handle_message_event(
-        self, mocker, user_profile, response, narrow, recipients, model, log
+        self, mocker, user_profile, response, narrow, stream_id, recipients, model, log
     ):
-        model._have_last_message[repr(narrow)] = True
+        get_contiguous_range = mocker.patch(
+            MODEL + ".get_contiguous_range_in_current_narrow",
+            return_value=(0, NEWEST_MESSAGE_ID),
+        )
         mocker.patch(MODEL + "._update_topic_index")
         mocker.patch(MODULE + ".index_messages", return_value={})
         mocker.patch(MODULE + ".create_msg_box_list", return_value=["msg_w"])
@@ -1901,7 +2239,9 @@ class TestModel:
         ) = False
         model.notify_user = mocker.Mock()
         model.narrow = narrow
+        model.stream_id = stream_id
         model.recipients = recipients
+        model.compiled_narrow = model._compile_narrow()
         model.user_id = user_profile["user_id"]
         event = {
             "type": "message",
@@ -1914,7 +2254,7 @@ class TestModel:
         assert self.controller.view.message_view.log == log
         set_count.assert_called_once_with([response["id"]], self.controller, 1)
 
-        model._have_last_message[repr(narrow)] = False
+        get_contiguous_range.return_value = (0, response["id"] - 1)
         model.notify_user.assert_called_once_with(response)
 
         model._handle_message_event(event)
@@ -2394,6 +2734,9 @@ class TestModel:
             },
             "edited_messages": set(),
             "topics": {10: ["new subject", "old subject"]},
+            "search_terms": defaultdict(
+                set, {term: {1, 2} for term in ["old", "content", "subject"]}
+            ),
         }
         mocker.patch(MODEL + "._update_rendered_view")
 
@@ -2411,7 +2754,12 @@ class TestModel:
 
         model._handle_update_message_event(event)
 
+        search_terms = model.index.pop("search_terms")
         assert model.index == expected_index
+        for message_id, message in model.index["messages"].items():
+            for term in search_terms_of_message(message):
+                assert message_id in search_terms[term]
+        assert all(search_terms.values())
 
         calls_to_update_messages = model._update_rendered_view.call_count
         assert calls_to_update_messages == expected_times_messages_rerendered
@@ -2448,8 +2796,11 @@ class TestModel:
         new_msg_w = mocker.Mock()
         mocker.patch(MODULE + ".create_msg_box_list", return_value=[new_msg_w])
 
+        invalidate = mocker.patch.object(model.message_box_cache, "invalidate")
+
         model._update_rendered_view(msg_id)
 
+        invalidate.assert_called_once_with(msg_id)
         # If there are 2 msgs and first one is updated, next one is updated too
         if new_log_len == 2:
             other_msg_w = new_msg_w
@@ -3936,7 +4287,7 @@ class TestModel:
 
     def test_poll_for_events__no_disconnect(self, mocker, model, raising_event):
         mocker.patch(MODEL + "._register_desired_events")
-        sleep = mocker.patch(MODULE + ".time.sleep")
+        wait_to_reconnect = mocker.patch(MODEL + "._wait_to_reconnect")
 
         self.client.get_events.side_effect = [
             {
@@ -3950,7 +4301,7 @@ class TestModel:
 
         assert not model._register_desired_events.called
         assert self.client.get_events.called
-        assert not sleep.called
+        assert not wait_to_reconnect.called
 
     @pytest.mark.parametrize(
         "register_return_value",
@@ -3966,7 +4317,8 @@ class TestModel:
         mocker.patch(
             MODEL + "._register_desired_events", side_effect=register_return_value
         )
-        sleep = mocker.patch(MODULE + ".time.sleep")
+        catch_up = mocker.patch(MODEL + "._catch_up_on_missed_events")
+        wait_to_reconnect = mocker.patch(MODEL + "._wait_to_reconnect")
 
         self.client.get_events.side_effect = [
             {
@@ -3980,7 +4332,356 @@ class TestModel:
         with pytest.raises(self.LoopEnder):
             model.poll_for_events()
 
-        registers = [mocker.call() for _ in range(len(register_return_value))]
+        registers = [
+            mocker.call(fetch_event_types=model.catch_up_data_to_fetch)
+            for _ in range(len(register_return_value))
+        ]
         model._register_desired_events.assert_has_calls(registers)
+        catch_up.assert_called_once_with(model.max_message_id)
         assert self.client.get_events.called
-        assert sleep.call_count == len(registers) - 1
+        assert wait_to_reconnect.call_count == len(registers) - 1
+
+    def test_poll_for_events__state_updated(self, mocker, model, raising_event):
+        mocker.patch(MODEL + "._handle_update_emoji_event")
+        model.initial_data_is_current = True
+        event = {"id": 3, "type": "realm_emoji", "op": "update", "realm_emoji": {}}
+        self.client.get_events.side_effect = [
+            {"events": [event], "result": "success"},
+            {"events": [raising_event], "result": "success"},
+        ]
+
+        with pytest.raises(self.LoopEnder):
+            model.poll_for_events()
+
+        assert model.initial_data["realm_emoji"] == {}
+        assert model.last_event_id == 3
+        assert model.initial_data_is_current
+
+    def test_poll_for_events__events_missed(self, mocker, model, raising_event):
+        mocker.patch(MODEL + "._register_desired_events", return_value="")
+        mocker.patch(MODEL + "._catch_up_on_missed_events")
+        mocker.patch(MODEL + "._wait_to_reconnect")
+        self.client.get_events.side_effect = [
+            {"result": "error", "code": "BAD_EVENT_QUEUE_ID", "msg": ""},
+            {"events": [raising_event], "result": "success"},
+        ]
+
+        with pytest.raises(self.LoopEnder):
+            model.poll_for_events()
+
+        assert not model.initial_data_is_current
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            {"result": "error", "code": "RATE_LIMIT_HIT", "retry-after": 30, "msg": ""},
+            ZulipError("X"),
+            requests.exceptions.ConnectionError(),
+        ],
+        ids=["rate_limited", "zulip_error", "connection_error"],
+    )
+    def test_poll_for_events__reconnected_after_backoff(
+        self, mocker, model, raising_event, error
+    ):
+        wait = mocker.patch.object(model.reconnect_backoff, "wait")
+        self.client.get_events.side_effect = [
+            error,
+            {"events": [raising_event], "result": "success"},
+        ]
+
+        with pytest.raises(self.LoopEnder):
+            model.poll_for_events()
+
+        (delay,), _ = wait.call_args
+        if isinstance(error, dict):
+            assert delay == error["retry-after"]
+        else:
+            assert 0 <= delay <= 1
+        assert model.reconnect_backoff.reconnect_count == 1
+        assert not model.reconnect_backoff.is_disconnected
+        footer_texts = [
+            call.args for call in self.controller.view.set_footer_text.call_args_list
+        ]
+        assert footer_texts == [
+            (
+                ["Connection to the server lost; " f"reconnecting in {delay:.0f}s"],
+                "task:warning",
+            ),
+            (),
+        ]
+
+    @pytest.mark.parametrize(
+        "responses, max_messages, expected_ids, expected_found_newest",
+        [
+            case(
+                [
+                    {"result": "success", "messages": [{"id": 3}, {"id": 4}]},
+                    {"result": "success", "messages": [{"id": 5}, {"id": 6}]},
+                ],
+                10,
+                [3, 4, 5, 6],
+                True,
+                id="until_registered",
+            ),
+            case(
+                [
+                    {
+                        "result": "success",
+                        "messages": [{"id": 3}],
+                        "found_newest": True,
+                    },
+                ],
+                10,
+                [3],
+                True,
+                id="found_newest",
+            ),
+            case(
+                [
+                    {"result": "success", "messages": [{"id": 3}, {"id": 4}]},
+                    {"result": "error", "msg": "Error"},
+                ],
+                10,
+                [3, 4],
+                False,
+                id="error",
+            ),
+            case(
+                [{"result": "success", "messages": [{"id": 3}, {"id": 4}]}],
+                2,
+                [3, 4],
+                False,
+                id="limit_reached",
+            ),
+        ],
+    )
+    def test__fetch_missed_messages(
+        self,
+        mocker,
+        model,
+        responses,
+        max_messages,
+        expected_ids,
+        expected_found_newest,
+    ):
+        mocker.patch(MODULE + ".CATCH_UP_MAX_MESSAGES", max_messages)
+        model.max_message_id = 6
+        self.client.get_messages.side_effect = responses
+
+        messages, found_newest = model._fetch_missed_messages(2)
+
+        assert [message["id"] for message in messages] == expected_ids
+        assert found_newest == expected_found_newest
+        anchors = [
+            call.kwargs["message_filters"]["anchor"]
+            for call in self.client.get_messages.call_args_list
+        ]
+        assert anchors == [2, 4][: len(responses)]
+        assert self.client.get_messages.call_args.kwargs["message_filters"][
+            "narrow"
+        ] == json.dumps([])
+
+    @pytest.mark.parametrize(
+        "found_newest, expected_last_id",
+        [(True, NEWEST_MESSAGE_ID), (False, 537286)],
+        ids=["found_newest", "limit_reached"],
+    )
+    def test__catch_up_on_missed_events(
+        self, mocker, model, stream_msg_template, found_newest, expected_last_id
+    ):
+        message = dict(stream_msg_template, flags=[])
+        mocker.patch(
+            MODEL + "._fetch_missed_messages",
+            return_value=([message], found_newest),
+        )
+        mocker.patch(MODEL + "._catch_up_on_subscriptions", return_value=False)
+        mocker.patch(MODEL + "._catch_up_on_message_flags", return_value=[])
+        catch_up_on_unread_counts = mocker.patch(MODEL + "._catch_up_on_unread_counts")
+        mocker.patch(MODULE + ".create_msg_box_list", return_value=["msg_w"])
+        self.controller.view.message_view = mocker.Mock(log=[])
+        model.index = deepcopy(initial_index)
+        model.index["contiguous_ranges"] = {
+            (): [(100, NEWEST_MESSAGE_ID)],
+            ("stream", 99): [(100, NEWEST_MESSAGE_ID)],
+            ("stream", 1000000): [(100, NEWEST_MESSAGE_ID)],  # Not subscribed
+        }
+        model.index["topics"] = {205: ["Other topic"]}
+        assert 99 in model.stream_dict and 1000000 not in model.stream_dict
+
+        model._catch_up_on_missed_events(537200)
+
+        assert message["id"] in model.index["messages"]
+        assert model.index["search"] == set()
+        assert model.index["contiguous_ranges"][()] == [(100, expected_last_id)]
+        assert model.index["contiguous_ranges"][("stream", 99)] == [
+            (100, expected_last_id)
+        ]
+        assert model.index["contiguous_ranges"][("stream", 1000000)] == [(100, 537200)]
+        # Only known to be caught up within streams of which ranges were known
+        assert ("stream", 205, "Test") not in model.index["contiguous_ranges"]
+        assert model.index["topics"][205] == ["Test", "Other topic"]
+        catch_up_on_unread_counts.assert_called_once_with(rebuild_stream_view=False)
+        assert self.controller.view.message_view.log == ["msg_w"]
+
+    def test__catch_up_on_missed_events__newest_not_shown(
+        self, mocker, model, stream_msg_template
+    ):
+        message = dict(stream_msg_template, flags=[])
+        mocker.patch(MODEL + "._fetch_missed_messages", return_value=([message], True))
+        mocker.patch(MODEL + "._catch_up_on_subscriptions", return_value=True)
+        mocker.patch(MODEL + "._catch_up_on_message_flags", return_value=[1])
+        catch_up_on_unread_counts = mocker.patch(MODEL + "._catch_up_on_unread_counts")
+        update_rendered_view = mocker.patch(MODEL + "._update_rendered_view")
+        self.controller.view.message_view = mocker.Mock(log=[])
+        model.index = deepcopy(initial_index)
+        model.index["contiguous_ranges"] = {(): [(100, 200)]}
+
+        model._catch_up_on_missed_events(537200)
+
+        assert model.index["contiguous_ranges"][()] == [
+            (100, 200),
+            (537200, NEWEST_MESSAGE_ID),
+        ]
+        assert 205 not in model.index["topics"]  # Fetched when shown
+        catch_up_on_unread_counts.assert_called_once_with(rebuild_stream_view=True)
+        update_rendered_view.assert_called_once_with(1)
+        assert self.controller.view.message_view.log == []
+
+    def test__catch_up_on_subscriptions(self, model):
+        subscriptions = {
+            subscription["stream_id"]: dict(subscription)
+            for subscription in model.initial_data["subscriptions"]
+        }
+        del subscriptions[2]
+        subscriptions[99]["pin_to_top"] = True
+        subscriptions[1]["is_muted"] = True
+        subscriptions[1000]["desktop_notifications"] = True
+        subscriptions[3] = dict(subscriptions[1], stream_id=3, name="Stream 3")
+        subscriptions[3]["is_muted"] = False
+
+        changed = model._catch_up_on_subscriptions(list(subscriptions.values()))
+
+        assert changed
+        assert set(model.stream_dict) == {1000, 99, 999, 1, 3}
+        assert model.stream_dict[99]["pin_to_top"]
+        assert [stream["id"] for stream in model.pinned_streams] == [99]
+        assert [stream["name"] for stream in model.unpinned_streams] == [
+            "Some general stream",
+            "Stream 1",
+            "Stream 3",
+            "Web public stream",
+        ]
+        assert model.muted_streams == {1}
+        assert model.visual_notified_streams == {1000}
+
+    def test__catch_up_on_subscriptions__unchanged(self, model, stream_dict):
+        subscriptions = deepcopy(model.initial_data["subscriptions"])
+
+        changed = model._catch_up_on_subscriptions(subscriptions)
+
+        assert not changed
+        assert model.stream_dict == stream_dict
+
+    def test__catch_up_on_message_flags(self, model):
+        model.index = deepcopy(initial_index)
+        model.index["messages"] = {
+            1: {"id": 1, "flags": ["read"]},
+            2: {"id": 2, "flags": []},
+            3: {"id": 3, "flags": ["read", "starred"]},
+            4: {"id": 4, "flags": ["mentioned", "read"]},
+        }
+        model.index["starred_msg_ids"] = {3}
+        model.initial_data["unread_msgs"] = {
+            "streams": [{"stream_id": 1, "topic": "a", "unread_message_ids": [1]}],
+            "pms": [],
+            "huddles": [],
+            "mentions": [],
+        }
+        model.initial_data["starred_messages"] = [2]
+
+        changed_message_ids = model._catch_up_on_message_flags()
+
+        assert changed_message_ids == [1, 2, 3]
+        assert [message["flags"] for message in model.index["messages"].values()] == [
+            [],
+            ["read", "starred"],
+            ["read"],
+            ["mentioned", "read"],
+        ]
+        assert model.index["starred_msg_ids"] == {2}
+
+    def test__catch_up_on_message_flags__old_unreads_missing(self, model):
+        model.index = deepcopy(initial_index)
+        model.index["messages"] = {
+            1: {"id": 1, "flags": []},
+            2: {"id": 2, "flags": []},
+            3: {"id": 3, "flags": ["read"]},
+            4: {"id": 4, "flags": []},
+        }
+        model.initial_data["unread_msgs"] = {
+            "streams": [{"stream_id": 1, "topic": "a", "unread_message_ids": [2, 3]}],
+            "pms": [],
+            "huddles": [],
+            "mentions": [],
+            "old_unreads_missing": True,
+        }
+        model.initial_data["starred_messages"] = []
+
+        changed_message_ids = model._catch_up_on_message_flags()
+
+        # Message 1 may be among the unread messages not returned
+        assert changed_message_ids == [3, 4]
+        assert [message["flags"] for message in model.index["messages"].values()] == [
+            [],
+            [],
+            [],
+            ["read"],
+        ]
+
+    @pytest.mark.parametrize("rebuild_stream_view", [True, False])
+    def test__catch_up_on_unread_counts(self, mocker, model, rebuild_stream_view):
+        unread_counts = {
+            "all_msg": 3,
+            "all_pms": 1,
+            "all_mentions": 0,
+            "unread_topics": {},
+            "unread_pms": {12: 1},
+            "unread_huddles": {},
+            "streams": {1000: 2, 99: 1, 1: 4},
+        }
+        self.classify_unread_counts.return_value = unread_counts
+        model.muted_streams = {1}
+        model.initial_data["starred_messages"] = [5, 6]
+        view = self.controller.view
+        stream_buttons = {
+            stream_id: mocker.Mock(count=count)
+            for stream_id, count in [(1000, 0), (99, 1), (1, 0)]
+        }
+        view.stream_id_to_button = stream_buttons
+        view.left_panel.is_in_topic_view = False
+        user_buttons = [
+            mocker.Mock(user_id=11, count=2),
+            mocker.Mock(user_id=12, count=1),
+        ]
+        view.user_w.users_btn_list = user_buttons
+        view.home_button.count = 3
+        view.pm_button.count = 0
+        view.mentioned_button.count = 1
+        view.starred_button.count = 2
+
+        model._catch_up_on_unread_counts(rebuild_stream_view=rebuild_stream_view)
+
+        assert model.unread_counts == unread_counts
+        if rebuild_stream_view:
+            view.left_panel.update_stream_view.assert_called_once_with()
+            assert not stream_buttons[1000].update_count.called
+        else:
+            stream_buttons[1000].update_count.assert_called_once_with(2)
+        assert not stream_buttons[99].update_count.called
+        assert not stream_buttons[1].update_count.called  # Muted
+        user_buttons[0].update_count.assert_called_once_with(0)
+        assert not user_buttons[1].update_count.called
+        assert not view.home_button.update_count.called
+        view.pm_button.update_count.assert_called_once_with(1)
+        view.mentioned_button.update_count.assert_called_once_with(0)
+        assert not view.starred_button.update_count.called
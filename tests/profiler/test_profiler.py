@@ -0,0 +1,100 @@
+import pstats
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from zulipterminal.profiler import EVENTS_THREAD_NAME, RuntimeProfiler, SamplingProfiler
+
+
+MODULE = "zulipterminal.profiler"
+
+
+def busy_until(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(100))
+
+
+@pytest.fixture
+def busy_events_thread() -> Iterator[threading.Thread]:
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=busy_until, name=EVENTS_THREAD_NAME, args=(stop,), daemon=True
+    )
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+    @pytest.mark.parametrize(
+        "thread, events_sampled, main_sampled",
+        [("main", False, True), ("events", True, False), ("all", True, True)],
+    )
+    def test_sampled_threads(
+        self,
+        busy_events_thread: threading.Thread,
+        thread: str,
+        events_sampled: bool,
+        main_sampled: bool,
+    ) -> None:
+        profiler = SamplingProfiler(thread, interval=0.001)
+
+        profiler.enable()
+        time.sleep(0.05)
+        profiler.disable()
+
+        thread_names = {stack.split(";")[0] for stack in profiler.stack_counts}
+        assert (EVENTS_THREAD_NAME in thread_names) == events_sampled
+        assert ("MainThread" in thread_names) == main_sampled
+
+    def test_dump_stats(self, tmp_path: Path) -> None:
+        profiler = SamplingProfiler("main")
+        profiler.stack_counts.update({"MainThread;a;b": 2, "MainThread;a": 5})
+        path = f"{tmp_path}/profile.txt"
+
+        profiler.dump_stats(path)
+
+        with open(path) as profile_file:
+            assert profile_file.read() == "MainThread;a 5\nMainThread;a;b 2\n"
+
+
+class TestRuntimeProfiler:
+    @pytest.mark.parametrize(
+        "mode, thread",
+        [("sampling", "other"), ("other", "main"), ("deterministic", "events")],
+        ids=["unknown_thread", "unknown_mode", "deterministic_not_main"],
+    )
+    def test_init__invalid(self, mode: str, thread: str) -> None:
+        with pytest.raises(ValueError):
+            RuntimeProfiler(mode=mode, thread=thread)
+
+    def test_stop__not_running(self) -> None:
+        profiler = RuntimeProfiler(mode="sampling", thread="main")
+
+        assert profiler.stop() is None
+
+    def test_capture__deterministic(
+        self, mocker: MockerFixture, tmp_path: Path
+    ) -> None:
+        mocker.patch(MODULE + ".tempfile.tempdir", str(tmp_path))
+        profiler = RuntimeProfiler(mode="deterministic", thread="main")
+
+        profiler.start()
+        assert profiler.is_running
+        stop = threading.Event()
+        stop.set()
+        busy_until(stop)
+        profile_path = profiler.stop()
+
+        assert not profiler.is_running
+        assert profile_path is not None
+        assert profile_path.startswith(f"{tmp_path}/zulip_term_profile.")
+        assert ".1.deterministic.main." in profile_path
+        assert profile_path.endswith(".dat")
+        stats = pstats.Stats(profile_path)
+        assert any(function == "busy_until" for _, _, function in stats.stats)
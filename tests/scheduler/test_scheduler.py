@@ -0,0 +1,204 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+from zulipterminal.scheduler import (
+    BACKGROUND,
+    LOW,
+    USER_ACTION,
+    Priority,
+    ScheduledClient,
+)
+
+
+MODULE = "zulipterminal.scheduler"
+
+RATE_LIMITED = {
+    "result": "error",
+    "code": "RATE_LIMIT_HIT",
+    "msg": "API usage exceeded rate limit",
+    "retry-after": 0.01,
+}
+
+
+@pytest.fixture
+def client(mocker: MockerFixture) -> Any:
+    return mocker.Mock(session=requests.Session())
+
+
+def test_init__reads_rate_limit_headers(client: Any) -> None:
+    scheduled_client = ScheduledClient(client)
+    response = requests.Response()
+    response.headers.update(
+        {"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "1700000000.5"}
+    )
+
+    for hook in client.session.hooks["response"]:
+        hook(response)
+
+    client.ensure_session.assert_called_once_with()
+    assert scheduled_client._remaining == 5
+    assert scheduled_client._reset_at == 1700000000.5
+
+
+def test_unscheduled_attributes(client: Any) -> None:
+    scheduled_client = ScheduledClient(client)
+
+    assert scheduled_client.base_url is client.base_url
+    assert scheduled_client.get_events is client.get_events
+
+
+def test_scheduled_call(client: Any) -> None:
+    client.send_message.return_value = {"result": "success"}
+    scheduled_client = ScheduledClient(client)
+
+    response = scheduled_client.send_message({"type": "private"})
+
+    assert response == {"result": "success"}
+    client.send_message.assert_called_once_with({"type": "private"})
+    assert scheduled_client._in_flight == 0
+
+
+def test_scheduled_call__rate_limited_retried(client: Any) -> None:
+    client.add_reaction.side_effect = [RATE_LIMITED, {"result": "success"}]
+    scheduled_client = ScheduledClient(client)
+
+    response = scheduled_client.add_reaction({"emoji_name": "smile"})
+
+    assert response == {"result": "success"}
+    assert client.add_reaction.call_count == 2
+
+
+def test_scheduled_call__rate_limited_too_long(
+    mocker: MockerFixture, client: Any
+) -> None:
+    mocker.patch(MODULE + ".MAX_WAIT", 0)
+    client.add_reaction.return_value = RATE_LIMITED
+    scheduled_client = ScheduledClient(client)
+
+    response = scheduled_client.add_reaction({"emoji_name": "smile"})
+
+    assert response == RATE_LIMITED  # Shown as an error, as before
+    client.add_reaction.assert_called_once_with({"emoji_name": "smile"})
+
+
+def test_scheduled_call__ui_thread_not_delayed(client: Any) -> None:
+    scheduled_client = ScheduledClient(client)
+    scheduled_client.wait_in_main_thread = False
+    scheduled_client._remaining = 0
+    scheduled_client._reset_at = time.time() + 30
+
+    response = scheduled_client.add_reaction({"emoji_name": "smile"})
+
+    assert response["result"] == "error"
+    assert response["code"] == "RATE_LIMIT_HIT"
+    assert response["msg"] == "Rate limited by the server; try again in 30s"
+    client.add_reaction.assert_not_called()
+    assert scheduled_client._in_flight == 0
+
+
+def test_scheduled_call__ui_thread_not_retried(client: Any) -> None:
+    client.add_reaction.return_value = RATE_LIMITED
+    scheduled_client = ScheduledClient(client)
+    scheduled_client.wait_in_main_thread = False
+
+    response = scheduled_client.add_reaction({"emoji_name": "smile"})
+
+    assert response == RATE_LIMITED
+    client.add_reaction.assert_called_once_with({"emoji_name": "smile"})
+
+
+def test_scheduled_call__other_threads_delayed(client: Any) -> None:
+    client.get_messages.return_value = {"result": "success"}
+    scheduled_client = ScheduledClient(client)
+    scheduled_client.wait_in_main_thread = False
+    scheduled_client._remaining = 0
+    scheduled_client._reset_at = time.time() + 0.1
+    responses = []
+
+    thread = threading.Thread(
+        target=lambda: responses.append(
+            scheduled_client.get_messages(message_filters={})
+        )
+    )
+    thread.start()
+    thread.join()
+
+    assert responses == [{"result": "success"}]
+    assert time.time() >= scheduled_client._reset_at
+
+
+def test_scheduled_call__waits_for_reset(client: Any) -> None:
+    client.get_messages.return_value = {"result": "success"}
+    scheduled_client = ScheduledClient(client)
+    scheduled_client._remaining = 0
+    scheduled_client._reset_at = time.time() + 0.1
+
+    start = time.time()
+    scheduled_client.get_messages(message_filters={})
+
+    assert time.time() - start >= 0.05
+    client.get_messages.assert_called_once_with(message_filters={})
+
+
+@pytest.mark.parametrize(
+    "remaining, priority, is_delayed",
+    [
+        (None, LOW, False),
+        (30, LOW, False),
+        (15, LOW, True),
+        (15, BACKGROUND, False),
+        (5, BACKGROUND, True),
+        (1, USER_ACTION, False),
+        (0, USER_ACTION, True),
+    ],
+    ids=[
+        "unknown",
+        "low_priority",
+        "low_priority_reserved",
+        "background",
+        "background_reserved",
+        "user_action",
+        "user_action_limited",
+    ],
+)
+def test_delay__rate_limit_reserved_for_higher_priorities(
+    client: Any, remaining: Optional[int], priority: Priority, is_delayed: bool
+) -> None:
+    scheduled_client = ScheduledClient(client)
+    now = time.time()
+    scheduled_client._remaining = remaining
+    scheduled_client._reset_at = now + 30
+
+    assert (scheduled_client._delay(priority, now) > 0) == is_delayed
+
+
+def test_delay__after_reset(client: Any) -> None:
+    scheduled_client = ScheduledClient(client)
+    now = time.time()
+    scheduled_client._remaining = 0
+    scheduled_client._reset_at = now - 1
+
+    assert scheduled_client._delay(USER_ACTION, now) == 0
+
+
+@pytest.mark.parametrize(
+    "waiting, priority, is_delayed",
+    [
+        ({USER_ACTION: 1}, BACKGROUND, True),
+        ({BACKGROUND: 1}, LOW, True),
+        ({LOW: 1}, BACKGROUND, False),
+        ({BACKGROUND: 1}, USER_ACTION, False),
+    ],
+)
+def test_delay__higher_priorities_first(
+    client: Any, waiting: Dict[int, int], priority: Priority, is_delayed: bool
+) -> None:
+    scheduled_client = ScheduledClient(client)
+    scheduled_client._waiting.update(waiting)
+
+    assert (scheduled_client._delay(priority, time.time()) > 0) == is_delayed
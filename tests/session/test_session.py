@@ -0,0 +1,549 @@
+import json
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from pytest import param as case
+
+from zulipterminal.session import (
+    SessionState,
+    load_session,
+    save_session,
+    saved_session_path,
+)
+from zulipterminal.version import ZT_VERSION
+
+
+SESSION = {"queue_id": "1:2", "last_event_id": 5, "state": {"max_message_id": 10}}
+
+
+def test_saved_session_path() -> None:
+    path = saved_session_path("https://chat.zulip.org", "foo@zulip.com")
+
+    assert path.suffix == ".json"
+    assert path == saved_session_path("https://chat.zulip.org", "foo@zulip.com")
+    assert path != saved_session_path("https://chat.zulip.org", "bar@zulip.com")
+
+
+def test_save_session__load_session(tmp_path: Path) -> None:
+    path = tmp_path / "sessions" / "session.json"
+
+    assert save_session(path, SESSION)
+
+    assert path.stat().st_mode & 0o077 == 0  # Only readable by the user
+    assert load_session(path) == dict(SESSION, version=ZT_VERSION)
+    assert not path.exists()  # Only resumed once
+    assert load_session(path) is None
+
+
+@pytest.mark.parametrize(
+    "session_content",
+    [
+        "",
+        "{",
+        "[]",
+        json.dumps(dict(SESSION, version="0.1.0")),
+    ],
+    ids=["empty", "invalid_json", "not_object", "other_version"],
+)
+def test_load_session__invalid(tmp_path: Path, session_content: str) -> None:
+    path = tmp_path / "session.json"
+    path.write_text(session_content)
+
+    assert load_session(path) is None
+
+
+def test_save_session__not_serializable(tmp_path: Path) -> None:
+    path = tmp_path / "session.json"
+
+    assert not save_session(path, dict(SESSION, state={"ids": {1, 2}}))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_session__not_writable(tmp_path: Path) -> None:
+    session_dir = tmp_path / "sessions"
+    session_dir.write_text("Not a directory")
+
+    assert not save_session(session_dir / "session.json", SESSION)
+
+
+def unread_msgs(**unreads: Any) -> Dict[str, Any]:
+    unread: Dict[str, Any] = {"streams": [], "pms": [], "huddles": [], "mentions": []}
+    unread.update(unreads)
+    unread["count"] = sum(
+        len(conversation["unread_message_ids"])
+        for conversations in ("streams", "pms", "huddles")
+        for conversation in unread[conversations]
+    )
+    return unread
+
+
+def stream_unread(stream_id: int, topic: str, *message_ids: int) -> Dict[str, Any]:
+    return {
+        "stream_id": stream_id,
+        "topic": topic,
+        "unread_message_ids": list(message_ids),
+    }
+
+
+def pm_unread(other_user_id: int, *message_ids: int) -> Dict[str, Any]:
+    return {
+        "other_user_id": other_user_id,
+        "sender_id": other_user_id,
+        "unread_message_ids": list(message_ids),
+    }
+
+
+def huddle_unread(user_ids_string: str, *message_ids: int) -> Dict[str, Any]:
+    return {
+        "user_ids_string": user_ids_string,
+        "unread_message_ids": list(message_ids),
+    }
+
+
+def message(message_id: int, **fields: Any) -> Dict[str, Any]:
+    stream_message = {
+        "id": message_id,
+        "type": "stream",
+        "stream_id": 1,
+        "subject": "topic",
+        "sender_id": 11,
+        "display_recipient": "stream",
+    }
+    return dict(stream_message, **fields)
+
+
+@pytest.mark.parametrize(
+    "state, event, expected_state",
+    [
+        case(
+            {"max_message_id": 1, "unread_msgs": unread_msgs()},
+            {"type": "message", "message": message(2), "flags": []},
+            {
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(streams=[stream_unread(1, "topic", 2)]),
+            },
+            id="message:stream",
+        ),
+        case(
+            {
+                "max_message_id": 1,
+                "unread_msgs": unread_msgs(streams=[stream_unread(1, "topic", 1)]),
+            },
+            {"type": "message", "message": message(2), "flags": ["mentioned"]},
+            {
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(
+                    streams=[stream_unread(1, "topic", 1, 2)], mentions=[2]
+                ),
+            },
+            id="message:stream_mentioned",
+        ),
+        case(
+            {"max_message_id": 1, "unread_msgs": unread_msgs()},
+            {"type": "message", "message": message(2), "flags": ["read"]},
+            {"max_message_id": 2, "unread_msgs": unread_msgs()},
+            id="message:read",
+        ),
+        case(
+            {"user_id": 10, "max_message_id": 1, "unread_msgs": unread_msgs()},
+            {
+                "type": "message",
+                "message": message(
+                    2, type="private", display_recipient=[{"id": 10}, {"id": 11}]
+                ),
+                "flags": [],
+            },
+            {
+                "user_id": 10,
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(pms=[pm_unread(11, 2)]),
+            },
+            id="message:private",
+        ),
+        case(
+            {
+                "user_id": 10,
+                "max_message_id": 1,
+                "unread_msgs": unread_msgs(
+                    pms=[{"sender_id": 11, "unread_message_ids": [1]}]
+                ),
+            },
+            {
+                "type": "message",
+                "message": message(
+                    2,
+                    type="private",
+                    sender_id=10,
+                    display_recipient=[{"id": 10}, {"id": 11}],
+                ),
+                "flags": [],
+            },
+            {
+                "user_id": 10,
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(
+                    pms=[{"sender_id": 11, "unread_message_ids": [1, 2]}]
+                ),
+            },
+            id="message:private_sent_by_user_before_ZFL119",
+        ),
+        case(
+            {"user_id": 10, "max_message_id": 1, "unread_msgs": unread_msgs()},
+            {
+                "type": "message",
+                "message": message(
+                    2, type="private", sender_id=10, display_recipient=[{"id": 10}]
+                ),
+                "flags": [],
+            },
+            {
+                "user_id": 10,
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(pms=[pm_unread(10, 2)]),
+            },
+            id="message:private_to_self",
+        ),
+        case(
+            {
+                "user_id": 10,
+                "max_message_id": 1,
+                "unread_msgs": unread_msgs(huddles=[huddle_unread("10,11,12", 1)]),
+            },
+            {
+                "type": "message",
+                "message": message(
+                    2,
+                    type="private",
+                    display_recipient=[{"id": 12}, {"id": 10}, {"id": 11}],
+                ),
+                "flags": [],
+            },
+            {
+                "user_id": 10,
+                "max_message_id": 2,
+                "unread_msgs": unread_msgs(huddles=[huddle_unread("10,11,12", 1, 2)]),
+            },
+            id="message:group_private",
+        ),
+        case(
+            {
+                "unread_msgs": unread_msgs(
+                    streams=[stream_unread(1, "topic", 1, 2), stream_unread(2, "x", 3)],
+                    mentions=[2],
+                )
+            },
+            {
+                "type": "update_message_flags",
+                "op": "add",
+                "flag": "read",
+                "all": False,
+                "messages": [2, 3],
+            },
+            {"unread_msgs": unread_msgs(streams=[stream_unread(1, "topic", 1)])},
+            id="update_message_flags:read",
+        ),
+        case(
+            {
+                "unread_msgs": unread_msgs(
+                    pms=[pm_unread(11, 1, 2), pm_unread(12, 3)],
+                    huddles=[
+                        huddle_unread("10,11,12", 4),
+                        huddle_unread("10,11,13", 5, 6),
+                    ],
+                    mentions=[4, 5],
+                )
+            },
+            {
+                "type": "update_message_flags",
+                "op": "add",
+                "flag": "read",
+                "all": False,
+                "messages": [1, 3, 4, 5],
+            },
+            {
+                "unread_msgs": unread_msgs(
+                    pms=[pm_unread(11, 2)], huddles=[huddle_unread("10,11,13", 6)]
+                )
+            },
+            id="update_message_flags:read_private",
+        ),
+        case(
+            {"unread_msgs": unread_msgs(streams=[stream_unread(1, "topic", 1)])},
+            {
+                "type": "update_message_flags",
+                "operation": "add",
+                "flag": "read",
+                "all": True,
+                "messages": [],
+            },
+            {"unread_msgs": unread_msgs()},
+            id="update_message_flags:read_all_before_ZFL32",
+        ),
+        case(
+            {"starred_messages": [1]},
+            {
+                "type": "update_message_flags",
+                "op": "add",
+                "flag": "starred",
+                "all": False,
+                "messages": [2],
+            },
+            {"starred_messages": [1, 2]},
+            id="update_message_flags:starred",
+        ),
+        case(
+            {"starred_messages": [1, 2]},
+            {
+                "type": "update_message_flags",
+                "op": "remove",
+                "flag": "starred",
+                "all": False,
+                "messages": [2],
+            },
+            {"starred_messages": [1]},
+            id="update_message_flags:unstarred",
+        ),
+        case(
+            {
+                "unread_msgs": unread_msgs(
+                    streams=[stream_unread(1, "a", 1, 2), stream_unread(1, "b", 3)]
+                )
+            },
+            {
+                "type": "update_message",
+                "stream_id": 1,
+                "subject": "b",
+                "message_ids": [2],
+            },
+            {
+                "unread_msgs": unread_msgs(
+                    streams=[stream_unread(1, "a", 1), stream_unread(1, "b", 3, 2)]
+                )
+            },
+            id="update_message:topic_moved",
+        ),
+        case(
+            {"unread_msgs": unread_msgs(streams=[stream_unread(1, "a", 1)])},
+            {
+                "type": "update_message",
+                "stream_id": 1,
+                "new_stream_id": 2,
+                "message_ids": [1],
+            },
+            {"unread_msgs": unread_msgs(streams=[stream_unread(2, "a", 1)])},
+            id="update_message:stream_moved",
+        ),
+        case(
+            {"subscriptions": [{"stream_id": 1}]},
+            {"type": "subscription", "op": "add", "subscriptions": [{"stream_id": 2}]},
+            {"subscriptions": [{"stream_id": 1}, {"stream_id": 2}]},
+            id="subscription:add",
+        ),
+        case(
+            {"subscriptions": [{"stream_id": 1}, {"stream_id": 2}]},
+            {
+                "type": "subscription",
+                "op": "remove",
+                "subscriptions": [{"stream_id": 2}],
+            },
+            {"subscriptions": [{"stream_id": 1}]},
+            id="subscription:remove",
+        ),
+        case(
+            {"subscriptions": [{"stream_id": 1, "is_muted": False}]},
+            {
+                "type": "subscription",
+                "op": "update",
+                "stream_id": 1,
+                "property": "in_home_view",
+                "value": False,
+            },
+            {
+                "subscriptions": [
+                    {"stream_id": 1, "is_muted": True, "in_home_view": False}
+                ]
+            },
+            id="subscription:update_in_home_view",
+        ),
+        case(
+            {"subscriptions": [{"stream_id": 1, "subscribers": [11]}]},
+            {
+                "type": "subscription",
+                "op": "peer_add",
+                "stream_ids": [1],
+                "user_ids": [12],
+            },
+            {"subscriptions": [{"stream_id": 1, "subscribers": [11, 12]}]},
+            id="subscription:peer_add",
+        ),
+        case(
+            {"subscriptions": [{"stream_id": 1, "subscribers": [11, 12]}]},
+            {
+                "type": "subscription",
+                "op": "peer_remove",
+                "stream_id": 1,
+                "user_id": 12,
+            },
+            {"subscriptions": [{"stream_id": 1, "subscribers": [11]}]},
+            id="subscription:peer_remove_before_ZFL35",
+        ),
+        case(
+            {"realm_users": [{"user_id": 11}]},
+            {"type": "realm_user", "op": "add", "person": {"user_id": 12}},
+            {"realm_users": [{"user_id": 11}, {"user_id": 12}]},
+            id="realm_user:add",
+        ),
+        case(
+            {"realm_users": [{"user_id": 11, "full_name": "Foo", "email": "a@b"}]},
+            {
+                "type": "realm_user",
+                "op": "update",
+                "person": {"user_id": 11, "full_name": "Bar"},
+            },
+            {"realm_users": [{"user_id": 11, "full_name": "Bar", "email": "a@b"}]},
+            id="realm_user:update",
+        ),
+        case(
+            {"realm_users": [{"user_id": 11, "email": "a@b"}]},
+            {
+                "type": "realm_user",
+                "op": "update",
+                "person": {"user_id": 11, "new_email": "c@d"},
+            },
+            {"realm_users": [{"user_id": 11, "email": "c@d"}]},
+            id="realm_user:update_email",
+        ),
+        case(
+            {"realm_emoji": {}},
+            {"type": "realm_emoji", "op": "update", "realm_emoji": {"1": {}}},
+            {"realm_emoji": {"1": {}}},
+            id="realm_emoji",
+        ),
+        case(
+            {"twenty_four_hour_time": False},
+            {
+                "type": "update_display_settings",
+                "setting_name": "twenty_four_hour_time",
+                "setting": True,
+            },
+            {"twenty_four_hour_time": True},
+            id="update_display_settings",
+        ),
+        case(
+            {"pm_content_in_desktop_notifications": False},
+            {
+                "type": "update_global_notifications",
+                "notification_name": "pm_content_in_desktop_notifications",
+                "setting": True,
+            },
+            {"pm_content_in_desktop_notifications": True},
+            id="update_global_notifications",
+        ),
+        case(
+            {
+                "twenty_four_hour_time": False,
+                "user_settings": {"twenty_four_hour_time": False},
+            },
+            {
+                "type": "user_settings",
+                "op": "update",
+                "property": "twenty_four_hour_time",
+                "value": True,
+            },
+            {
+                "twenty_four_hour_time": True,
+                "user_settings": {"twenty_four_hour_time": True},
+            },
+            id="user_settings",
+        ),
+        case(
+            {"max_message_id": 1},
+            {"type": "heartbeat"},
+            {"max_message_id": 1},
+            id="heartbeat",
+        ),
+    ],
+)
+def test_SessionState_apply_event(
+    state: Dict[str, Any], event: Dict[str, Any], expected_state: Dict[str, Any]
+) -> None:
+    session_state = SessionState(state)
+
+    session_state.apply_event(event)
+
+    assert state == expected_state
+
+    # Events may be applied again, eg. if saved before their id
+    session_state.apply_event(deepcopy(event))
+
+    assert state == expected_state
+
+
+def test_SessionState_apply_event__unreads_indexed() -> None:
+    state = {
+        "user_id": 10,
+        "unread_msgs": unread_msgs(
+            pms=[pm_unread(11, 1)], huddles=[huddle_unread("10,11,12", 2)]
+        ),
+    }
+    session_state = SessionState(state)
+    events: List[Dict[str, Any]] = [
+        {
+            "type": "message",
+            "message": message(
+                3, type="private", display_recipient=[{"id": 10}, {"id": 11}]
+            ),
+            "flags": [],
+        },
+        {
+            "type": "update_message_flags",
+            "op": "add",
+            "flag": "read",
+            "all": False,
+            "messages": [1, 2],
+        },
+        {
+            "type": "message",
+            "message": message(
+                4,
+                type="private",
+                display_recipient=[{"id": 10}, {"id": 11}, {"id": 12}],
+            ),
+            "flags": [],
+        },
+    ]
+
+    for event in events:
+        session_state.apply_event(event)
+
+    # Conversations are kept while unread, and added again after being read
+    assert state["unread_msgs"] == unread_msgs(
+        pms=[pm_unread(11, 3)], huddles=[huddle_unread("10,11,12", 4)]
+    )
+
+
+def test_SessionState_apply_event__subscription_copied() -> None:
+    subscription = {"stream_id": 1, "pin_to_top": False, "subscribers": [11]}
+    state = {"subscriptions": [subscription]}
+    session_state = SessionState(state)
+    events: List[Dict[str, Any]] = [
+        {
+            "type": "subscription",
+            "op": "update",
+            "stream_id": 1,
+            "property": "pin_to_top",
+            "value": True,
+        },
+        {"type": "subscription", "op": "peer_add", "stream_ids": [1], "user_ids": [12]},
+    ]
+
+    for event in events:
+        session_state.apply_event(event)
+
+    assert state["subscriptions"] == [
+        {"stream_id": 1, "pin_to_top": True, "subscribers": [11, 12]}
+    ]
+    assert subscription == {"stream_id": 1, "pin_to_top": False, "subscribers": [11]}
@@ -5,7 +5,7 @@ from urwid import Divider
 
 from zulipterminal.config.keys import keys_for_command, primary_key_for_command
 from zulipterminal.config.symbols import STATUS_ACTIVE
-from zulipterminal.helper import powerset
+from zulipterminal.helper import NEWEST_MESSAGE_ID, powerset
 from zulipterminal.ui_tools.views import (
     SIDE_PANELS_MOUSE_SCROLL_LINES,
     LeftColumnView,
@@ -78,6 +78,8 @@ class TestMessageView:
         msg_view.set_focus.assert_called_once_with(0)
         assert msg_view.old_loading is False
         assert msg_view.new_loading is False
+        assert msg_view.old_reading_ahead is False
+        assert msg_view.new_reading_ahead is False
 
     @pytest.mark.parametrize("narrow_focus_pos, focus_msg", [(set(), 1), (0, 0)])
     def test_main_view(self, mocker, narrow_focus_pos, focus_msg):
@@ -183,6 +185,7 @@ class TestMessageView:
         )
         initial_log = [top_widget] + len(other_ids_in_narrow) * ["existing"]
         msg_view.log = initial_log[:]
+        msg_view.body.get_focus.return_value = (top_widget, 0)
 
         msg_view.load_old_messages(0)
 
@@ -192,6 +195,8 @@ class TestMessageView:
             create_msg_box_list.assert_called_once_with(
                 msg_view.model, {top_id_in_narrow} | new_msg_ids
             )
+            # Focus remains on the same message
+            msg_view.set_focus.assert_called_with(len(new_msg_widgets))
             self.model.controller.update_screen.assert_called_once_with()
         else:
             create_msg_box_list.assert_not_called()
@@ -261,6 +266,64 @@ class TestMessageView:
             num_before=0, num_after=30, anchor=0
         )
 
+    @pytest.mark.parametrize(
+        "load_messages, contiguous_range",
+        [
+            ("load_old_messages", (0, 100)),
+            ("load_new_messages", (50, NEWEST_MESSAGE_ID)),
+        ],
+        ids=["oldest_message_shown", "newest_message_shown"],
+    )
+    def test_load_messages__all_shown(
+        self, mocker, msg_view, load_messages, contiguous_range
+    ):
+        mocker.patch.object(
+            msg_view.model,
+            "get_contiguous_range_in_current_narrow",
+            return_value=contiguous_range,
+        )
+        create_msg_box_list = mocker.patch(VIEWS + ".create_msg_box_list")
+        msg_view.log = [mocker.Mock()]
+
+        getattr(msg_view, load_messages)(75)
+
+        msg_view.model.get_contiguous_range_in_current_narrow.assert_called_once_with(
+            75
+        )
+        self.model.get_messages.assert_not_called()
+        create_msg_box_list.assert_not_called()
+        assert msg_view.old_loading is False
+        assert msg_view.new_loading is False
+
+    @pytest.mark.parametrize(
+        "load_messages", ["load_old_messages", "load_new_messages"]
+    )
+    def test_load_messages__narrow_changed_while_fetching(
+        self, mocker, msg_view, load_messages
+    ):
+        msg_view.model.narrow_generation = 1
+
+        def change_narrow(**kwargs):
+            msg_view.model.narrow_generation += 1
+
+        msg_view.model.get_messages.side_effect = change_narrow
+        mocker.patch.object(
+            msg_view.model, "get_message_ids_in_current_narrow", return_value={1}
+        )
+        create_msg_box_list = mocker.patch(VIEWS + ".create_msg_box_list")
+        top_widget = mocker.Mock()
+        top_widget.original_widget.message = {"id": 1}
+        msg_view.log = [top_widget]
+
+        getattr(msg_view, load_messages)(1)
+
+        msg_view.model.get_messages.assert_called_once()
+        create_msg_box_list.assert_not_called()
+        self.model.controller.update_screen.assert_not_called()
+        assert msg_view.log == [top_widget]
+        assert msg_view.old_loading is False
+        assert msg_view.new_loading is False
+
     def test_mouse_event(self, mocker, msg_view, mouse_scroll_event, widget_size):
         event, button, keypress = mouse_scroll_event
         mocker.patch.object(msg_view, "keypress")
@@ -274,11 +337,13 @@ class TestMessageView:
         msg_view.new_loading = False
         mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
+        mocker.patch.object(msg_view, "read_ahead")
         msg_view.log.next_position.return_value = 1
         msg_view.keypress(size, key)
         msg_view.log.next_position.assert_called_once_with(msg_view.focus_position)
         msg_view.set_focus.assert_called_with(1, "above")
         msg_view.set_focus_valign.assert_called_once_with("middle")
+        msg_view.read_ahead.assert_called_once_with(size)
 
     @pytest.mark.parametrize("view_is_focused", [True, False])
     @pytest.mark.parametrize("key", keys_for_command("GO_DOWN"))
@@ -302,22 +367,29 @@ class TestMessageView:
         if view_is_focused:
             msg_view.load_new_messages.assert_called_once_with(
                 msg_view.focus.original_widget.message["id"],
+                msg_view.page_size(size),
             )
         else:
             msg_view.load_new_messages.assert_not_called()
         assert return_value == key
 
+    @pytest.mark.parametrize("old_reading_ahead", [True, False])
     @pytest.mark.parametrize("key", keys_for_command("GO_UP"))
-    def test_keypress_GO_UP(self, mocker, msg_view, key, widget_size):
+    def test_keypress_GO_UP(
+        self, mocker, msg_view, key, widget_size, old_reading_ahead
+    ):
         size = widget_size(msg_view)
         mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
         mocker.patch(MESSAGEVIEW + ".set_focus_valign")
         msg_view.old_loading = False
+        msg_view.old_reading_ahead = old_reading_ahead
+        mocker.patch.object(msg_view, "read_ahead")
         msg_view.log.prev_position.return_value = 1
         msg_view.keypress(size, key)
         msg_view.log.prev_position.assert_called_once_with(msg_view.focus_position)
         msg_view.set_focus.assert_called_with(1, "below")
         msg_view.set_focus_valign.assert_called_once_with("middle")
+        msg_view.read_ahead.assert_called_once_with(size)
 
     @pytest.mark.parametrize("view_is_focused", [True, False])
     @pytest.mark.parametrize("key", keys_for_command("GO_UP"))
@@ -341,11 +413,136 @@ class TestMessageView:
         if view_is_focused:
             msg_view.load_old_messages.assert_called_once_with(
                 msg_view.focus.original_widget.message["id"],
+                msg_view.page_size(size),
             )
         else:
             msg_view.load_old_messages.assert_not_called()
         assert return_value == key
 
+    @pytest.mark.parametrize("key", keys_for_command("GO_UP"))
+    def test_keypress_GO_UP_exception__reading_ahead(
+        self, mocker, msg_view, key, widget_size
+    ):
+        size = widget_size(msg_view)
+        msg_view.old_loading = False
+        msg_view.old_reading_ahead = True
+        mocker.patch(MESSAGEVIEW + ".focus_position", return_value=0)
+        mocker.patch(MESSAGEVIEW + ".set_focus_valign")
+        msg_view.log.prev_position = Exception()
+        mocker.patch(MESSAGEVIEW + ".focus", mocker.MagicMock())
+        mocker.patch.object(msg_view, "load_old_messages")
+
+        return_value = msg_view.keypress(size, key)
+
+        # The messages being read ahead are shown once loaded
+        msg_view.load_old_messages.assert_not_called()
+        assert return_value == key
+
+    @pytest.mark.parametrize(
+        "rows, page_fetch_duration, expected_page_size",
+        [
+            (10, 0.0, 30),
+            (40, 0.0, 40),
+            (40, 0.6, 80),
+            (40, 2.0, 100),
+        ],
+        ids=["short_screen", "tall_screen", "slow_fetch", "very_slow_fetch"],
+    )
+    def test_page_size(self, msg_view, rows, page_fetch_duration, expected_page_size):
+        msg_view.page_fetch_duration = page_fetch_duration
+
+        assert msg_view.page_size((80, rows)) == expected_page_size
+
+    @pytest.mark.parametrize(
+        "focus_position, contiguous_range, loads_old, loads_new",
+        [
+            (5, (10, 100), True, False),
+            (5, (0, 100), False, False),
+            (94, (10, 100), False, True),
+            (94, (10, NEWEST_MESSAGE_ID), False, False),
+            (50, (10, 100), False, False),
+        ],
+        ids=[
+            "near_top",
+            "near_top_oldest_shown",
+            "near_bottom",
+            "near_bottom_newest_shown",
+            "far_from_edges",
+        ],
+    )
+    def test_read_ahead(
+        self,
+        mocker,
+        msg_view,
+        focus_position,
+        contiguous_range,
+        loads_old,
+        loads_new,
+    ):
+        msg_view.log = []
+        for message_id in range(100):
+            msg_w = mocker.Mock()
+            msg_w.original_widget.message = {"id": message_id}
+            msg_view.log.append(msg_w)
+        msg_view.body.get_focus.return_value = (
+            msg_view.log[focus_position],
+            focus_position,
+        )
+        msg_view.model.get_contiguous_range_in_current_narrow.return_value = (
+            contiguous_range
+        )
+        read_ahead_old = mocker.patch.object(msg_view, "read_ahead_old_messages")
+        read_ahead_new = mocker.patch.object(msg_view, "read_ahead_new_messages")
+
+        msg_view.read_ahead((80, 20))
+
+        if loads_old:
+            read_ahead_old.assert_called_once_with(0, 30)
+        else:
+            read_ahead_old.assert_not_called()
+        if loads_new:
+            read_ahead_new.assert_called_once_with(99, 30)
+        else:
+            read_ahead_new.assert_not_called()
+        assert msg_view.old_reading_ahead is loads_old
+        assert msg_view.new_reading_ahead is loads_new
+        # Moving through the messages shown is not blocked meanwhile
+        assert msg_view.old_loading is False
+        assert msg_view.new_loading is False
+
+    @pytest.mark.parametrize(
+        "in_flight_flags",
+        [
+            ("old_loading", "new_loading"),
+            ("old_reading_ahead", "new_reading_ahead"),
+        ],
+        ids=["loading", "reading_ahead"],
+    )
+    def test_read_ahead__already_loading(self, mocker, msg_view, in_flight_flags):
+        msg_w = mocker.Mock()
+        msg_w.original_widget.message = {"id": 1}
+        msg_view.log = [msg_w]
+        msg_view.body.get_focus.return_value = (msg_w, 0)
+        for flag in in_flight_flags:
+            setattr(msg_view, flag, True)
+        read_ahead_old = mocker.patch.object(msg_view, "read_ahead_old_messages")
+        read_ahead_new = mocker.patch.object(msg_view, "read_ahead_new_messages")
+
+        msg_view.read_ahead((80, 20))
+
+        read_ahead_old.assert_not_called()
+        read_ahead_new.assert_not_called()
+
+    def test_read_ahead_old_messages(self, mocker, msg_view):
+        msg_view.old_reading_ahead = True
+        load_old_messages = mocker.patch.object(msg_view, "_load_old_messages")
+
+        msg_view.read_ahead_old_messages(10, 30)
+
+        load_old_messages.assert_called_once_with(10, 30)
+        assert msg_view.old_reading_ahead is False
+        assert msg_view.old_loading is False
+
     def test_read_message(self, mocker, msg_box):
         mocker.patch(MESSAGEVIEW + ".main_view", return_value=[msg_box])
         self.urwid.SimpleFocusListWalker.return_value = mocker.Mock()
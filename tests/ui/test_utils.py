@@ -1,10 +1,10 @@
-from typing import Any, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 import pytest
 from pytest_mock import MockerFixture
 
 from zulipterminal.api_types import Message
-from zulipterminal.ui_tools.utils import create_msg_box_list, is_muted
+from zulipterminal.ui_tools.utils import MessageBoxCache, create_msg_box_list, is_muted
 
 
 MODULE = "zulipterminal.ui_tools.utils"
@@ -176,3 +176,104 @@ def test_create_msg_box_list(
 
     assert len(return_value) == len_w_list
     assert mock_muted.called is not unsubscribed
+
+
+class TestMessageBoxCache:
+    @pytest.fixture
+    def messages(self) -> Dict[int, Any]:
+        return {
+            msg_id: {
+                "id": msg_id,
+                "type": "stream",
+                "display_recipient": "stream",
+                "subject": subject,
+                "sender_email": "person@example.com",
+            }
+            for msg_id, subject in ((1, "topic"), (2, "topic"), (3, "other topic"))
+        }
+
+    @pytest.fixture
+    def model(self, mocker: MockerFixture) -> Any:
+        model = mocker.Mock(narrow=[["stream", "stream"]])
+        model.user_dict = {"person@example.com": {"status": "active"}}
+        return model
+
+    @pytest.fixture
+    def message_box(self, mocker: MockerFixture) -> Any:
+        return mocker.patch(
+            MODULE + ".MessageBox", side_effect=lambda *args: mocker.Mock()
+        )
+
+    def test_get__reused(
+        self, model: Any, messages: Dict[int, Any], message_box: Any
+    ) -> None:
+        cache = MessageBoxCache()
+
+        first_box = cache.get(messages[2], model, messages[1])
+        second_box = cache.get(messages[2], model, messages[1])
+
+        assert first_box is second_box
+        message_box.assert_called_once_with(messages[2], model, messages[1])
+
+    def test_get__reused_without_header_in_topic_narrow(
+        self, model: Any, messages: Dict[int, Any], message_box: Any
+    ) -> None:
+        cache = MessageBoxCache()
+        stream_box = cache.get(messages[2], model, messages[1])
+
+        model.narrow = [["stream", "stream"], ["topic", "topic"]]
+        topic_box = cache.get(messages[2], model, messages[1])
+
+        assert topic_box is stream_box
+
+    @pytest.mark.parametrize(
+        "change",
+        ["last_message", "header", "status"],
+    )
+    def test_get__recreated(
+        self, model: Any, messages: Dict[int, Any], message_box: Any, change: str
+    ) -> None:
+        cache = MessageBoxCache()
+        last_message = messages[3]
+        first_box = cache.get(messages[2], model, last_message)
+
+        if change == "last_message":
+            last_message = messages[1]
+        elif change == "header":
+            model.narrow = [["stream", "stream"], ["topic", "other topic"]]
+        else:
+            model.user_dict["person@example.com"]["status"] = "idle"
+        second_box = cache.get(messages[2], model, last_message)
+
+        assert second_box is not first_box
+        assert message_box.call_count == 2
+
+    def test_invalidate(
+        self, model: Any, messages: Dict[int, Any], message_box: Any
+    ) -> None:
+        cache = MessageBoxCache()
+        cache.get(messages[1], model, None)
+        cache.get(messages[2], model, messages[1])
+        cache.get(messages[3], model, messages[2])
+
+        cache.invalidate(1)
+
+        # Both the changed message and the message after it are recreated
+        cache.get(messages[1], model, None)
+        cache.get(messages[2], model, messages[1])
+        cache.get(messages[3], model, messages[2])
+        assert message_box.call_count == 5
+
+    def test_get__least_recently_used_removed(
+        self, model: Any, messages: Dict[int, Any], message_box: Any
+    ) -> None:
+        cache = MessageBoxCache(maximum_size=2)
+        cache.get(messages[1], model, None)
+        cache.get(messages[2], model, None)
+        cache.get(messages[1], model, None)
+        cache.get(messages[3], model, None)
+
+        cache.get(messages[1], model, None)
+        cache.get(messages[2], model, None)
+
+        assert message_box.call_count == 4
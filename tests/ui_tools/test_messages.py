@@ -14,7 +14,10 @@ from zulipterminal.config.symbols import (
     STREAM_TOPIC_SEPARATOR,
     TIME_MENTION_MARKER,
 )
-from zulipterminal.ui_tools.messages import MessageBox
+from zulipterminal.instrumentation import metrics
+from zulipterminal.ui_tools import tables
+from zulipterminal.ui_tools.messages import MAXIMUM_CACHED_LAYOUTS, MessageBox
+from zulipterminal.ui_tools.tables import _rendered_tables
 
 
 MODULE = "zulipterminal.ui_tools.messages"
@@ -28,6 +31,7 @@ class TestMessageBox:
     def mock_external_classes(self, mocker, initial_index):
         self.model = mocker.MagicMock()
         self.model.index = initial_index
+        self.model.controller.maximum_message_lines = 100
 
     @pytest.mark.parametrize(
         "message_type, set_fields",
@@ -788,6 +792,84 @@ class TestMessageBox:
             msg_box.message["content"].find(message["sender_full_name"]) == name_index
         )
 
+    @pytest.mark.parametrize(
+        "full_content, maximum_message_lines, expected_text",
+        [
+            case(False, 3, "1\n2\n3\n[2 MORE LINES: see full rendered message]"),
+            case(False, 5, "1\n2\n3\n4\n5", id="limit_of_all_lines"),
+            case(False, 0, "1\n2\n3\n4\n5", id="no_limit"),
+            case(True, 3, "1\n2\n3\n4\n5", id="full_content"),
+        ],
+    )
+    def test_main_view_truncates_long_content(
+        self, mocker, full_content, maximum_message_lines, expected_text
+    ):
+        self.model.controller.maximum_message_lines = maximum_message_lines
+        message = dict(
+            id=4,
+            type="stream",
+            display_recipient="Verona",
+            stream_id=5,
+            subject="Test topic",
+            is_me_message=False,
+            flags=[],
+            content="<p>1<br>\n2<br>\n3<br>\n4<br>\n5</p>",
+            reactions=[],
+            sender_full_name="Alice",
+            timestamp=1532103879,
+        )
+
+        msg_box = MessageBox(message, self.model, None, full_content=full_content)
+
+        assert msg_box.content.text == expected_text
+
+    @pytest.mark.parametrize(
+        "content, maximum_lines, expected_text, expected_hidden_lines",
+        [
+            case((None, ["a\nb\nc"]), 2, "a\nb", 1, id="lines_hidden"),
+            case((None, ["a\nb\nc"]), 3, "a\nb\nc", 0, id="no_lines_hidden"),
+            case((None, ["a\nb\n"]), 2, "a\nb\n", 0, id="blank_line_not_hidden"),
+            case(
+                (None, [("msg_bold", "a\n"), ("msg_quote", ["b", ("msg_link", "c")])]),
+                1,
+                "a",
+                1,
+                id="nested_markup",
+            ),
+            case((None, ["x" * 1000]), 2, "x" * 400, 1, id="long_line"),
+        ],
+    )
+    def test_truncate_content(
+        self, content, maximum_lines, expected_text, expected_hidden_lines
+    ):
+        markup, hidden_lines = MessageBox.truncate_content(content, maximum_lines)
+
+        assert Text(markup).text == expected_text
+        assert hidden_lines == expected_hidden_lines
+
+    def test_content_layout_cached_per_width(self, mocker, msg_box):
+        layout = mocker.spy(msg_box.content.layout, "layout")
+
+        for width in (20, 30, 20, 30):
+            msg_box.content.rows((width,))
+        assert layout.call_count == 2
+
+        msg_box.content.set_text("Changed content")
+        msg_box.content.rows((20,))
+        assert layout.call_count == 3
+
+    def test_content_layout_cache_limited(self, mocker, msg_box):
+        layout = mocker.spy(msg_box.content.layout, "layout")
+        widths = range(20, 20 + MAXIMUM_CACHED_LAYOUTS + 1)
+
+        for width in widths:
+            msg_box.content.rows((width,))
+        msg_box.content.rows((widths[-1],))  # Most recent width is kept
+        assert layout.call_count == len(widths)
+
+        msg_box.content.rows((widths[0],))  # Oldest width was not kept
+        assert layout.call_count == len(widths) + 1
+
     @pytest.mark.parametrize(
         "message",
         [
@@ -1493,14 +1575,146 @@ class TestMessageBox:
             # fmt: on
         ],
     )
-    def test_transform_content(self, mocker, raw_html, expected_content):
+    @pytest.mark.parametrize("renderer", ["fast", "legacy"])
+    def test_transform_content(self, mocker, raw_html, expected_content, renderer):
         expected_content = expected_content.replace("{}", QUOTED_TEXT_MARKER)
 
-        content, *_ = MessageBox.transform_content(raw_html, SERVER_URL)
+        content, *_ = MessageBox.transform_content(raw_html, SERVER_URL, renderer)
 
         rendered_text = Text(content)
         assert rendered_text.text == expected_content
 
+    @pytest.mark.parametrize("renderer", ["fast", "legacy"])
+    def test_transform_content__renderer_selection(self, mocker, renderer):
+        raw_html = "<p>Hello <strong>world</strong></p>"
+        fast_path = mocker.spy(MessageBox, "_transform_content_with_etree")
+        legacy_path = mocker.spy(MessageBox, "soup2markup")
+
+        content, *_ = MessageBox.transform_content(raw_html, SERVER_URL, renderer)
+
+        assert Text(content).text == "Hello world"
+        assert fast_path.called == (renderer == "fast")
+        assert legacy_path.called == (renderer == "legacy")
+
+    def test_transform_content__fast_renderer_falls_back(self, mocker):
+        raw_html = "<p>Hello <strong>world</strong></p>"
+        mocker.patch.object(
+            MessageBox, "_transform_content_with_etree", side_effect=ValueError
+        )
+        legacy_path = mocker.spy(MessageBox, "soup2markup")
+        timer = mocker.spy(metrics, "timer")
+
+        content, *_ = MessageBox.transform_content(raw_html, SERVER_URL, "fast")
+
+        assert Text(content).text == "Hello world"
+        assert legacy_path.called
+        timer.assert_called_once_with("render:legacy_fallback")
+
+    def test_transform_content__fast_renderer_bug_not_hidden(self, mocker):
+        mocker.patch.object(
+            MessageBox, "_transform_content_with_etree", side_effect=RuntimeError
+        )
+
+        with pytest.raises(RuntimeError):
+            MessageBox.transform_content("<p>Hello</p>", SERVER_URL, "fast")
+
+    @pytest.mark.parametrize("renderer", ["fast", "legacy"])
+    @pytest.mark.parametrize(
+        "maximum_table_rows, expected_text",
+        [
+            case(
+                None,
+                "┌───────┐\n│ Name  │\n├───────┤\n│ Foo   │\n│ Bar   │\n"
+                "│ Bazzy │\n└───────┘",
+                id="all_rows",
+            ),
+            case(
+                2,
+                "┌──────┐\n│ Name │\n├──────┤\n│ Foo  │\n│ Bar  │\n└──────┘\n"
+                "[1 MORE ROWS: see full rendered message]",
+                id="limited_rows",
+            ),
+            case(
+                3,
+                "┌───────┐\n│ Name  │\n├───────┤\n│ Foo   │\n│ Bar   │\n"
+                "│ Bazzy │\n└───────┘",
+                id="limit_of_all_rows",
+            ),
+        ],
+    )
+    def test_transform_content__maximum_table_rows(
+        self, maximum_table_rows, expected_text, renderer
+    ):
+        raw_html = (
+            "<table><thead><tr><th>Name</th></tr></thead><tbody><tr><td>Foo</td>"
+            "</tr><tr><td>Bar</td></tr><tr><td>Bazzy</td></tr></tbody></table>"
+        )
+
+        content, *_ = MessageBox.transform_content(
+            raw_html, SERVER_URL, renderer, maximum_table_rows=maximum_table_rows
+        )
+
+        assert Text(content).text == expected_text
+
+    @pytest.mark.parametrize(
+        "renderer, parser",
+        [("fast", "parse_etree_table"), ("legacy", "parse_html_table")],
+    )
+    def test_transform_content__table_rendering_cached(self, mocker, renderer, parser):
+        raw_html = (
+            "<table><thead><tr><th>Cached</th></tr></thead><tbody><tr><td>Foo</td>"
+            "</tr></tbody></table>"
+        )
+        _rendered_tables.clear()
+        parse_table = mocker.patch(
+            MODULE + "." + parser, side_effect=getattr(tables, parser)
+        )
+        render_table = mocker.spy(tables, "render_table")
+
+        first_content, *_ = MessageBox.transform_content(
+            raw_html, SERVER_URL, renderer, message_id=1
+        )
+        second_content, *_ = MessageBox.transform_content(
+            raw_html, SERVER_URL, renderer, message_id=1
+        )
+
+        assert first_content == second_content
+        assert first_content[1] is not second_content[1]
+        assert parse_table.call_count == 1
+        assert render_table.call_count == 1
+
+        # Edited, or another message
+        MessageBox.transform_content(
+            raw_html + "<p>Edited</p>", SERVER_URL, renderer, message_id=1
+        )
+        MessageBox.transform_content(raw_html, SERVER_URL, renderer, message_id=2)
+        # Not a message, eg. a stream description
+        MessageBox.transform_content(raw_html, SERVER_URL, renderer)
+
+        assert parse_table.call_count == 4
+        assert render_table.call_count == 4
+        assert len(_rendered_tables) == 3
+
+    def test_transform_content__tables_cached_by_position(self):
+        raw_html = (
+            "<table><thead><tr><th>First</th></tr></thead>"
+            "<tbody><tr><td>Foo</td></tr></tbody></table>"
+            "<table><thead><tr><th>Second</th></tr></thead>"
+            "<tbody><tr><td>Bar</td></tr></tbody></table>"
+        )
+        _rendered_tables.clear()
+
+        fast_content, *_ = MessageBox.transform_content(
+            raw_html, SERVER_URL, "fast", message_id=1
+        )
+        legacy_content, *_ = MessageBox.transform_content(
+            raw_html, SERVER_URL, "legacy", message_id=1
+        )
+
+        assert len(_rendered_tables) == 2
+        assert legacy_content == fast_content
+        assert "Second" in Text(fast_content).text
+
     # FIXME This is the same parametrize as MsgInfoView:test_height_reactions
     @pytest.mark.parametrize(
         "to_vary_in_each_message, expected_text, expected_attributes",
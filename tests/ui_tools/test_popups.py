@@ -10,6 +10,7 @@ from zulipterminal.api_types import Message
 from zulipterminal.config.keys import is_command_key, keys_for_command
 from zulipterminal.config.ui_mappings import EDIT_MODE_CAPTIONS
 from zulipterminal.helper import TidiedUserInfo
+from zulipterminal.instrumentation import Metrics
 from zulipterminal.ui_tools.messages import MessageBox
 from zulipterminal.ui_tools.views import (
     AboutView,
@@ -22,6 +23,7 @@ from zulipterminal.ui_tools.views import (
     HelpView,
     MarkdownHelpView,
     MsgInfoView,
+    PerformanceMetricsView,
     PopUpConfirmationView,
     PopUpView,
     StreamInfoView,
@@ -201,6 +203,10 @@ class TestAboutView:
             notify_enabled=False,
             autohide_enabled=False,
             maximum_footlinks=3,
+            maximum_message_lines=100,
+            renderer="fast",
+            reconnect_count=0,
+            downtime=0.0,
         )
 
     @pytest.mark.parametrize(
@@ -242,6 +248,10 @@ class TestAboutView:
             notify_enabled=False,
             autohide_enabled=False,
             maximum_footlinks=3,
+            maximum_message_lines=100,
+            renderer="fast",
+            reconnect_count=0,
+            downtime=0.0,
         )
 
         assert len(about_view.feature_level_content) == (
@@ -249,6 +259,63 @@ class TestAboutView:
         )
 
 
+class TestPerformanceMetricsView:
+    @pytest.fixture(autouse=True)
+    def mock_external_classes(self, mocker: MockerFixture) -> None:
+        self.controller = mocker.Mock()
+        mocker.patch.object(
+            self.controller, "maximum_popup_dimensions", return_value=(64, 64)
+        )
+
+    @pytest.fixture
+    def metrics(self) -> Metrics:
+        metrics = Metrics()
+        metrics.record("fetch:get_messages", 20)
+        metrics.record("render:MessageBox", 1)
+        metrics.record("render:MessageBox", 3)
+        return metrics
+
+    @pytest.mark.parametrize(
+        "key",
+        {*keys_for_command("GO_BACK"), *keys_for_command("PERFORMANCE_METRICS")},
+    )
+    def test_keypress_exit_popup(
+        self,
+        key: str,
+        metrics: Metrics,
+        widget_size: Callable[[Widget], urwid_Size],
+    ) -> None:
+        view = PerformanceMetricsView(self.controller, "Metrics", metrics.summary())
+        size = widget_size(view)
+
+        view.keypress(size, key)
+
+        assert self.controller.exit_popup.called
+
+    def test_init(self, metrics: Metrics) -> None:
+        view = PerformanceMetricsView(self.controller, "Metrics", metrics.summary())
+
+        texts = [
+            text
+            for widget in view.log
+            for text in (
+                [widget.text]
+                if isinstance(widget, Text)
+                else [column.text for column, _ in widget.original_widget.contents]
+            )
+        ]
+        assert "Fetching & indexing" in texts
+        assert "Rendering" in texts
+        assert "get_messages" in texts
+        assert "MessageBox" in texts
+        assert "       2      2.00      3.00      3.00" in texts
+
+    def test_init__no_metrics(self) -> None:
+        view = PerformanceMetricsView(self.controller, "Metrics", [])
+
+        assert view.log[-1].text == "No operations have been timed yet"
+
+
 class TestUserInfoView:
     @pytest.fixture(autouse=True)
     def mock_external_classes(
@@ -381,7 +448,7 @@ class TestFullRenderedMsgView:
         mocker.patch.object(
             self.controller, "maximum_popup_dimensions", return_value=(64, 64)
         )
-        mocker.patch(MODULE + ".MessageBox", return_value=msg_box)
+        self.msg_box_class = mocker.patch(MODULE + ".MessageBox", return_value=msg_box)
         # NOTE: Given that the FullRenderedMsgView just uses the message ID from
         # the message data currently, message_fixture is not used to avoid
         # adding extra test runs unnecessarily.
@@ -404,6 +471,9 @@ class TestFullRenderedMsgView:
         assert self.full_rendered_message.time_mentions == list()
         assert self.full_rendered_message.header.widget_list == msg_box.header
         assert self.full_rendered_message.footer.widget_list == msg_box.footer
+        self.msg_box_class.assert_called_once_with(
+            self.message, self.controller.model, None, full_content=True
+        )
 
     @pytest.mark.parametrize("key", keys_for_command("MSG_INFO"))
     def test_keypress_exit_popup(
@@ -0,0 +1,500 @@
+"""
+Generates synthetic realms, with messages and events, for load testing
+
+Realms (register data and messages) and events match the payloads from the
+Zulip API described in zulipterminal/api_types.py, and are the same for the
+same arguments, so that behavior with large organizations can be reproduced
+offline.
+
+A corpus is a realm as returned by generate_realm, optionally including events
+from generate_events, which can be saved to and loaded from a JSON file.
+"""
+
+import json
+import random
+from typing import Any, Dict, List
+
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from zulipterminal.version import SUPPORTED_SERVER_VERSIONS
+
+
+Realm = Dict[str, Any]
+
+SERVER_VERSION, SERVER_FEATURE_LEVEL = SUPPORTED_SERVER_VERSIONS[-1]
+
+# Time at which the realm is generated; timestamps are relative to this
+REALM_NOW = 1672531200  # 2023-01-01T00:00:00Z
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud "
+    "exercitation ullamco laboris nisi aliquip ex ea commodo consequat"
+).split()
+
+EMOJIS = [
+    ("smile", "1f604"),
+    ("thumbs_up", "1f44d"),
+    ("heart", "2764"),
+    ("tada", "1f389"),
+    ("rocket", "1f680"),
+    ("eyes", "1f440"),
+]
+
+CODE_SNIPPETS = [
+    (
+        "python",
+        "def fibonacci(n: int) -> int:\n"
+        "    if n < 2:\n"
+        "        return n\n"
+        "    return fibonacci(n - 1) + fibonacci(n - 2)\n",
+    ),
+    (
+        "javascript",
+        "const total = items\n"
+        "  .filter((item) => item.enabled)\n"
+        "  .reduce((sum, item) => sum + item.price, 0);\n",
+    ),
+    ("bash", 'for file in *.log; do\n  gzip "$file"\ndone\n'),
+    (
+        "sql",
+        "SELECT stream_id, COUNT(*)\n"
+        "FROM messages\n"
+        "WHERE sent > now() - interval '1 day'\n"
+        "GROUP BY stream_id;\n",
+    ),
+]
+
+# Relative frequency of each kind of message content
+CONTENT_WEIGHTS = {
+    "paragraph": 50,
+    "mention": 12,
+    "code": 8,
+    "quote": 8,
+    "list": 6,
+    "table": 4,
+    "emoji": 6,
+    "link": 4,
+    "long": 2,
+}
+
+
+def _sentence(rng: random.Random, minimum: int = 3, maximum: int = 30) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(minimum, maximum)))
+
+
+def _user_mention(user: Dict[str, Any]) -> str:
+    return (
+        f'<span class="user-mention" data-user-id="{user["user_id"]}">'
+        f'@{user["full_name"]}</span>'
+    )
+
+
+def _stream_link(stream: Dict[str, Any]) -> str:
+    stream_id = stream["stream_id"]
+    slug = stream["name"].replace(" ", "-")
+    return (
+        f'<a class="stream" data-stream-id="{stream_id}" '
+        f'href="/#narrow/stream/{stream_id}-{slug}">#{stream["name"]}</a>'
+    )
+
+
+def _emoji(name: str, code: str) -> str:
+    return (
+        f'<span aria-label="{name}" class="emoji emoji-{code}" role="img" '
+        f'title="{name}">:{name}:</span>'
+    )
+
+
+def _code_block(rng: random.Random) -> str:
+    language, code = rng.choice(CODE_SNIPPETS)
+    formatter = HtmlFormatter(cssclass="codehilite")
+    highlighted = highlight(code, get_lexer_by_name(language), formatter)
+    # The server marks the language, which pygments does not
+    return highlighted.replace(
+        '<div class="codehilite">',
+        f'<div class="codehilite" data-code-language="{language}">',
+        1,
+    )
+
+
+def _table(rng: random.Random) -> str:
+    columns = rng.randint(2, 5)
+    rows = rng.choice([2, 5, 10, 50])
+    alignments = [
+        rng.choice(["", ' align="right"', ' align="center"']) for _ in range(columns)
+    ]
+    header = "".join(f"<th{align}>{rng.choice(WORDS)}</th>" for align in alignments)
+    body = "".join(
+        "<tr>"
+        + "".join(f"<td{align}>{_sentence(rng, 1, 3)}</td>" for align in alignments)
+        + "</tr>\n"
+        for _ in range(rows)
+    )
+    return (
+        f"<table>\n<thead>\n<tr>{header}</tr>\n</thead>\n"
+        f"<tbody>\n{body}</tbody>\n</table>"
+    )
+
+
+def generate_content(
+    rng: random.Random, users: List[Dict[str, Any]], streams: List[Dict[str, Any]]
+) -> str:
+    """
+    Returns message content as rendered by the server, of a random kind
+    """
+    kind = rng.choices(list(CONTENT_WEIGHTS), weights=list(CONTENT_WEIGHTS.values()))[0]
+    if kind == "mention":
+        mentioned = rng.choice(users)
+        return f"<p>{_user_mention(mentioned)} {_sentence(rng)}</p>"
+    if kind == "code":
+        return f"<p>{_sentence(rng)}</p>\n{_code_block(rng)}"
+    if kind == "quote":
+        return (
+            f"<blockquote>\n<p>{_sentence(rng)}</p>\n</blockquote>\n"
+            f"<p>{_sentence(rng)}</p>"
+        )
+    if kind == "list":
+        items = "\n".join(
+            f"<li>{_sentence(rng, 2, 8)}</li>" for _ in range(rng.randint(2, 8))
+        )
+        return f"<p>{_sentence(rng)}</p>\n<ul>\n{items}\n</ul>"
+    if kind == "table":
+        return f"<p>{_sentence(rng)}</p>\n{_table(rng)}"
+    if kind == "emoji":
+        return f"<p>{_sentence(rng)} {_emoji(*rng.choice(EMOJIS))}</p>"
+    if kind == "link":
+        link = (
+            _stream_link(rng.choice(streams))
+            if streams and rng.random() < 0.5
+            else '<a href="https://example.com/docs">https://example.com/docs</a>'
+        )
+        return f"<p>{_sentence(rng)} {link}</p>"
+    if kind == "long":
+        return "\n".join(
+            f"<p>{_sentence(rng, 20, 80)}</p>" for _ in range(rng.randint(20, 60))
+        )
+    return f"<p>{_sentence(rng)}</p>"
+
+
+def _reactions(rng: random.Random, users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if rng.random() > 0.15:
+        return []
+    reactions = []
+    for user in rng.sample(users, min(len(users), rng.randint(1, 5))):
+        name, code = rng.choice(EMOJIS)
+        reactions.append(
+            {
+                "emoji_name": name,
+                "emoji_code": code,
+                "reaction_type": "unicode_emoji",
+                "user_id": user["user_id"],
+                "user": {
+                    "id": user["user_id"],
+                    "email": user["email"],
+                    "full_name": user["full_name"],
+                },
+            }
+        )
+    return reactions
+
+
+def generate_realm(*, users: int, streams: int, messages: int, seed: int) -> Realm:
+    """
+    Returns a realm with the specified number of users, streams and messages,
+    which is always the same for the same arguments
+    """
+    rng = random.Random(seed)
+
+    realm_users: List[Dict[str, Any]] = [
+        {
+            "user_id": user_id,
+            "full_name": f"User {user_id}",
+            "email": f"user{user_id}@example.com",
+            "avatar_url": None,
+            "is_active": True,
+            "bot_type": None,
+            "is_bot": False,
+            "is_admin": user_id == 1,
+            "role": 200 if user_id == 1 else 400,
+            "timezone": "",
+            "date_joined": "2020-01-01T00:00:00.000000+00:00",
+        }
+        for user_id in range(1, users + 1)
+    ]
+    own_user = realm_users[0]
+    other_user_ids = [user["user_id"] for user in realm_users[1:]]
+
+    # Most users have been seen recently, some very recently
+    presences: Dict[str, Any] = {}
+    for user in realm_users[1:]:
+        if rng.random() < 0.7:
+            status = rng.choice(["active", "idle"])
+            timestamp = REALM_NOW - rng.choice([10, 60, 600, 86400])
+            presences[user["email"]] = {
+                "aggregated": {
+                    "client": "website",
+                    "status": status,
+                    "timestamp": timestamp,
+                },
+                "website": {
+                    "client": "website",
+                    "status": status,
+                    "timestamp": timestamp,
+                    "pushable": False,
+                },
+            }
+
+    # Subscriber counts fall off with stream rank, as in real organizations
+    subscriptions = []
+    for stream_id in range(1, streams + 1):
+        subscriber_count = min(
+            len(other_user_ids), max(1, len(other_user_ids) // stream_id)
+        )
+        subscriptions.append(
+            {
+                "stream_id": stream_id,
+                "name": f"stream {stream_id}",
+                "description": f"Description of stream {stream_id}",
+                "rendered_description": f"<p>Description of stream {stream_id}</p>",
+                "date_created": 1577836800,
+                "invite_only": rng.random() < 0.1,
+                "is_web_public": False,
+                "color": f"#{rng.randrange(0x1000000):06x}",
+                "pin_to_top": stream_id == 1,
+                "is_muted": rng.random() < 0.05,
+                "in_home_view": True,
+                "audible_notifications": None,
+                "desktop_notifications": None,
+                "push_notifications": None,
+                "email_notifications": None,
+                "wildcard_mentions_notify": None,
+                "email_address": f"stream{stream_id}@example.com",
+                "message_retention_days": None,
+                "stream_post_policy": 1,
+                "history_public_to_subscribers": True,
+                "first_message_id": None,
+                "stream_weekly_traffic": None,
+                "subscribers": rng.sample(other_user_ids, subscriber_count)
+                + [own_user["user_id"]],
+            }
+        )
+
+    start_time = REALM_NOW - messages * 60
+    realm_messages = []
+    for message_id in range(1, messages + 1):
+        sender = rng.choice(realm_users)
+        message: Dict[str, Any] = {
+            "id": message_id,
+            "sender_id": sender["user_id"],
+            "sender_full_name": sender["full_name"],
+            "sender_email": sender["email"],
+            "sender_realm_str": "example",
+            "avatar_url": None,
+            "timestamp": start_time + message_id * 60,
+            "client": "website",
+            "content": generate_content(rng, realm_users, subscriptions),
+            "content_type": "text/html",
+            "is_me_message": False,
+            "reactions": _reactions(rng, realm_users),
+            "submessages": [],
+            "topic_links": [],
+            "flags": ["read"] if rng.random() < 0.9 else [],
+        }
+        if f'data-user-id="{own_user["user_id"]}"' in message["content"]:
+            message["flags"].append("mentioned")
+        if rng.random() < 0.02:
+            message["flags"].append("starred")
+        if subscriptions and rng.random() < 0.8:
+            # Earlier streams are busier, like their subscriber counts
+            stream = subscriptions[int(len(subscriptions) * rng.random() ** 2)]
+            message.update(
+                type="stream",
+                stream_id=stream["stream_id"],
+                display_recipient=stream["name"],
+                subject=f"topic {rng.randrange(10)}",
+            )
+        else:
+            recipients = [own_user] + rng.sample(
+                realm_users[1:], min(len(realm_users) - 1, rng.randint(1, 3))
+            )
+            message.update(
+                type="private",
+                display_recipient=[
+                    {
+                        "id": user["user_id"],
+                        "email": user["email"],
+                        "full_name": user["full_name"],
+                        "is_mirror_dummy": False,
+                    }
+                    for user in recipients
+                ],
+                subject="",
+            )
+        realm_messages.append(message)
+
+    return {
+        "now": REALM_NOW,
+        "register": register_response(
+            own_user, realm_users, subscriptions, presences, realm_messages
+        ),
+        "messages": realm_messages,
+    }
+
+
+def register_response(
+    own_user: Dict[str, Any],
+    realm_users: List[Dict[str, Any]],
+    subscriptions: List[Dict[str, Any]],
+    presences: Dict[str, Any],
+    messages: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    return {
+        "result": "success",
+        "msg": "",
+        "queue_id": None,  # Set per registration
+        "last_event_id": -1,
+        "max_message_id": 0,  # Set per registration
+        "zulip_version": SERVER_VERSION,
+        "zulip_feature_level": SERVER_FEATURE_LEVEL,
+        "user_id": own_user["user_id"],
+        "email": own_user["email"],
+        "full_name": own_user["full_name"],
+        "realm_name": "Benchmark Organization",
+        "realm_users": realm_users,
+        "cross_realm_bots": [],
+        "realm_user_groups": [],
+        "subscriptions": subscriptions,
+        "unsubscribed": [],
+        "never_subscribed": [],
+        "presences": presences,
+        "muted_topics": [],
+        "starred_messages": [
+            message["id"] for message in messages if "starred" in message["flags"]
+        ],
+        "realm_emoji": {},
+        "unread_msgs": {
+            "pms": [],
+            "streams": [],
+            "huddles": [],
+            "mentions": [],
+            "count": 0,
+        },  # Set per registration
+        "realm_message_retention_days": -1,
+        "realm_allow_message_editing": True,
+        "realm_allow_edit_history": True,
+        "realm_edit_topic_policy": 1,
+        "realm_message_content_edit_limit_seconds": 600,
+        "twenty_four_hour_time": True,
+        "pm_content_in_desktop_notifications": True,
+        "user_settings": {"send_private_typing_notifications": True},
+    }
+
+
+def generate_events(realm: Realm, *, events: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Returns events as from polling the realm after registering, mostly new
+    messages but also reactions, typing notifications and flag changes
+
+    Events refer to the realm messages and to new messages in earlier events,
+    but are not applied to the realm itself.
+    """
+    if not realm["messages"]:
+        return []  # New messages are based upon existing ones
+    rng = random.Random(seed)
+    register = realm["register"]
+    users = register["realm_users"]
+    own_user = next(user for user in users if user["user_id"] == register["user_id"])
+    messages = realm["messages"]
+    next_message_id = messages[-1]["id"] + 1
+    timestamp = realm["now"]
+
+    generated: List[Dict[str, Any]] = []
+    message_ids = [message["id"] for message in messages]
+    while len(generated) < events:
+        kind = rng.choices(
+            ["message", "reaction", "typing", "update_message_flags"],
+            weights=[70, 15, 10, 5],
+        )[0]
+        if kind == "message":
+            # Reuse the sender and recipients of an existing message
+            template = rng.choice(messages)
+            timestamp += rng.randint(1, 30)
+            message = dict(
+                template,
+                id=next_message_id,
+                timestamp=timestamp,
+                content=generate_content(rng, users, register["subscriptions"]),
+                reactions=[],
+                flags=[],
+            )
+            next_message_id += 1
+            message_ids.append(message["id"])
+            generated.append({"type": "message", "message": message, "flags": []})
+        elif kind == "reaction":
+            user = rng.choice(users)
+            name, code = rng.choice(EMOJIS)
+            generated.append(
+                {
+                    "type": "reaction",
+                    "op": "add",
+                    "message_id": rng.choice(message_ids[-100:]),
+                    "emoji_name": name,
+                    "emoji_code": code,
+                    "reaction_type": "unicode_emoji",
+                    "user_id": user["user_id"],
+                    "user": {
+                        "user_id": user["user_id"],
+                        "email": user["email"],
+                        "full_name": user["full_name"],
+                    },
+                }
+            )
+        elif kind == "typing":
+            sender = rng.choice([user for user in users if user is not own_user])
+            for op in ("start", "stop"):
+                generated.append(
+                    {
+                        "type": "typing",
+                        "op": op,
+                        "sender": {
+                            "user_id": sender["user_id"],
+                            "email": sender["email"],
+                        },
+                        "recipients": [
+                            {"user_id": user["user_id"], "email": user["email"]}
+                            for user in (own_user, sender)
+                        ],
+                    }
+                )
+        else:
+            flag = rng.choice(["read", "starred"])
+            recent_ids = message_ids[-100:]
+            generated.append(
+                {
+                    "type": "update_message_flags",
+                    "op": "add",
+                    "operation": "add",
+                    "flag": flag,
+                    "messages": rng.sample(
+                        recent_ids, min(len(recent_ids), rng.randint(1, 10))
+                    ),
+                    "all": False,
+                }
+            )
+    generated = generated[:events]
+    for event_id, event in enumerate(generated):
+        event["id"] = event_id
+    return generated
+
+
+def save_corpus(corpus: Realm, path: str) -> None:
+    with open(path, "w") as corpus_file:
+        json.dump(corpus, corpus_file)
+
+
+def load_corpus(path: str) -> Realm:
+    with open(path) as corpus_file:
+        return json.load(corpus_file)
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a Zulip server, serving a synthetic realm over HTTP
+
+This supports the API calls made by zulip-terminal for startup, fetching
+messages and polling for events, which is sufficient for benchmarking.
+Other calls are accepted and succeed, without any effect.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from corpus import (
+    SERVER_FEATURE_LEVEL,
+    SERVER_VERSION,
+    Realm,
+    generate_events,
+    generate_realm,
+    load_corpus,
+)
+
+
+# Seconds to hold a request for events open, if there are none yet
+EVENTS_TIMEOUT = 0.5
+
+
+def unread_messages(realm: Realm) -> Dict[str, Any]:
+    own_user_id = realm["register"]["user_id"]
+    streams: Dict[Tuple[int, str], List[int]] = {}
+    pms: Dict[int, List[int]] = {}
+    huddles: Dict[str, List[int]] = {}
+    mentions = []
+    for message in realm["messages"]:
+        if "read" in message["flags"] or message["sender_id"] == own_user_id:
+            continue
+        if "mentioned" in message["flags"]:
+            mentions.append(message["id"])
+        if message["type"] == "stream":
+            key = (message["stream_id"], message["subject"])
+            streams.setdefault(key, []).append(message["id"])
+        elif len(message["display_recipient"]) == 2:
+            pms.setdefault(message["sender_id"], []).append(message["id"])
+        else:
+            user_ids = sorted(user["id"] for user in message["display_recipient"])
+            huddles.setdefault(",".join(map(str, user_ids)), []).append(message["id"])
+    return {
+        "streams": [
+            {"stream_id": stream_id, "topic": topic, "unread_message_ids": ids}
+            for (stream_id, topic), ids in streams.items()
+        ],
+        "pms": [
+            {"sender_id": sender_id, "unread_message_ids": ids}
+            for sender_id, ids in pms.items()
+        ],
+        "huddles": [
+            {"user_ids_string": user_ids, "unread_message_ids": ids}
+            for user_ids, ids in huddles.items()
+        ],
+        "mentions": mentions,
+        "count": sum(
+            len(ids) for ids in [*streams.values(), *pms.values(), *huddles.values()]
+        ),
+    }
+
+
+def message_matches(message: Dict[str, Any], narrow: List[Any], realm: Realm) -> bool:
+    for term in narrow:
+        if isinstance(term, dict):
+            operator, operand = term["operator"], term["operand"]
+        else:
+            operator, operand = term
+        if operator == "stream":
+            if message["type"] != "stream" or operand not in (
+                message["stream_id"],
+                message["display_recipient"],
+            ):
+                return False
+        elif operator == "topic":
+            if message["subject"] != operand:
+                return False
+        elif operator == "pm_with":
+            if message["type"] != "private":
+                return False
+            emails = {email.strip() for email in operand.split(",")}
+            emails.add(realm["register"]["email"])
+            recipients = {user["email"] for user in message["display_recipient"]}
+            if recipients != emails:
+                return False
+        elif operator == "is":
+            if operand == "private" and message["type"] != "private":
+                return False
+            if operand in ("starred", "mentioned") and operand not in message["flags"]:
+                return False
+        elif operator == "search":
+            if operand.lower() not in message["content"].lower():
+                return False
+        elif operator == "id" and message["id"] != int(operand):
+            return False
+    return True
+
+
+class FakeZulipServer:
+    """
+    Serves a realm from a local HTTP server in a background thread
+
+    Events can be added using push_events, for clients polling for events
+    """
+
+    def __init__(self, realm: Realm) -> None:
+        self.realm = realm
+        self._queues: Dict[str, List[Dict[str, Any]]] = {}
+        self._queues_changed = threading.Condition()
+        self.request_counts: Dict[str, int] = {}
+
+        handler = type("Handler", (_RequestHandler,), {"fake_server": self})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def write_zuliprc(self, path: str) -> None:
+        with open(path, "w") as zuliprc:
+            zuliprc.write(
+                "[api]\n"
+                f"email={self.realm['register']['email']}\n"
+                "key=benchmark\n"
+                f"site={self.url}\n"
+            )
+
+    def push_events(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Adds events to every registered queue, with ids assigned per queue
+        """
+        with self._queues_changed:
+            for queue in self._queues.values():
+                for event in events:
+                    queue.append(dict(event, id=len(queue)))
+            self.realm["messages"].extend(
+                event["message"] for event in events if event["type"] == "message"
+            )
+            self._queues_changed.notify_all()
+
+    def wait_for_queue(self) -> None:
+        """
+        Waits until a client has registered a queue for events
+        """
+        with self._queues_changed:
+            self._queues_changed.wait_for(lambda: bool(self._queues))
+
+    def presences(self) -> Dict[str, Any]:
+        """
+        Returns presences of the realm, as if it was generated just now
+        """
+        offset = int(time.time()) - self.realm["now"]
+        return {
+            email: {
+                client: dict(presence, timestamp=presence["timestamp"] + offset)
+                for client, presence in clients.items()
+            }
+            for email, clients in self.realm["register"]["presences"].items()
+        }
+
+    # Endpoint implementations, each returning a successful response
+
+    def register(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        with self._queues_changed:
+            queue_id = f"queue-{len(self._queues)}"
+            self._queues[queue_id] = []
+            self._queues_changed.notify_all()
+        messages = self.realm["messages"]
+        return dict(
+            self.realm["register"],
+            queue_id=queue_id,
+            max_message_id=messages[-1]["id"] if messages else -1,
+            unread_msgs=unread_messages(self.realm),
+            presences=self.presences(),
+        )
+
+    def get_events(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        queue_id = params["queue_id"]
+        last_event_id = int(params["last_event_id"])
+        dont_block = params.get("dont_block") in (True, "true")
+        with self._queues_changed:
+            if queue_id not in self._queues:
+                return {
+                    "result": "error",
+                    "code": "BAD_EVENT_QUEUE_ID",
+                    "msg": f"Bad event queue ID: {queue_id}",
+                    "queue_id": queue_id,
+                }
+            queue = self._queues[queue_id]
+            if not dont_block:
+                self._queues_changed.wait_for(
+                    lambda: len(queue) > last_event_id + 1, timeout=EVENTS_TIMEOUT
+                )
+            events = queue[last_event_id + 1 :]
+        if dont_block:
+            return {"result": "success", "msg": "", "events": events}
+        if not events:
+            events = [{"type": "heartbeat", "id": last_event_id}]
+        return {"result": "success", "msg": "", "events": events}
+
+    def get_messages(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        narrow = params.get("narrow", [])
+        if isinstance(narrow, str):
+            narrow = json.loads(narrow)
+        matching = [
+            message
+            for message in self.realm["messages"]
+            if message_matches(message, narrow, self.realm)
+        ]
+
+        anchor = params.get("anchor", "newest")
+        if params.get("use_first_unread_anchor") in (True, "true"):
+            anchor = "first_unread"
+        if anchor == "newest":
+            anchor_id = matching[-1]["id"] if matching else 0
+        elif anchor == "oldest":
+            anchor_id = 0
+        elif anchor == "first_unread":
+            unread = [msg["id"] for msg in matching if "read" not in msg["flags"]]
+            anchor_id = unread[0] if unread else 10000000000000000
+        else:
+            anchor_id = int(anchor)
+
+        num_before = int(params.get("num_before", 0))
+        num_after = int(params.get("num_after", 0))
+        before = [msg for msg in matching if msg["id"] < anchor_id]
+        after = [msg for msg in matching if msg["id"] >= anchor_id]
+        selected = before[len(before) - num_before :] if num_before else []
+        selected += after[: num_after + 1]
+        return {
+            "result": "success",
+            "msg": "",
+            "anchor": anchor_id,
+            "found_anchor": any(msg["id"] == anchor_id for msg in matching),
+            "found_oldest": len(before) <= num_before,
+            "found_newest": len(after) <= num_after + 1,
+            "messages": selected,
+        }
+
+    def get_server_settings(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "result": "success",
+            "msg": "",
+            "zulip_version": SERVER_VERSION,
+            "zulip_feature_level": SERVER_FEATURE_LEVEL,
+            "realm_uri": self.url,
+            "realm_name": self.realm["register"]["realm_name"],
+            "authentication_methods": {"password": True},
+            "email_auth_enabled": True,
+            "require_email_format_usernames": True,
+        }
+
+    def get_stream_topics(self, stream_id: int) -> Dict[str, Any]:
+        topics: Dict[str, int] = {}
+        for message in self.realm["messages"]:
+            if message.get("stream_id") == stream_id:
+                topics[message["subject"]] = message["id"]
+        return {
+            "result": "success",
+            "msg": "",
+            "topics": [
+                {"name": name, "max_id": max_id}
+                for name, max_id in sorted(topics.items(), key=lambda item: -item[1])
+            ],
+        }
+
+    def update_presence(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"result": "success", "msg": "", "presences": self.presences()}
+
+    def default(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"result": "success", "msg": ""}
+
+    def endpoint(self, method: str, path: str) -> Callable[..., Dict[str, Any]]:
+        endpoints = {
+            ("POST", "/api/v1/register"): self.register,
+            ("GET", "/api/v1/events"): self.get_events,
+            ("GET", "/api/v1/messages"): self.get_messages,
+            ("GET", "/api/v1/server_settings"): self.get_server_settings,
+            ("POST", "/api/v1/users/me/presence"): self.update_presence,
+        }
+        topics_path = re.fullmatch(r"/api/v1/users/me/(\d+)/topics", path)
+        if method == "GET" and topics_path:
+            stream_id = int(topics_path.group(1))
+            return lambda params: self.get_stream_topics(stream_id)
+        return endpoints.get((method, path), self.default)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    fake_server: FakeZulipServer
+
+    def _respond(self, method: str) -> None:
+        url = urlparse(self.path)
+        params: Dict[str, Any] = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            params.update(parse_qsl(self.rfile.read(length).decode()))
+
+        counts = self.fake_server.request_counts
+        counts[url.path] = counts.get(url.path, 0) + 1
+        response = self.fake_server.endpoint(method, url.path)(params)
+
+        body = json.dumps(response).encode()
+        self.send_response(200 if response["result"] == "success" else 400)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._respond("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._respond("POST")
+
+    def do_PATCH(self) -> None:  # noqa: N802
+        self._respond("PATCH")
+
+    def do_DELETE(self) -> None:  # noqa: N802
+        self._respond("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # Avoid output for every request
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--corpus", help="serve a realm saved by generate-corpus, not generating one"
+    )
+    parser.add_argument(
+        "--event-interval",
+        type=float,
+        default=0.1,
+        help="seconds between sending events, once a client has registered",
+    )
+    parser.add_argument("--zuliprc", help="write a zuliprc for this server here")
+    args = parser.parse_args()
+
+    if args.corpus:
+        realm = load_corpus(args.corpus)
+    else:
+        realm = generate_realm(
+            users=args.users,
+            streams=args.streams,
+            messages=args.messages,
+            seed=args.seed,
+        )
+        realm["events"] = generate_events(realm, events=args.events, seed=args.seed)
+    events = realm.pop("events", [])
+    server = FakeZulipServer(realm)
+    server.start()
+    print(f"Serving on {server.url}")
+    if args.zuliprc:
+        server.write_zuliprc(args.zuliprc)
+        print(f"Run: zulip-term -c {args.zuliprc}")
+    try:
+        if events:
+            server.wait_for_queue()
+            print(f"Sending {len(events)} events")
+            for event in events:
+                server.push_events([event])
+                time.sleep(args.event_interval)
+            print("Sent all events")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
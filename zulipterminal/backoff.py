@@ -0,0 +1,82 @@
+"""
+Delays between attempts to reconnect to the server, and their telemetry
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# Seconds of the first delay, which doubles with each failure up to the maximum
+BACKOFF_BASE_DELAY = 1.0
+BACKOFF_MAX_DELAY = 60.0
+
+
+class ReconnectBackoff:
+    """
+    Delays attempts after failures exponentially, up to a maximum, choosing a
+    random delay below that each time ('full jitter'), so that the clients
+    disconnected at once by eg. a server restart do not all reconnect at once
+
+    Waiting can be ended early by retry_now, eg. once the network is restored.
+    """
+
+    def __init__(
+        self, *, base: float = BACKOFF_BASE_DELAY, cap: float = BACKOFF_MAX_DELAY
+    ) -> None:
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+        self.reconnect_count = 0
+        self.downtime = 0.0  # Seconds
+        self._disconnected_at: Optional[float] = None
+        self._retry_after: Optional[float] = None
+        self._retry_now = threading.Event()
+
+    @property
+    def is_disconnected(self) -> bool:
+        return self._disconnected_at is not None
+
+    def honour_retry_after(self, response: Dict[str, Any]) -> None:
+        """
+        Delays the next attempt at least as long as a rate-limited response
+        asks, in its 'retry-after' field
+        """
+        retry_after = response.get("retry-after")
+        if isinstance(retry_after, (int, float)):
+            self._retry_after = float(retry_after)
+
+    def failed(self) -> float:
+        """
+        Records a failed attempt, returning the seconds to wait until the next
+        """
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+        # Limit the exponent too, as failures may continue for a long time
+        limit = min(self.cap, self.base * 2 ** min(self.failures, 32))
+        self.failures += 1
+        delay = random.uniform(0, limit)
+        if self._retry_after is not None:
+            delay = max(delay, self._retry_after)
+            self._retry_after = None
+        return delay
+
+    def succeeded(self) -> None:
+        if self._disconnected_at is not None:
+            self.downtime += time.monotonic() - self._disconnected_at
+            self.reconnect_count += 1
+            self._disconnected_at = None
+        self.failures = 0
+        self._retry_after = None
+
+    def wait(self, delay: float) -> None:
+        """
+        Waits for delay seconds, or until retry_now is called
+        """
+        self._retry_now.wait(delay)
+        self._retry_now.clear()
+
+    def retry_now(self) -> None:
+        if self.is_disconnected:
+            self._retry_now.set()
@@ -11,25 +11,25 @@ import sys
 import traceback
 from enum import Enum
 from os import path, remove
-from typing import Dict, List, NamedTuple, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 
-import requests
-from urwid import display_common, set_encoding
-
-from zulipterminal.api_types import ServerSettings
 from zulipterminal.config.themes import (
     InvalidThemeColorCode,
     aliased_themes,
     all_themes,
     complete_and_incomplete_themes,
-    generate_theme,
+    load_theme,
 )
-from zulipterminal.core import Controller
-from zulipterminal.model import ServerConnectionFailure
+from zulipterminal.instrumentation import startup_trace
 from zulipterminal.platform_code import detected_platform
+from zulipterminal.profiler import PROFILE_MODES, PROFILE_THREADS
 from zulipterminal.version import ZT_VERSION
 
 
+if TYPE_CHECKING:
+    from zulipterminal.api_types import ServerSettings
+
+
 class ConfigSource(Enum):
     DEFAULT = "from default config"
     ZULIPRC = "in zuliprc file"
@@ -70,6 +70,9 @@ COLOR_DEPTH_ARGS_TO_DEPTHS: Dict[str, int] = {
     "24bit": 2**24,
 }
 
+# Message content renderers; "legacy" forces the BeautifulSoup-based converter
+VALID_RENDERERS = ("fast", "legacy")
+
 # These should be the defaults without config file or command-line overrides
 DEFAULT_SETTINGS = {
     "theme": "zt_dark",
@@ -78,10 +81,13 @@ DEFAULT_SETTINGS = {
     "footlinks": "enabled",
     "color-depth": "256",
     "maximum-footlinks": "3",
+    "renderer": "fast",
+    "maximum-message-lines": "100",
 }
 assert DEFAULT_SETTINGS["autohide"] in VALID_BOOLEAN_SETTINGS["autohide"]
 assert DEFAULT_SETTINGS["notify"] in VALID_BOOLEAN_SETTINGS["notify"]
 assert DEFAULT_SETTINGS["color-depth"] in COLOR_DEPTH_ARGS_TO_DEPTHS
+assert DEFAULT_SETTINGS["renderer"] in VALID_RENDERERS
 
 
 def in_color(color: str, text: str) -> str:
@@ -199,6 +205,48 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         default=False,
         help="profile runtime",
     )
+    parser.add_argument(
+        "--profile-mode",
+        choices=PROFILE_MODES,
+        default="sampling",
+        help="profiler used for captures started and stopped by hotkey "
+        "(default: sampling)",
+    )
+    parser.add_argument(
+        "--profile-thread",
+        choices=PROFILE_THREADS,
+        default="main",
+        help="thread to profile in captures started by hotkey: the main loop, "
+        "polling for events, or all threads; deterministic profiling supports "
+        "only the main loop (default: main)",
+    )
+
+    parser.add_argument(
+        "--trace-startup",
+        metavar="FILE",
+        help="write a trace of startup up to the first screen being drawn to FILE, "
+        "viewable in eg. Perfetto",
+    )
+
+    event_log_group = parser.add_mutually_exclusive_group()
+    event_log_group.add_argument(
+        "--record-events",
+        metavar="FILE",
+        help="record server data and events to FILE, for replaying later",
+    )
+    event_log_group.add_argument(
+        "--replay-events",
+        metavar="FILE",
+        help="replay server data and events from FILE, without a server",
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        metavar="SPEED",
+        help="multiple of recorded speed to replay events at, "
+        "or 0 for as fast as possible (default: %(default)s)",
+    )
 
     return parser.parse_args(argv)
 
@@ -207,7 +255,7 @@ def styled_input(label: str) -> str:
     return input(in_color("blue", label))
 
 
-def get_login_label(server_properties: ServerSettings) -> str:
+def get_login_label(server_properties: "ServerSettings") -> str:
     require_email_format_usernames = server_properties["require_email_format_usernames"]
     email_auth_enabled = server_properties["email_auth_enabled"]
 
@@ -224,7 +272,9 @@ class NotAZulipOrganizationError(Exception):
     pass
 
 
-def get_server_settings(realm_url: str) -> ServerSettings:
+def get_server_settings(realm_url: str) -> "ServerSettings":
+    import requests
+
     response = requests.get(url=f"{realm_url}/api/v1/server_settings")
     if response.status_code != requests.codes.OK:
         raise NotAZulipOrganizationError(realm_url)
@@ -234,6 +284,8 @@ def get_server_settings(realm_url: str) -> ServerSettings:
 def get_api_key(realm_url: str) -> Optional[Tuple[str, str, str]]:
     from getpass import getpass
 
+    import requests
+
     try:
         server_properties = get_server_settings(realm_url)
     except NotAZulipOrganizationError:
@@ -395,7 +447,8 @@ def main(options: Optional[List[str]] = None) -> None:
     argv = options if options is not None else sys.argv[1:]
     args = parse_args(argv)
 
-    set_encoding("utf-8")
+    if args.trace_startup:
+        startup_trace.start(args.trace_startup)
 
     if args.debug:
         debug_path: Optional[str] = "debug.log"
@@ -411,6 +464,31 @@ def main(options: Optional[List[str]] = None) -> None:
         debug_path = None
         requests_logger.addHandler(logging.NullHandler())
 
+    if args.trace_startup:
+        print(
+            "NOTE: Startup will be traced to " f"{in_color('blue', args.trace_startup)}"
+        )
+    if args.record_events:
+        print(
+            "NOTE: Server data and events will be recorded to "
+            f"{in_color('blue', args.record_events)}"
+        )
+    if args.replay_events:
+        if args.replay_speed < 0:
+            exit_with_error(
+                f"Replay speed should be 0 or greater; you used '{args.replay_speed}'"
+            )
+        print(
+            "NOTE: Server data and events will be replayed from "
+            f"{in_color('blue', args.replay_events)}"
+        )
+
+    if args.profile_mode == "deterministic" and args.profile_thread != "main":
+        exit_with_error(
+            "Deterministic profiling is only possible of the main loop thread; "
+            f"you used '{args.profile_thread}'"
+        )
+
     if args.profile:
         import cProfile
 
@@ -433,7 +511,8 @@ def main(options: Optional[List[str]] = None) -> None:
     print(f"Detected platform: {detected_platform()}")
 
     try:
-        zterm = parse_zuliprc(zuliprc_path)
+        with startup_trace.span("Parse zuliprc"):
+            zterm = parse_zuliprc(zuliprc_path)
 
         ### Validate footlinks settings (not from command line)
         if (
@@ -462,6 +541,15 @@ def main(options: Optional[List[str]] = None) -> None:
         else:
             maximum_footlinks = int(zterm["maximum-footlinks"].value)
 
+        ### Validate maximum-message-lines setting (not from command line)
+        if not zterm["maximum-message-lines"].value.isdigit():
+            exit_with_error(
+                "Configuration Error: "
+                "maximum-message-lines should be 0 (no limit) or greater; "
+                f"you used '{zterm['maximum-message-lines'].value}'"
+            )
+        maximum_message_lines = int(zterm["maximum-message-lines"].value)
+
         ### Load theme override & validate
         if args.theme:
             theme_to_use = SettingData(args.theme, ConfigSource.COMMANDLINE)
@@ -500,7 +588,7 @@ def main(options: Optional[List[str]] = None) -> None:
 
         valid_remaining_settings = dict(
             VALID_BOOLEAN_SETTINGS,
-            **{"color-depth": COLOR_DEPTH_ARGS_TO_DEPTHS},
+            **{"color-depth": COLOR_DEPTH_ARGS_TO_DEPTHS, "renderer": VALID_RENDERERS},
         )
 
         # Validate remaining settings
@@ -518,14 +606,21 @@ def main(options: Optional[List[str]] = None) -> None:
                     helper_text="\n".join(helper_text),
                 )
 
+        # Load urwid palette, which may fail for invalid themes
+        color_depth_str = zterm["color-depth"].value
+        color_depth = COLOR_DEPTH_ARGS_TO_DEPTHS[color_depth_str]
+
+        with startup_trace.span("Load theme"):
+            theme = load_theme(theme_to_use.value, color_depth)
+
         def print_setting(setting: str, data: SettingData, suffix: str = "") -> None:
             print(f"   {setting} '{data.value}' specified {data.source.value}{suffix}.")
 
         ### Let the user know we're starting to load, with what options, from where
         print("Loading with:")
         print_setting("theme", theme_to_use, theme_alias_suffix)
-        complete, incomplete = complete_and_incomplete_themes()
-        if theme_to_use.value in incomplete:
+        if not theme.is_complete:
+            complete, _ = complete_and_incomplete_themes()
             incomplete_theme_text = "   WARNING: Incomplete theme; results may vary!\n"
             if complete:
                 incomplete_theme_text += f"      (you could try: {', '.join(complete)})"
@@ -541,49 +636,63 @@ def main(options: Optional[List[str]] = None) -> None:
             )
         else:
             print_setting("maximum footlinks value", zterm["maximum-footlinks"])
+        print_setting("maximum message lines value", zterm["maximum-message-lines"])
         print_setting("color depth setting", zterm["color-depth"])
         print_setting("notify setting", zterm["notify"])
+        print_setting("renderer setting", zterm["renderer"])
 
         ### Generate data not output to user, but into Controller
-        # Generate urwid palette
-        color_depth_str = zterm["color-depth"].value
-        color_depth = COLOR_DEPTH_ARGS_TO_DEPTHS[color_depth_str]
-
-        theme_data = generate_theme(theme_to_use.value, color_depth)
-
         # Translate valid strings for boolean values into True/False
         boolean_settings: Dict[str, bool] = dict()
         for setting, valid_values in VALID_BOOLEAN_SETTINGS.items():
             boolean_settings[setting] = zterm[setting].value == valid_values[0]
 
-        Controller(
-            config_file=zuliprc_path,
-            maximum_footlinks=maximum_footlinks,
-            theme_name=theme_to_use.value,
-            theme=theme_data,
-            color_depth=color_depth,
-            in_explore_mode=args.explore,
-            **boolean_settings,
-            debug_path=debug_path,
-        ).main()
-    except ServerConnectionFailure as e:
-        # Acts as separator between logs
-        zt_logger.info("\n\n%s\n\n", e)
-        zt_logger.exception(e)
-        exit_with_error(f"\nError connecting to Zulip server: {e}.")
+        # The UI is imported only once it is needed, so that other uses, such as
+        # showing the version or configuration errors, start quickly
+        with startup_trace.span("Import UI"):
+            from urwid import display_common, set_encoding
+
+            from zulipterminal.core import Controller
+            from zulipterminal.model import ServerConnectionFailure
+
+        set_encoding("utf-8")
+
+        try:
+            Controller(
+                config_file=zuliprc_path,
+                maximum_footlinks=maximum_footlinks,
+                maximum_message_lines=maximum_message_lines,
+                theme_name=theme_to_use.value,
+                theme=theme.palette,
+                color_depth=color_depth,
+                renderer=zterm["renderer"].value,
+                in_explore_mode=args.explore,
+                **boolean_settings,
+                debug_path=debug_path,
+                record_events_path=args.record_events,
+                replay_events_path=args.replay_events,
+                replay_speed=args.replay_speed,
+                profile_mode=args.profile_mode,
+                profile_thread=args.profile_thread,
+            ).main()
+        except ServerConnectionFailure as e:
+            # Acts as separator between logs
+            zt_logger.info("\n\n%s\n\n", e)
+            zt_logger.exception(e)
+            exit_with_error(f"\nError connecting to Zulip server: {e}.")
+        except (display_common.AttrSpecError, display_common.ScreenError) as e:
+            # NOTE: Strictly this is not necessarily just a theme error
+            # FIXME: Add test for this - once loading takes place after UI setup
+
+            # Acts as separator between logs
+            zt_logger.info("\n\n%s\n\n", e)
+            zt_logger.exception(e)
+            exit_with_error(f"\nPossible theme error: {e}.")
     except InvalidThemeColorCode as e:
         # Acts as separator between logs
         zt_logger.info("\n\n%s\n\n", e)
         zt_logger.exception(e)
         exit_with_error(f"\n{e}")
-    except (display_common.AttrSpecError, display_common.ScreenError) as e:
-        # NOTE: Strictly this is not necessarily just a theme error
-        # FIXME: Add test for this - once loading takes place after UI setup
-
-        # Acts as separator between logs
-        zt_logger.info("\n\n%s\n\n", e)
-        zt_logger.exception(e)
-        exit_with_error(f"\nPossible theme error: {e}.")
     except Exception as e:
         zt_logger.info("\n\n{e}\n\n")
         zt_logger.exception(e)
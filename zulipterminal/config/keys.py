@@ -46,6 +46,26 @@ KEY_BINDINGS: 'OrderedDict[str, KeyBinding]' = OrderedDict([
         'help_text': 'Show/hide about menu',
         'key_category': 'general',
     }),
+    ('PERFORMANCE_METRICS', {
+        'keys': ['meta p'],
+        'help_text': 'Show/hide performance metrics',
+        'key_category': 'general',
+    }),
+    ('TOGGLE_PROFILER', {
+        'keys': ['meta P'],
+        'help_text': 'Start/stop capturing a profile',
+        'key_category': 'general',
+    }),
+    ('CYCLE_THEME', {
+        'keys': ['meta t'],
+        'help_text': 'Switch to the next theme',
+        'key_category': 'general',
+    }),
+    ('CYCLE_COLOR_DEPTH', {
+        'keys': ['meta c'],
+        'help_text': 'Switch to the next color depth',
+        'key_category': 'general',
+    }),
     ('GO_BACK', {
         'keys': ['esc'],
         'help_text': 'Go Back',
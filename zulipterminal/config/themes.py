@@ -2,12 +2,29 @@
 Styles and their colour mappings in each theme, with helper functions
 """
 
-from typing import Any, Dict, List, Optional, Tuple, Union
-
+import json
+import os
+import tempfile
+from importlib import import_module
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+
+import pygments
 from pygments.token import STANDARD_TYPES
 
 from zulipterminal.config.color import term16
-from zulipterminal.themes import gruvbox_dark, gruvbox_light, zt_blue, zt_dark, zt_light
+from zulipterminal.version import ZT_VERSION
 
 
 StyleSpec = Union[
@@ -89,15 +106,37 @@ REQUIRED_META = {
 }
 # fmt: on
 
-# This is the main list of themes
-THEMES: Dict[str, Any] = {
-    "gruvbox_dark": gruvbox_dark,
-    "gruvbox_light": gruvbox_light,
-    "zt_dark": zt_dark,
-    "zt_light": zt_light,
-    "zt_blue": zt_blue,
+# This is the main list of themes, with the module defining each
+THEME_MODULES = {
+    "gruvbox_dark": "zulipterminal.themes.gruvbox_dark",
+    "gruvbox_light": "zulipterminal.themes.gruvbox_light",
+    "zt_dark": "zulipterminal.themes.zt_dark",
+    "zt_light": "zulipterminal.themes.zt_light",
+    "zt_blue": "zulipterminal.themes.zt_blue",
 }
 
+
+class _Themes(Mapping[str, Any]):
+    """
+    Lookup from theme name to its module, importing each only when first used,
+    since they import pygments styles which are slow to load
+    """
+
+    def __getitem__(self, theme_name: str) -> Any:
+        return import_module(THEME_MODULES[theme_name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(THEME_MODULES)
+
+    def __len__(self) -> int:
+        return len(THEME_MODULES)
+
+
+THEMES: Mapping[str, Any] = _Themes()
+
+# Color depths for which themes can be generated, in increasing order
+COLOR_DEPTHS = (1, 16, 256, 2**24)
+
 # These are older aliases to some of the above, for compatibility
 # NOTE: Do not add to this section, and only modify if a theme name changes
 THEME_ALIASES = {
@@ -129,10 +168,29 @@ valid_16_color_codes = [
 ]
 
 
+# Compiled themes are cached for later runs, until this package or pygments is
+# updated, or the source of any theme (or of compiling themes) changes
+THEME_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"))
+    / "zulip-terminal"
+    / "themes"
+)
+_THEME_SOURCES = [
+    *sorted((Path(__file__).parent.parent / "themes").glob("*.py")),
+    Path(__file__).parent / "color.py",
+    Path(__file__),
+]
+
+
 class InvalidThemeColorCode(Exception):
     pass
 
 
+class CompiledTheme(NamedTuple):
+    palette: ThemeSpec
+    is_complete: bool
+
+
 def all_themes() -> List[str]:
     return list(THEMES.keys())
 
@@ -141,19 +199,65 @@ def aliased_themes() -> Dict[str, str]:
     return dict(THEME_ALIASES)
 
 
+def is_complete_theme(theme_name: str) -> bool:
+    theme = THEMES[theme_name]
+    return (
+        set(theme.STYLES) == set(REQUIRED_STYLES)
+        and set(theme.META) == set(REQUIRED_META)
+        and all(
+            set(conf) == set(REQUIRED_META.get(meta, {}))
+            for meta, conf in theme.META.items()
+        )
+    )
+
+
 def complete_and_incomplete_themes() -> Tuple[List[str], List[str]]:
-    complete = {
-        name
-        for name, theme in THEMES.items()
-        if set(theme.STYLES) == set(REQUIRED_STYLES)
-        if set(theme.META) == set(REQUIRED_META)
-        for meta, conf in theme.META.items()
-        if set(conf) == set(REQUIRED_META.get(meta, {}))
-    }
+    complete = {name for name in THEMES if is_complete_theme(name)}
     incomplete = set(THEMES) - complete
     return sorted(complete), sorted(incomplete)
 
 
+def load_theme(theme_name: str, color_depth: int) -> CompiledTheme:
+    """
+    Returns the theme as generated by generate_theme, with its completeness,
+    loaded from the cache if the theme was compiled in an earlier run
+    """
+    cache_path = THEME_CACHE_DIR / f"{theme_name}.{color_depth}.{ZT_VERSION}.json"
+    sources = _theme_sources_fingerprint()
+    try:
+        with open(cache_path) as cache_file:
+            cached = json.load(cache_file)
+        if cached["sources"] == sources:
+            palette = [tuple(style) for style in cached["palette"]]
+            return CompiledTheme(cast(ThemeSpec, palette), cached["is_complete"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    theme = CompiledTheme(
+        palette=generate_theme(theme_name, color_depth),
+        is_complete=is_complete_theme(theme_name),
+    )
+    try:
+        THEME_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a separate file first, so other runs never read a partial file
+        with tempfile.NamedTemporaryFile(
+            "w", dir=THEME_CACHE_DIR, suffix=".tmp", delete=False
+        ) as new_cache_file:
+            json.dump({"sources": sources, **theme._asdict()}, new_cache_file)
+        os.replace(new_cache_file.name, cache_path)
+    except OSError:
+        pass  # Caching is only an optimization
+    return theme
+
+
+def _theme_sources_fingerprint() -> List[Any]:
+    sources: List[Any] = [pygments.__version__]
+    for source in _THEME_SOURCES:
+        source_stat = source.stat()
+        sources.append([source.name, source_stat.st_mtime_ns, source_stat.st_size])
+    return sources
+
+
 def generate_theme(theme_name: str, color_depth: int) -> ThemeSpec:
     theme_styles = THEMES[theme_name].STYLES
     validate_colors(theme_name, color_depth)
@@ -223,6 +327,36 @@ def parse_themefile(
     return urwid_theme
 
 
+# Each pygments token with a CSS class maps to the token it inherits styles from,
+# if any. Eg: `String` (class 's') for `String.Double` (class 's2')
+_PYGMENTS_TOKENS_BY_CSS_CLASS = {
+    css_class: token for token, css_class in reversed(STANDARD_TYPES.items())
+}
+PYGMENTS_PARENT_TOKENS = {
+    token: _PYGMENTS_TOKENS_BY_CSS_CLASS.get(css_class[0])
+    for token, css_class in STANDARD_TYPES.items()
+    if css_class
+}
+
+
+class _PygmentsAttributes(Dict[str, str]):
+    """
+    Lookup from the CSS class of a highlighted code span to its urwid attribute
+    (as added by add_pygments_style), precomputed for all standard classes
+
+    Other classes, eg. from a newer pygments on the server, are added on demand
+    """
+
+    def __missing__(self, css_class: str) -> str:
+        self[css_class] = f"pygments:{css_class}"
+        return self[css_class]
+
+
+PYGMENTS_ATTRIBUTES = _PygmentsAttributes(
+    (css_class, f"pygments:{css_class}") for css_class in STANDARD_TYPES.values()
+)
+
+
 def add_pygments_style(theme_meta: Dict[str, Any], urwid_theme: ThemeSpec) -> None:
     """
     This function adds pygments styles for use in syntax
@@ -252,19 +386,12 @@ def add_pygments_style(theme_meta: Dict[str, Any], urwid_theme: ThemeSpec) -> No
 
         # Inherit parent pygments style if not defined.
         # Eg: Use `String` if `String.Double` is not present.
-        if pygments_styles[token] == "":
-            try:
-                t = [k for k, v in STANDARD_TYPES.items() if v == css_class[0]]
-                pygments_styles[token] = pygments_styles[t[0]]
-            except IndexError:
-                pass
-
-        if term16_styles[token] == "":
-            try:
-                t = [k for k, v in STANDARD_TYPES.items() if v == css_class[0]]
-                term16_styles[token] = term16_styles[t[0]]
-            except IndexError:
-                pass
+        parent_token = PYGMENTS_PARENT_TOKENS.get(token)
+        if parent_token is not None:
+            if pygments_styles[token] == "":
+                pygments_styles[token] = pygments_styles[parent_token]
+            if term16_styles[token] == "":
+                term16_styles[token] = term16_styles[parent_token]
 
         new_style = (
             f"pygments:{css_class}",
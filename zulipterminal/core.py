@@ -10,9 +10,10 @@ import time
 import webbrowser
 from collections import OrderedDict
 from functools import partial
+from pathlib import Path
 from platform import platform
 from types import TracebackType
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, Union
 
 import pyperclip
 import urwid
@@ -20,15 +21,27 @@ import zulip
 from typing_extensions import Literal
 
 from zulipterminal.api_types import Composition, Message
-from zulipterminal.config.themes import ThemeSpec
+from zulipterminal.config.themes import (
+    COLOR_DEPTHS,
+    InvalidThemeColorCode,
+    ThemeSpec,
+    all_themes,
+    load_theme,
+)
 from zulipterminal.config.ui_sizes import (
     MAX_LINEAR_SCALING_WIDTH,
     MIN_SUPPORTED_POPUP_WIDTH,
 )
-from zulipterminal.helper import asynch, suppress_output
+from zulipterminal.event_log import RecordingClient, ReplayClient
+from zulipterminal.helper import NEWEST_MESSAGE_ID, asynch, suppress_output
+from zulipterminal.instrumentation import metrics, startup_trace
 from zulipterminal.model import Model
 from zulipterminal.platform_code import PLATFORM
+from zulipterminal.profiler import RuntimeProfiler
+from zulipterminal.scheduler import ScheduledClient
+from zulipterminal.session import saved_session_path
 from zulipterminal.ui import Screen, View
+from zulipterminal.ui_tools.buttons import stream_color_styles
 from zulipterminal.ui_tools.utils import create_msg_box_list
 from zulipterminal.ui_tools.views import (
     AboutView,
@@ -41,6 +54,7 @@ from zulipterminal.ui_tools.views import (
     MarkdownHelpView,
     MsgInfoView,
     NoticeView,
+    PerformanceMetricsView,
     PopUpConfirmationView,
     StreamInfoView,
     StreamMembersView,
@@ -51,6 +65,13 @@ from zulipterminal.version import ZT_VERSION
 
 ExceptionInfo = Tuple[Type[BaseException], BaseException, TracebackType]
 
+# Seconds between logging performance metrics, when debugging
+METRICS_LOG_INTERVAL = 300
+
+# Messages already downloaded for a narrow, which are shown on switching to it
+# without fetching more (unless there are no older messages)
+NARROW_CONTEXT_MESSAGES = 10
+
 
 class Controller:
     """
@@ -63,51 +84,122 @@ class Controller:
         *,
         config_file: str,
         maximum_footlinks: int,
+        maximum_message_lines: int,
         theme_name: str,
         theme: ThemeSpec,
         color_depth: int,
+        renderer: str,
         debug_path: Optional[str],
         in_explore_mode: bool,
         autohide: bool,
         notify: bool,
+        record_events_path: Optional[str],
+        replay_events_path: Optional[str],
+        replay_speed: float,
+        profile_mode: str,
+        profile_thread: str,
     ) -> None:
         self.theme_name = theme_name
         self.theme = theme
         self.color_depth = color_depth
+        self.renderer = renderer
         self.in_explore_mode = in_explore_mode
         self.autohide = autohide
         self.notify_enabled = notify
         self.maximum_footlinks = maximum_footlinks
+        self.maximum_message_lines = maximum_message_lines
 
         self.debug_path = debug_path
+        self.profiler = RuntimeProfiler(mode=profile_mode, thread=profile_thread)
 
         self._editor: Optional[Any] = None
 
         self.active_conversation_info: Dict[str, Any] = {}
         self.is_typing_notification_in_progress = False
+        self.is_loading_narrow = False
 
         self.show_loading()
-        client_identifier = f"ZulipTerminal/{ZT_VERSION} {platform()}"
-        self.client = zulip.Client(config_file=config_file, client=client_identifier)
-        self.model = Model(self)
-        self.view = View(self)
+        self.client: Union[zulip.Client, RecordingClient, ReplayClient, ScheduledClient]
+        # Sessions are not resumed when recording or replaying
+        session_path: Optional[Path] = None
+        with startup_trace.span("Create client"):
+            if replay_events_path is not None:
+                self.client = ReplayClient(replay_events_path, speed=replay_speed)
+            else:
+                client_identifier = f"ZulipTerminal/{ZT_VERSION} {platform()}"
+                self.client = zulip.Client(
+                    config_file=config_file, client=client_identifier
+                )
+                if record_events_path is not None:
+                    self.client = RecordingClient(self.client, record_events_path)
+                else:
+                    session_path = saved_session_path(
+                        self.client.base_url, self.client.email
+                    )
+                self.client = ScheduledClient(self.client)
+        with startup_trace.span("Create model"):
+            self.model = Model(self, session_path=session_path)
+        with startup_trace.span("Create view"):
+            self.view = View(self)
         # Start polling for events after view is rendered.
         self.model.poll_for_events()
+        if isinstance(self.client, ReplayClient):
+            self._report_when_replay_finished(self.client)
+
+        with startup_trace.span("Set up main loop"):
+            screen = Screen()
+            screen.set_terminal_properties(colors=self.color_depth)
+            self.loop = urwid.MainLoop(self.view, self.theme, screen=screen)
 
-        screen = Screen()
-        screen.set_terminal_properties(colors=self.color_depth)
-        self.loop = urwid.MainLoop(self.view, self.theme, screen=screen)
+            # urwid pipe for concurrent screen update handling
+            self._update_pipe = self.loop.watch_pipe(self._draw_screen)
 
-        # urwid pipe for concurrent screen update handling
-        self._update_pipe = self.loop.watch_pipe(self._draw_screen)
+            # data and urwid pipe for inter-thread exception handling
+            self._exception_info: Optional[ExceptionInfo] = None
+            self._critical_exception = False
+            self._exception_pipe = self.loop.watch_pipe(self._raise_exception)
 
-        # data and urwid pipe for inter-thread exception handling
-        self._exception_info: Optional[ExceptionInfo] = None
-        self._critical_exception = False
-        self._exception_pipe = self.loop.watch_pipe(self._raise_exception)
+        if self.debug_path is not None:
+            self.loop.set_alarm_in(METRICS_LOG_INTERVAL, self._log_performance_metrics)
+        if startup_trace.enabled:
+            self.loop.set_alarm_in(0, self._trace_first_draw)
 
         # Register new ^C handler
         signal.signal(signal.SIGINT, self.exit_handler)
+        # Also exit cleanly if the terminal is closed
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.exit_handler)
+
+    def _trace_first_draw(self, *args: Any) -> None:
+        # The loop is started, and the screen is drawn when it is next idle
+        self._first_draw_start = time.perf_counter()
+        self._first_draw_idle_handle = self.loop.event_loop.enter_idle(
+            self._finish_startup_trace
+        )
+
+    def _finish_startup_trace(self) -> None:
+        startup_trace.record(
+            "Draw first screen", self._first_draw_start, time.perf_counter()
+        )
+        startup_trace.finish()
+        # Idle callbacks cannot be removed while they are being called
+        self.loop.set_alarm_in(
+            0,
+            lambda *_: self.loop.event_loop.remove_enter_idle(
+                self._first_draw_idle_handle
+            ),
+        )
+
+    @asynch
+    def _report_when_replay_finished(self, client: ReplayClient) -> None:
+        client.finished.wait()
+        self.report_success(
+            [
+                f"Replayed {client.event_count} events "
+                f"in {client.duration:.2f} seconds"
+            ],
+            duration=10,
+        )
 
     def raise_exception_in_main_thread(
         self, exc_info: ExceptionInfo, *, critical: bool
@@ -191,6 +283,7 @@ class Controller:
         # Write something to update pipe to trigger draw_screen
         os.write(self._update_pipe, b"1")
 
+    @metrics.timed("render:draw_screen")
     def _draw_screen(self, *args: Any, **kwargs: Any) -> Literal[True]:
         self.loop.draw_screen()
         return True  # Always retain pipe
@@ -326,10 +419,105 @@ class Controller:
                 notify_enabled=self.notify_enabled,
                 autohide_enabled=self.autohide,
                 maximum_footlinks=self.maximum_footlinks,
+                maximum_message_lines=self.maximum_message_lines,
+                renderer=self.renderer,
+                reconnect_count=self.model.reconnect_backoff.reconnect_count,
+                downtime=self.model.reconnect_backoff.downtime,
             ),
             "area:help",
         )
 
+    def show_performance_metrics(self) -> None:
+        self.show_pop_up(
+            PerformanceMetricsView(
+                self, "Performance Metrics (times in ms)", metrics.summary()
+            ),
+            "area:help",
+        )
+
+    def toggle_profiler(self) -> None:
+        if not self.profiler.is_running:
+            self.profiler.start()
+            self.report_warning(
+                [
+                    f"Started {self.profiler.mode} profiling of "
+                    f"{self.profiler.thread} thread(s); repeat the hotkey to stop"
+                ]
+            )
+            return
+        profile_path = self.profiler.stop()
+        self.report_success([f"Profile saved to {profile_path}"], duration=10)
+
+    def cycle_theme(self) -> None:
+        themes = all_themes()
+        current = themes.index(self.theme_name)
+        # Skip themes which cannot be applied, so that later ones are reachable
+        for offset in range(1, len(themes)):
+            next_theme = themes[(current + offset) % len(themes)]
+            if self.switch_theme(next_theme, self.color_depth):
+                return
+
+    def cycle_color_depth(self) -> None:
+        current = COLOR_DEPTHS.index(self.color_depth)
+        for offset in range(1, len(COLOR_DEPTHS)):
+            next_depth = COLOR_DEPTHS[(current + offset) % len(COLOR_DEPTHS)]
+            if self.switch_theme(self.theme_name, next_depth):
+                return
+
+    def switch_theme(self, theme_name: str, color_depth: int) -> bool:
+        """
+        Applies a theme at a color depth to the running UI, without restarting,
+        returning whether this was possible
+
+        Only the palette is replaced, since widgets refer to styles by name.
+        """
+        invalid_theme_text = (
+            f"Theme '{theme_name}' cannot be shown at color depth {color_depth}"
+        )
+        try:
+            theme = load_theme(theme_name, color_depth)
+        except InvalidThemeColorCode:
+            self.report_error([invalid_theme_text])
+            return False
+
+        # Styles for stream colors are added as streams are shown, so carry them over
+        palette = theme.palette
+        stream_colors = {
+            style[0]
+            for style in self.theme
+            if style[0] is not None and style[0].startswith("#")
+        }
+        for color in sorted(stream_colors):
+            palette.extend(stream_color_styles(color, palette))
+
+        screen = self.loop.screen
+        try:
+            screen.set_terminal_properties(colors=color_depth)
+            screen.register_palette(palette)
+        except urwid.display_common.AttrSpecError:
+            screen.set_terminal_properties(colors=self.color_depth)
+            screen.register_palette(self.theme)
+            self.report_error([invalid_theme_text])
+            return False
+        screen.clear()  # Redraw everything, not only what changed
+
+        self.theme_name = theme_name
+        self.theme = palette
+        self.view.palette = palette
+        self.color_depth = color_depth
+        self.report_success(
+            [f"Switched to theme '{theme_name}' at color depth {color_depth}"]
+        )
+        return True
+
+    def _log_performance_metrics(self, *args: Any) -> None:
+        assert self.debug_path is not None
+        with open(self.debug_path, "a") as debug_log:
+            debug_log.write(
+                f"Performance metrics at {time.ctime()}:\n{metrics.report()}\n\n"
+            )
+        self.loop.set_alarm_in(METRICS_LOG_INTERVAL, self._log_performance_metrics)
+
     def show_user_info(self, user_id: int) -> None:
         self.show_pop_up(
             UserInfoView(self, user_id, "User Information (up/down scrolls)"),
@@ -497,10 +685,29 @@ class Controller:
 
     def search_messages(self, text: str) -> None:
         # Search for a text in messages
-        self.model.index["search"].clear()
         self.model.set_search_narrow(text)
 
+        # Show results found locally, until refined by those of the server
+        self.model.index["search"] = self.model.get_local_search_results()
+        shown_ids = self._show_search_results()
+        self.is_loading_narrow = True
+        self.view.set_footer_text(["Searching..."], "task:warning")
+        self._load_search_results(self.model.narrow_generation, shown_ids)
+
+    @asynch
+    def _load_search_results(self, narrow_generation: int, shown_ids: Set[int]) -> None:
         self.model.get_messages(num_after=0, num_before=30, anchor=10000000000)
+
+        # Results fetched for a previous narrow are not shown
+        if narrow_generation == self.model.narrow_generation:
+            self.model.save_search_results()
+            if self.model.get_message_ids_in_current_narrow() != shown_ids:
+                self._show_search_results()
+            else:
+                self._stop_loading_narrow()
+            self.update_screen()
+
+    def _show_search_results(self) -> Set[int]:
         msg_id_list = self.model.get_message_ids_in_current_narrow()
 
         w_list = create_msg_box_list(self.model, msg_id_list)
@@ -509,6 +716,8 @@ class Controller:
         focus_position = 0
         if 0 <= focus_position < len(w_list):
             self.view.message_view.set_focus(focus_position)
+        self._stop_loading_narrow()
+        return msg_id_list
 
     def save_draft_confirmation_popup(self, draft: Composition) -> None:
         question = urwid.Text(
@@ -560,15 +769,60 @@ class Controller:
         if already_narrowed and anchor is None:
             return
 
-        msg_id_list = self.model.get_message_ids_in_current_narrow()
+        msg_id_list = self.model.get_message_ids_in_current_narrow(anchor)
+        contiguous_range = self.model.get_contiguous_range_in_current_narrow(anchor)
 
-        # If no messages are found in the current narrow
-        # OR, given anchor is not present in msg_id_list
+        # If given anchor is not present in msg_id_list
+        # OR, too few messages are found in the current narrow, when there are more
         # then, get more messages.
-        if len(msg_id_list) == 0 or (anchor is not None and anchor not in msg_id_list):
-            self.model.get_messages(num_before=30, num_after=10, anchor=anchor)
-            msg_id_list = self.model.get_message_ids_in_current_narrow()
+        fetch_anchor: Optional[int]
+        if anchor is not None and anchor not in msg_id_list:
+            fetch_anchor, num_after = anchor, 10
+        elif len(msg_id_list) < NARROW_CONTEXT_MESSAGES and (
+            contiguous_range is None or contiguous_range[0] != 0
+        ):
+            if (
+                contiguous_range is not None
+                and contiguous_range[1] == NEWEST_MESSAGE_ID
+            ):
+                # Only older messages are missing, before the known ones
+                fetch_anchor, num_after = contiguous_range[0], 0
+            else:
+                fetch_anchor, num_after = anchor, 10
+        else:
+            self._show_narrow(anchor)
+            return
+
+        # Show the narrow as loading until its messages are fetched, rather than
+        # waiting, so that narrow may be switched again meanwhile
+        self.is_loading_narrow = True
+        self.view.message_view.log.clear()
+        self.view.set_footer_text(["Loading messages..."], "task:warning")
+        self._load_narrow(
+            anchor,
+            self.model.narrow_generation,
+            fetch_anchor=fetch_anchor,
+            num_after=num_after,
+        )
 
+    @asynch
+    def _load_narrow(
+        self,
+        anchor: Optional[int],
+        narrow_generation: int,
+        *,
+        fetch_anchor: Optional[int],
+        num_after: int,
+    ) -> None:
+        self.model.get_messages(num_before=30, num_after=num_after, anchor=fetch_anchor)
+
+        # Messages fetched for a previous narrow are only indexed, not shown
+        if narrow_generation == self.model.narrow_generation:
+            self._show_narrow(anchor)
+            self.update_screen()
+
+    def _show_narrow(self, anchor: Optional[int]) -> None:
+        msg_id_list = self.model.get_message_ids_in_current_narrow(anchor)
         w_list = create_msg_box_list(self.model, msg_id_list, focus_msg_id=anchor)
 
         focus_position = self.model.get_focus_in_current_narrow()
@@ -581,6 +835,12 @@ class Controller:
             self.view.message_view.log.extend(w_list, focus_position)
         else:
             self.view.message_view.log.extend(w_list)
+        self._stop_loading_narrow()
+
+    def _stop_loading_narrow(self) -> None:
+        if self.is_loading_narrow:
+            self.is_loading_narrow = False
+            self.view.set_footer_text()
 
     def narrow_to_stream(
         self, *, stream_name: str, contextual_message_id: Optional[int] = None
@@ -634,7 +894,9 @@ class Controller:
         self.client.deregister(queue_id, 1.0)
 
     def exit_handler(self, signum: int, frame: Any) -> None:
-        self.deregister_client()
+        # The event queue is kept for resuming, if the session can be saved
+        if not self.model.save_session():
+            self.deregister_client()
         sys.exit(0)
 
     def _raise_exception(self, *args: Any, **kwargs: Any) -> Literal[True]:
@@ -682,6 +944,8 @@ class Controller:
                 "quit": "undefined",  # Disable ^\, ^4
             }
             old_signal_list = self.loop.screen.tty_signal_keys(**disabled_keys)
+            if isinstance(self.client, ScheduledClient):
+                self.client.wait_in_main_thread = False
             self.loop.run()
 
         except Exception:
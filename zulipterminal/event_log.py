@@ -0,0 +1,153 @@
+"""
+Records server responses to a file, and replays them in place of a server
+"""
+
+import inspect
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import zulip
+
+
+# Calls whose responses are recorded, sufficient to replay startup and events
+RECORDED_CALLS = ("register", "get_messages", "get_events")
+
+# Seconds to wait before returning no events, once all are replayed
+REPLAY_IDLE_TIMEOUT = 1
+
+
+class RecordingClient:
+    """
+    Wraps a client, recording the responses needed for replaying the session,
+    with the time of each since the recording started, as lines of JSON
+    """
+
+    def __init__(self, client: zulip.Client, path: str) -> None:
+        self._client = client
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._path = path
+        with open(path, "w"):
+            pass  # Start a new recording
+        self._write({"base_url": client.base_url, "recorded_at": time.time()})
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if name not in RECORDED_CALLS:
+            return attribute
+
+        def recorded_call(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            response = attribute(*args, **kwargs)
+            request = inspect.signature(attribute).bind(*args, **kwargs).arguments
+            self._write(
+                {
+                    "time": time.monotonic() - self._start,
+                    "call": name,
+                    "request": request,
+                    "response": response,
+                }
+            )
+            return response
+
+        return recorded_call
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock, open(self._path, "a") as log_file:
+            log_file.write(json.dumps(entry) + "\n")
+
+
+class ReplayClient:
+    """
+    Stands in for a client, replaying responses recorded by RecordingClient
+
+    Events are returned with the same intervals as when recorded, scaled by
+    `speed`, or as fast as possible if this is zero. Messages are returned only
+    for requests that were recorded, and other calls fail with an error.
+    """
+
+    def __init__(self, path: str, *, speed: float) -> None:
+        with open(path) as log_file:
+            header, *entries = (json.loads(line) for line in log_file)
+        self.base_url = header["base_url"]
+        self.speed = speed
+
+        self._registrations = [e for e in entries if e["call"] == "register"]
+        self._events = [e for e in entries if e["call"] == "get_events"]
+        self._messages = [e for e in entries if e["call"] == "get_messages"]
+        if not self._registrations:
+            raise ValueError(f"No registration recorded in {path}")
+
+        self._events_replayed = 0
+        self._replay_start: Optional[Tuple[float, float]] = None  # (replay, recording)
+        # Set once all events are replayed, with the duration of replaying them
+        self.finished = threading.Event()
+        self.duration = 0.0
+        self.event_count = sum(
+            len(entry["response"].get("events", [])) for entry in self._events
+        )
+
+    def __getattr__(self, name: str) -> Callable[..., Dict[str, Any]]:
+        def unrecorded_call(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            return {"result": "error", "msg": "Not available when replaying"}
+
+        return unrecorded_call
+
+    def register(self, **request: Any) -> Dict[str, Any]:
+        # Registering again (eg. after an error) uses the next one recorded
+        replay_time = self._replay_time()
+        registrations = [
+            entry for entry in self._registrations if entry["time"] >= replay_time
+        ]
+        return (registrations or self._registrations[-1:])[0]["response"]
+
+    def get_messages(self, message_filters: Dict[str, Any]) -> Dict[str, Any]:
+        for entry in self._messages:
+            if entry["request"]["message_filters"] == message_filters:
+                return entry["response"]
+        return {
+            "result": "success",
+            "msg": "",
+            "messages": [],
+            "anchor": 0,
+            "found_anchor": False,
+            "found_oldest": True,
+            "found_newest": True,
+        }
+
+    def get_events(self, **request: Any) -> Dict[str, Any]:
+        if self._events_replayed == len(self._events):
+            if not self.finished.is_set():
+                if self._replay_start is not None:
+                    self.duration = time.monotonic() - self._replay_start[0]
+                self.finished.set()
+            time.sleep(REPLAY_IDLE_TIMEOUT)
+            return {"result": "success", "msg": "", "events": []}
+
+        entry = self._events[self._events_replayed]
+        if self._replay_start is None:
+            self._replay_start = (time.monotonic(), entry["time"])
+        elif self.speed:
+            replay_start, recording_start = self._replay_start
+            due = replay_start + (entry["time"] - recording_start) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._events_replayed += 1
+        return entry["response"]
+
+    def update_presence(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        presences = self._registrations[0]["response"].get("presences", {})
+        return {"result": "success", "msg": "", "presences": presences}
+
+    def get_stream_topics(self, stream_id: int) -> Dict[str, Any]:
+        return {"result": "success", "msg": "", "topics": []}
+
+    def _replay_time(self) -> float:
+        """
+        Returns the recording time which the replay has reached
+        """
+        if self._events_replayed == 0:
+            return self._registrations[0]["time"]
+        return self._events[self._events_replayed - 1]["time"]
@@ -8,8 +8,9 @@ import time
 from collections import OrderedDict, defaultdict
 from contextlib import contextmanager
 from functools import partial, wraps
+from html import unescape
 from itertools import chain, combinations
-from re import ASCII, MULTILINE, findall, match
+from re import ASCII, MULTILINE, findall, match, sub
 from tempfile import NamedTemporaryFile
 from threading import Thread
 from typing import (
@@ -21,6 +22,7 @@ from typing import (
     Iterable,
     Iterator,
     List,
+    NamedTuple,
     Optional,
     Set,
     Tuple,
@@ -40,6 +42,7 @@ from zulipterminal.config.regexes import (
     REGEX_QUOTED_FENCE_LENGTH,
 )
 from zulipterminal.config.ui_mappings import StreamAccessType
+from zulipterminal.instrumentation import metrics
 from zulipterminal.platform_code import (
     PLATFORM,
     normalized_file_path,
@@ -78,8 +81,55 @@ class TidiedUserInfo(TypedDict):
     bot_owner_name: str
 
 
+# Identifies a narrow within the Index, as a prefix of the keys of the narrows
+# it contains, eg. () for all messages, ('stream', stream_id) for a stream and
+# ('stream', stream_id, topic_name) for one of its topics
+NarrowKey = Tuple[Any, ...]
+
+# Message id above any other, as used by the server for the newest message
+NEWEST_MESSAGE_ID = 10000000000000000
+
+
+class Narrow(NamedTuple):
+    """
+    Narrow compiled from its form in requests (eg. [["stream", "foo"]]), once
+    per change of narrow, into the key of its messages in the Index
+    """
+
+    key: NarrowKey = ()
+    search: Optional[str] = None  # query, if searching within the narrow
+
+    def contains_message(self, message: Message) -> bool:
+        """
+        Returns whether a message belongs to the narrow
+        FIXME?: stars and searches are not handled right now
+        """
+        key = self.key
+        if self.search is not None:
+            return False
+        elif not key:
+            return True
+        elif key[0] == "stream":
+            return (
+                message["type"] == "stream"
+                and message["stream_id"] == key[1]
+                and (len(key) == 2 or message["subject"] == key[2])
+            )
+        elif key[0] == "private":
+            return message["type"] == "private" and (
+                len(key) == 1
+                or key[1]
+                == frozenset(
+                    recipient["id"] for recipient in message["display_recipient"]
+                )
+            )
+        elif key[0] == "mentioned":
+            return bool({"mentioned", "wildcard_mentioned"} & set(message["flags"]))
+        return False
+
+
 class Index(TypedDict):
-    pointer: Dict[str, Union[int, Set[None]]]  # narrow_str, message_id
+    pointer: Dict[Narrow, Union[int, Set[None]]]  # narrow, message_id
     # Various sets of downloaded message ids (all, starred, ...)
     all_msg_ids: Set[int]
     starred_msg_ids: Set[int]
@@ -92,8 +142,13 @@ class Index(TypedDict):
     edited_messages: Set[int]  # {message_id, ...}
     topics: Dict[int, List[str]]  # {topic names, ...}
     search: Set[int]  # {message_id, ...}
+    # Ids of downloaded messages containing each word, for local searches
+    search_terms: Dict[str, Set[int]]  # {word: {message_id, ...}}
     # Downloaded message data by message id
     messages: Dict[int, Message]
+    # Ranges of message ids in which all messages of a narrow are downloaded,
+    # in order and without overlaps
+    contiguous_ranges: Dict[NarrowKey, List[Tuple[int, int]]]  # first_id, last_id
 
 
 initial_index = Index(
@@ -108,8 +163,10 @@ initial_index = Index(
     edited_messages=set(),
     topics=defaultdict(list),
     search=set(),
+    search_terms=defaultdict(set),
     # mypy bug: https://github.com/python/mypy/issues/7217
     messages=defaultdict(lambda: Message()),
+    contiguous_ranges=dict(),
 )
 
 
@@ -138,7 +195,7 @@ def asynch(func: Callable[ParamT, None]) -> Callable[ParamT, None]:
         if os.environ.get("PYTEST_CURRENT_TEST"):
             return func(*args, **kwargs)
 
-        thread = Thread(target=func, args=args, kwargs=kwargs)
+        thread = Thread(target=func, name=func.__name__, args=args, kwargs=kwargs)
         thread.daemon = True
         thread.start()
 
@@ -271,13 +328,14 @@ def set_count(id_list: List[int], controller: Any, new_count: int) -> None:
     controller.update_screen()
 
 
+@metrics.timed("fetch:index_messages")
 def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
     """
     STRUCTURE OF INDEX
     {
         'pointer': {
-            '[]': 30  # str(ZulipModel.narrow)
-            '[["stream", "verona"]]': 32,
+            Narrow(): 30,  # ZulipModel.compiled_narrow
+            Narrow(('stream', 123)): 32,
             ...
         }
         'topic_msg_ids': {
@@ -344,6 +402,22 @@ def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
             23423,
             ...
         },
+        'search_terms': {
+            'hello': {  # word in content or topic, in lower case
+                13242,
+                23423,
+                ...
+            },
+            ...
+        },
+        'contiguous_ranges': {
+            (): [(0, 10000000000000000)],  # narrow key: [(first_id, last_id)]
+            ('stream', 123): [
+                (14231, 23423),
+                (36435, 53434),
+            ],
+            ...
+        },
         'messages': {
             # all the messages mapped to their id
             # for easy retrieval of message from id
@@ -396,49 +470,44 @@ def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
         },
     }
     """
-    narrow = model.narrow
     for msg in messages:
         if "edit_history" in msg:
             index["edited_messages"].add(msg["id"])
 
+        previous_msg = index["messages"].get(msg["id"])
         index["messages"][msg["id"]] = msg
-        if not narrow:
-            index["all_msg_ids"].add(msg["id"])
+        if not previous_msg:
+            add_search_terms(index, msg)
+        elif (previous_msg["content"], previous_msg["subject"]) != (
+            msg["content"],
+            msg["subject"],
+        ):
+            remove_search_terms(index, previous_msg)
+            add_search_terms(index, msg)
 
-        elif model.is_search_narrow():
+        if model.is_search_narrow():
             index["search"].add(msg["id"])
-            continue
 
-        if len(narrow) == 1:
-            if narrow[0][1] == "starred" and "starred" in msg["flags"]:
-                index["starred_msg_ids"].add(msg["id"])
+        # Index in every narrow containing the message, so that these are not
+        # fetched again on switching narrow; which of these are shown in each
+        # narrow depends upon contiguous_ranges
+        index["all_msg_ids"].add(msg["id"])
 
-            msg_has_mention = {"mentioned", "wildcard_mentioned"} & set(msg["flags"])
-            if narrow[0][1] == "mentioned" and msg_has_mention:
-                index["mentioned_msg_ids"].add(msg["id"])
+        if "starred" in msg["flags"]:
+            index["starred_msg_ids"].add(msg["id"])
 
-            if msg["type"] == "private":
-                index["private_msg_ids"].add(msg["id"])
-                recipients = frozenset(
-                    {recipient["id"] for recipient in msg["display_recipient"]}
-                )
+        if {"mentioned", "wildcard_mentioned"} & set(msg["flags"]):
+            index["mentioned_msg_ids"].add(msg["id"])
 
-                if narrow[0][0] == "pm_with":
-                    narrow_emails = [
-                        model.user_dict[email]["user_id"]
-                        for email in narrow[0][1].split(", ")
-                    ] + [model.user_id]
-                    if recipients == frozenset(narrow_emails):
-                        index["private_msg_ids_by_user_ids"][recipients].add(msg["id"])
-
-            if msg["type"] == "stream" and msg["stream_id"] == model.stream_id:
-                index["stream_msg_ids_by_stream_id"][msg["stream_id"]].add(msg["id"])
-
-        if (
-            msg["type"] == "stream"
-            and len(narrow) == 2
-            and narrow[1][1] == msg["subject"]
-        ):
+        if msg["type"] == "private":
+            index["private_msg_ids"].add(msg["id"])
+            recipients = frozenset(
+                {recipient["id"] for recipient in msg["display_recipient"]}
+            )
+            index["private_msg_ids_by_user_ids"][recipients].add(msg["id"])
+
+        if msg["type"] == "stream":
+            index["stream_msg_ids_by_stream_id"][msg["stream_id"]].add(msg["id"])
             topics_in_stream = index["topic_msg_ids"][msg["stream_id"]]
             if not topics_in_stream.get(msg["subject"]):
                 topics_in_stream[msg["subject"]] = set()
@@ -447,6 +516,125 @@ def index_messages(messages: List[Message], model: Any, index: Index) -> Index:
     return index
 
 
+def search_terms_of_text(text: str) -> Set[str]:
+    """
+    Returns the words in text, in lower case, as matched by searches
+    """
+    return set(findall(r"\w+", text.lower()))
+
+
+def search_terms_of_message(message: Message) -> Set[str]:
+    """
+    Returns the words in the content (without markup) and topic of a message
+    """
+    content_text = unescape(sub(r"<[^>]*>", " ", message["content"]))
+    return search_terms_of_text(content_text) | search_terms_of_text(message["subject"])
+
+
+def add_search_terms(index: Index, message: Message) -> None:
+    for term in search_terms_of_message(message):
+        index["search_terms"][term].add(message["id"])
+
+
+def remove_search_terms(index: Index, message: Message) -> None:
+    search_terms = index["search_terms"]
+    for term in search_terms_of_message(message):
+        message_ids = search_terms.get(term)
+        if message_ids is not None:
+            message_ids.discard(message["id"])
+            if not message_ids:
+                del search_terms[term]
+
+
+def narrow_keys_of_message(message: Message) -> List[NarrowKey]:
+    """
+    Returns the keys of every narrow containing the message, except searches
+    """
+    keys: List[NarrowKey] = [()]
+    if message["type"] == "stream":
+        keys.append(("stream", message["stream_id"]))
+        keys.append(("stream", message["stream_id"], message["subject"]))
+    else:
+        recipients = frozenset(
+            recipient["id"] for recipient in message["display_recipient"]
+        )
+        keys.append(("private",))
+        keys.append(("private", recipients))
+    if "starred" in message["flags"]:
+        keys.append(("starred",))
+    if {"mentioned", "wildcard_mentioned"} & set(message["flags"]):
+        keys.append(("mentioned",))
+    return keys
+
+
+def update_contiguous_ranges(
+    index: Index,
+    narrow_key: NarrowKey,
+    messages: List[Message],
+    first_id: int,
+    last_id: int,
+) -> None:
+    """
+    Records that all messages with ids from first_id to last_id are downloaded
+    for the fetched narrow, and so also for any narrow within it that contains
+    one of the fetched messages.
+    Stream narrows also contain messages sent while the user was not
+    subscribed, which other narrows do not, so are only updated from a fetch
+    within the stream.
+    Ranges overlapping the new range are merged with it.
+    """
+    fetched_stream = narrow_key[:1] == ("stream",)
+    keys = {narrow_key}
+    keys.update(
+        key
+        for message in messages
+        for key in narrow_keys_of_message(message)
+        if key[: len(narrow_key)] == narrow_key
+        and (fetched_stream or key[:1] != ("stream",))
+    )
+    ranges = index["contiguous_ranges"]
+    for key in keys:
+        new_range = (first_id, last_id)
+        separate_ranges = []
+        for known_range in ranges.get(key, []):
+            if known_range[0] <= new_range[1] and new_range[0] <= known_range[1]:
+                new_range = (
+                    min(new_range[0], known_range[0]),
+                    max(new_range[1], known_range[1]),
+                )
+            else:
+                separate_ranges.append(known_range)
+        ranges[key] = sorted(separate_ranges + [new_range])
+
+
+def truncate_newest_contiguous_ranges(index: Index, last_id: int) -> List[NarrowKey]:
+    """
+    Records that messages after last_id may be missing from ranges which were
+    known to include the newest messages, returning the keys of their narrows
+    """
+    keys = []
+    for key, ranges in index["contiguous_ranges"].items():
+        if ranges and ranges[-1][1] == NEWEST_MESSAGE_ID:
+            first_id = ranges[-1][0]
+            ranges[-1] = (first_id, max(first_id, last_id))
+            keys.append(key)
+    return keys
+
+
+def find_contiguous_range(
+    ranges: List[Tuple[int, int]], message_id: Optional[int] = None
+) -> Optional[Tuple[int, int]]:
+    """
+    Returns the range including the message id if given, or else the newest range
+    """
+    if message_id is None:
+        return ranges[-1] if ranges else None
+    for first_id, last_id in ranges:
+        if first_id <= message_id <= last_id:
+            return (first_id, last_id)
+    return None
+
+
 def classify_unread_counts(model: Any) -> UnreadCounts:
     # TODO: support group pms
     unread_msg_counts = model.initial_data["unread_msgs"]
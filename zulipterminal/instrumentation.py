@@ -0,0 +1,257 @@
+"""
+Timing of operations for diagnostics, as histograms and as traces of startup
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from typing_extensions import ParamSpec
+
+
+# Upper bounds of histogram buckets, in milliseconds; a final bucket is unbounded
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Metric names are prefixed by their category, eg. "render:MessageBox"
+METRIC_CATEGORIES = {
+    "fetch": "Fetching & indexing",
+    "render": "Rendering",
+    "input": "Input",
+    "event": "Event handling",
+}
+
+ParamT = ParamSpec("ParamT")
+ReturnT = TypeVar("ReturnT")
+
+
+class Histogram:
+    """
+    Counts durations in buckets, with the total and maximum duration
+    """
+
+    __slots__ = ("bucket_counts", "count", "total_ms", "maximum_ms")
+
+    def __init__(self) -> None:
+        self.bucket_counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.maximum_ms = 0.0
+
+    def add(self, duration_ms: float) -> None:
+        self.bucket_counts[bisect_left(BUCKET_BOUNDS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.maximum_ms = max(self.maximum_ms, duration_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile_ms(self, percentile: float) -> float:
+        """
+        Returns an upper bound for the duration at the percentile (0-100),
+        from the bucket in which it falls
+        """
+        rank = percentile / 100 * self.count
+        cumulative_count = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS_MS, self.bucket_counts):
+            cumulative_count += bucket_count
+            if bucket_count and cumulative_count >= rank:
+                return min(bound, self.maximum_ms)
+        return self.maximum_ms
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram()
+        histogram.bucket_counts = list(self.bucket_counts)
+        histogram.count = self.count
+        histogram.total_ms = self.total_ms
+        histogram.maximum_ms = self.maximum_ms
+        return histogram
+
+
+class Metrics:
+    """
+    Histograms of durations by metric name, which are safe to update from
+    multiple threads
+    """
+
+    def __init__(self) -> None:
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            self._histograms[name].add(duration_ms)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def timed(
+        self, name: str
+    ) -> Callable[[Callable[ParamT, ReturnT]], Callable[ParamT, ReturnT]]:
+        """
+        Decorator recording the duration of each call of a function
+        """
+
+        def decorator(func: Callable[ParamT, ReturnT]) -> Callable[ParamT, ReturnT]:
+            @wraps(func)
+            def wrapper(*args: ParamT.args, **kwargs: ParamT.kwargs) -> ReturnT:
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        with self._lock:
+            return {name: data.copy() for name, data in self._histograms.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self) -> List[Tuple[str, List[Tuple[str, Histogram]]]]:
+        """
+        Returns histograms with their names, sorted within each category
+        """
+        histograms = self.snapshot()
+        summary = []
+        for prefix, category in METRIC_CATEGORIES.items():
+            category_histograms = sorted(
+                (
+                    (name.split(":", 1)[1], histogram)
+                    for name, histogram in histograms.items()
+                    if name.startswith(prefix + ":")
+                ),
+                key=lambda item: item[0],
+            )
+            if category_histograms:
+                summary.append((category, category_histograms))
+        return summary
+
+    def report(self) -> str:
+        lines = [f"{'':32}{'calls':>8}{'mean':>10}{'p95':>10}{'max':>10}  (ms)"]
+        for category, histograms in self.summary():
+            lines.append(category)
+            lines.extend(
+                f"  {name:30}{histogram.count:>8}{histogram.mean_ms:>10.2f}"
+                f"{histogram.percentile_ms(95):>10.2f}{histogram.maximum_ms:>10.2f}"
+                for name, histogram in histograms
+            )
+        return "\n".join(lines)
+
+
+class Trace:
+    """
+    Spans of time in any thread, recorded only between starting and finishing,
+    which are written as Chrome trace-event JSON (eg. for Perfetto)
+    """
+
+    def __init__(self) -> None:
+        self.path: Optional[str] = None
+        self._start = 0.0
+        self._events: List[Dict[str, Any]] = []
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, path: str) -> None:
+        self.path = path
+        self._start = time.perf_counter()
+        self._events = []
+        self._thread_names = {}
+
+    def record(self, name: str, start: float, end: float) -> None:
+        """
+        Records a span from `start` to `end`, as from time.perf_counter()
+        """
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            self._thread_names[thread.ident or 0] = thread.name
+            self._events.append(
+                {
+                    "name": name,
+                    "ph": "X",  # Complete event, with a duration
+                    "ts": (start - self._start) * 1_000_000,
+                    "dur": (end - start) * 1_000_000,
+                    "pid": os.getpid(),
+                    "tid": thread.ident or 0,
+                }
+            )
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def traced(
+        self, name: str
+    ) -> Callable[[Callable[ParamT, ReturnT]], Callable[ParamT, ReturnT]]:
+        """
+        Decorator recording a span for each call of a function
+        """
+
+        def decorator(func: Callable[ParamT, ReturnT]) -> Callable[ParamT, ReturnT]:
+            @wraps(func)
+            def wrapper(*args: ParamT.args, **kwargs: ParamT.kwargs) -> ReturnT:
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def finish(self) -> None:
+        """
+        Writes the trace recorded since starting, and stops recording
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            thread_events = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",  # Metadata event
+                    "pid": os.getpid(),
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+                for thread_id, thread_name in self._thread_names.items()
+            ]
+            trace = {
+                "traceEvents": thread_events + self._events,
+                "displayTimeUnit": "ms",
+            }
+            with open(self.path, "w") as trace_file:
+                json.dump(trace, trace_file)
+            self.path = None
+
+
+metrics = Metrics()
+
+# Trace of startup, up to the first screen being drawn
+startup_trace = Trace()
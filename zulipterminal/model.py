@@ -8,6 +8,7 @@ from collections import OrderedDict, defaultdict
 from concurrent.futures import Future, ThreadPoolExecutor, wait
 from copy import deepcopy
 from datetime import datetime
+from pathlib import Path
 from typing import (
     Any,
     Callable,
@@ -24,8 +25,8 @@ from typing import (
 )
 from urllib.parse import urlparse
 
+import requests
 import zulip
-from bs4 import BeautifulSoup
 from typing_extensions import Literal, TypedDict
 
 from zulipterminal import unicode_emojis
@@ -41,6 +42,7 @@ from zulipterminal.api_types import (
     StreamMessageUpdateRequest,
     Subscription,
 )
+from zulipterminal.backoff import ReconnectBackoff
 from zulipterminal.config.keys import primary_key_for_command
 from zulipterminal.config.symbols import STREAM_TOPIC_SEPARATOR
 from zulipterminal.config.ui_mappings import (
@@ -49,25 +51,44 @@ from zulipterminal.config.ui_mappings import (
     StreamAccessType,
 )
 from zulipterminal.helper import (
+    NEWEST_MESSAGE_ID,
     Message,
     NamedEmojiData,
+    Narrow,
+    NarrowKey,
     StreamData,
     TidiedUserInfo,
+    add_search_terms,
     asynch,
     canonicalize_color,
     classify_unread_counts,
     display_error_if_present,
+    find_contiguous_range,
     index_messages,
     initial_index,
     notify_if_message_sent_outside_narrow,
+    remove_search_terms,
+    search_terms_of_text,
     set_count,
+    truncate_newest_contiguous_ranges,
+    update_contiguous_ranges,
 )
+from zulipterminal.instrumentation import metrics, startup_trace
 from zulipterminal.platform_code import notify
-from zulipterminal.ui_tools.utils import create_msg_box_list
+from zulipterminal.session import SessionState, load_session, save_session
+from zulipterminal.ui_tools.utils import MessageBoxCache, create_msg_box_list
 
 
 OFFLINE_THRESHOLD_SECS = 140
 
+# Number of recent searches for which results are kept, to be shown immediately
+SEARCH_RESULTS_CACHE_SIZE = 20
+
+# Messages missed while the event queue was lost are fetched in batches, up to
+# a limit; any older ones are fetched as usual when scrolling to them
+CATCH_UP_BATCH_SIZE = 1000
+CATCH_UP_MAX_MESSAGES = 5000
+
 # Adapted from zerver/models.py
 # These fields have migrated to the API inside the Realm object
 # in ZFL 53. To allow backporting to earlier server versions, we
@@ -99,15 +120,21 @@ class Model:
     A class responsible for storing the data to be displayed.
     """
 
-    def __init__(self, controller: Any) -> None:
+    def __init__(self, controller: Any, *, session_path: Optional[Path] = None) -> None:
         self.controller = controller
         self.client = controller.client
+        # Where the event queue and state are saved on exiting, to be resumed
+        self.session_path = session_path
 
         self.narrow: List[Any] = []
-        self._have_last_message: Dict[str, bool] = {}
+        self.compiled_narrow = Narrow()
+        # Changed with the narrow, to recognize fetches for previous narrows
+        self.narrow_generation = 0
         self.stream_id: Optional[int] = None
         self.recipients: FrozenSet[Any] = frozenset()
         self.index = initial_index
+        self.search_results: "OrderedDict[Narrow, Set[int]]" = OrderedDict()
+        self.message_box_cache = MessageBoxCache()
         self._last_unread_topic = None
 
         self.user_id = -1
@@ -139,6 +166,13 @@ class Model:
             # POST /register from Feature level 3.
             "zulip_version",
         ]
+        # Data fetched again after missing events, to catch up with them
+        self.catch_up_data_to_fetch: List[str] = [
+            "message",
+            "update_message_flags",
+            "starred_messages",
+            "subscription",
+        ]
 
         # Events desired with their corresponding callback
         self.event_actions: "OrderedDict[str, Callable[[Event], None]]" = OrderedDict(
@@ -161,10 +195,19 @@ class Model:
         )
 
         self.initial_data: Dict[str, Any] = {}
+        # Keeps initial_data updated with events, to be saved with the queue
+        self.session_state = SessionState(self.initial_data)
+        # Whether initial_data reflects every event since registering
+        self.initial_data_is_current = True
+        # Newest message received, from which to catch up after missing events
+        self.max_message_id = -1
+        # Delays reconnecting after errors, counting reconnects and downtime
+        self.reconnect_backoff = ReconnectBackoff()
 
         # Register to the queue before initializing further so that we don't
         # lose any updates while messages are being fetched.
-        self._fetch_initial_data()
+        with startup_trace.span("Fetch initial data"):
+            self._fetch_initial_data()
 
         self._all_users_by_id: Dict[int, RealmUser] = {}
         self._cross_realm_bots_by_id: Dict[int, RealmUser] = {}
@@ -172,7 +215,8 @@ class Model:
         self.server_version = self.initial_data["zulip_version"]
         self.server_feature_level = self.initial_data.get("zulip_feature_level")
 
-        self.users = self.get_all_users()
+        with startup_trace.span("Process users"):
+            self.users = self.get_all_users()
 
         self.stream_dict: Dict[int, Any] = {}
         self.muted_streams: Set[int] = set()
@@ -180,7 +224,8 @@ class Model:
         self.unpinned_streams: List[StreamData] = []
         self.visual_notified_streams: Set[int] = set()
 
-        self._subscribe_to_streams(self.initial_data["subscriptions"])
+        with startup_trace.span("Process streams"):
+            self._subscribe_to_streams(self.initial_data["subscriptions"])
 
         # NOTE: The date_created field of stream has been added in feature
         # level 30, server version 4. For consistency we add this field
@@ -207,15 +252,18 @@ class Model:
         self.user_group_by_id: Dict[int, Dict[str, Any]] = {}
         self.user_group_names = self._group_info_from_realm_user_groups(groups)
 
-        self.unread_counts = classify_unread_counts(self)
+        with startup_trace.span("Classify unread messages"):
+            self.unread_counts = classify_unread_counts(self)
 
         self._draft: Optional[Composition] = None
 
         self._store_content_length_restrictions()
 
-        self.active_emoji_data, self.all_emoji_names = self.generate_all_emoji_data(
-            self.initial_data["realm_emoji"]
-        )
+        with startup_trace.span("Generate emoji data"):
+            (
+                self.active_emoji_data,
+                self.all_emoji_names,
+            ) = self.generate_all_emoji_data(self.initial_data["realm_emoji"])
 
         # "user_settings" only present in ZFl 89+ (v5.0)
         user_settings = self.initial_data.get("user_settings", None)
@@ -275,17 +323,17 @@ class Model:
         Returns the focus in the current narrow.
         For no existing focus this returns {}, otherwise the message ID.
         """
-        return self.index["pointer"][repr(self.narrow)]
+        return self.index["pointer"][self.compiled_narrow]
 
     def set_focus_in_current_narrow(self, focus_message: int) -> None:
-        self.index["pointer"][repr(self.narrow)] = focus_message
+        self.index["pointer"][self.compiled_narrow] = focus_message
 
     def is_search_narrow(self) -> bool:
         """
         Checks if the current narrow is a result of a previous search for
         a messages in a different narrow.
         """
-        return "search" in [subnarrow[0] for subnarrow in self.narrow]
+        return self.compiled_narrow.search is not None
 
     def set_narrow(
         self,
@@ -316,6 +364,7 @@ class Model:
 
         if new_narrow != self.narrow:
             self.narrow = new_narrow
+            self.narrow_generation += 1
 
             if pm_with is not None and new_narrow[0][0] == "pm_with":
                 users = pm_with.split(", ")
@@ -331,6 +380,7 @@ class Model:
             else:
                 self.stream_id = None
 
+            self.compiled_narrow = self._compile_narrow()
             return False
         else:
             return True
@@ -338,6 +388,8 @@ class Model:
     def set_search_narrow(self, search_query: str) -> None:
         self.unset_search_narrow()
         self.narrow.append(["search", search_query])
+        self.compiled_narrow = self._compile_narrow()
+        self.narrow_generation += 1
 
     def unset_search_narrow(self) -> None:
         # If current narrow is a result of a previous started search,
@@ -345,71 +397,119 @@ class Model:
         # setting a new narrow.
         if self.is_search_narrow():
             self.narrow = [item for item in self.narrow if item[0] != "search"]
+            self.compiled_narrow = self._compile_narrow()
+            self.narrow_generation += 1
+
+    def _compile_narrow(self) -> Narrow:
+        search = None
+        narrow = []
+        for operator, operand in self.narrow:
+            if operator == "search":
+                search = operand
+            else:
+                narrow.append((operator, operand))
 
-    def get_message_ids_in_current_narrow(self) -> Set[int]:
-        narrow = self.narrow
-        index = self.index
+        key: NarrowKey
         if narrow == []:
-            ids = index["all_msg_ids"]
-        elif self.is_search_narrow():  # Check searches first
-            ids = index["search"]
+            key = ()
         elif narrow[0][0] == "stream":
-            assert self.stream_id is not None
-            stream_id = self.stream_id
-            if len(narrow) == 1:
-                ids = index["stream_msg_ids_by_stream_id"][stream_id]
-            elif len(narrow) == 2:
-                topic = narrow[1][1]
-                ids = index["topic_msg_ids"][stream_id].get(topic, set())
+            key = ("stream", self.stream_id, *(topic for _, topic in narrow[1:]))
         elif narrow[0][1] == "private":
-            ids = index["private_msg_ids"]
+            key = ("private",)
         elif narrow[0][0] == "pm_with":
-            recipients = self.recipients
-            ids = index["private_msg_ids_by_user_ids"].get(recipients, set())
-        elif narrow[0][1] == "starred":
+            key = ("private", self.recipients)
+        else:
+            key = (narrow[0][1],)  # starred or mentioned
+        return Narrow(key, search)
+
+    def get_contiguous_range_in_current_narrow(
+        self, anchor: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Returns the range of message ids in which all messages in the narrow are
+        downloaded, including the anchor if given, or else the newest such range.
+        The range starts at 0 when including the oldest message and ends at
+        NEWEST_MESSAGE_ID when including the newest one.
+        """
+        if self.is_search_narrow():
+            return None
+        ranges = self.index["contiguous_ranges"].get(self.compiled_narrow.key, [])
+        return find_contiguous_range(ranges, anchor)
+
+    def get_message_ids_in_current_narrow(
+        self, anchor: Optional[int] = None
+    ) -> Set[int]:
+        if self.is_search_narrow():
+            return self.index["search"].copy()
+
+        ids = self._get_message_ids_in_narrow(self.compiled_narrow.key)
+        # Messages are indexed in every narrow, but only those without gaps
+        # between them are shown
+        contiguous_range = self.get_contiguous_range_in_current_narrow(anchor)
+        if contiguous_range is None:
+            return set()
+        first_id, last_id = contiguous_range
+        return {id for id in ids if first_id <= id <= last_id}
+
+    def _get_message_ids_in_narrow(self, key: NarrowKey) -> Set[int]:
+        index = self.index
+        if key == ():
+            ids = index["all_msg_ids"]
+        elif key[0] == "stream":
+            stream_id = key[1]
+            assert stream_id is not None
+            if len(key) == 2:
+                ids = index["stream_msg_ids_by_stream_id"][stream_id]
+            else:
+                ids = index["topic_msg_ids"][stream_id].get(key[2], set())
+        elif key == ("private",):
+            ids = index["private_msg_ids"]
+        elif key[0] == "private":
+            ids = index["private_msg_ids_by_user_ids"].get(key[1], set())
+        elif key == ("starred",):
             ids = index["starred_msg_ids"]
-        elif narrow[0][1] == "mentioned":
+        elif key == ("mentioned",):
             ids = index["mentioned_msg_ids"]
-        return ids.copy()
+        return ids
+
+    def get_local_search_results(self) -> Set[int]:
+        """
+        Returns the ids of downloaded messages matching the current search, being
+        those containing every word searched for, and any recent results of the
+        same search
+        """
+        narrow = self.compiled_narrow
+        assert narrow.search is not None
+        search_terms = self.index["search_terms"]
+        terms = search_terms_of_text(narrow.search)
+        if terms:
+            ids = set.intersection(*(search_terms.get(term, set()) for term in terms))
+            ids &= self._get_message_ids_in_narrow(narrow.key)
+        else:
+            ids = set()
+
+        recent_results = self.search_results.get(narrow)
+        if recent_results is not None:
+            self.search_results.move_to_end(narrow)
+            ids |= recent_results
+        return ids
+
+    def save_search_results(self) -> None:
+        """
+        Keeps the results of the current search, forgetting the least recent
+        searches beyond SEARCH_RESULTS_CACHE_SIZE
+        """
+        narrow = self.compiled_narrow
+        self.search_results[narrow] = set(self.index["search"])
+        self.search_results.move_to_end(narrow)
+        if len(self.search_results) > SEARCH_RESULTS_CACHE_SIZE:
+            self.search_results.popitem(last=False)
 
     def current_narrow_contains_message(self, message: Message) -> bool:
         """
         Determine if a message conceptually belongs to a narrow
-        FIXME?: stars are not handled right now
         """
-        return (
-            # all messages contains all messages
-            not self.narrow
-            # mentions
-            or (
-                self.narrow[0][1] == "mentioned"
-                and bool({"mentioned", "wildcard_mentioned"} & set(message["flags"]))
-            )
-            # All-PMs
-            # FIXME Buggy condition?
-            or (self.narrow[0][1] == message["type"] and len(self.narrow) == 1)
-            # stream or stream+topic
-            or (
-                self.narrow[0][0] == "stream"
-                and message["type"] == "stream"
-                and message["display_recipient"] == self.narrow[0][1]
-                and (
-                    len(self.narrow) == 1  # stream
-                    or (
-                        len(self.narrow) == 2  # stream+topic
-                        and self.narrow[1][1] == message["subject"]
-                    )
-                )
-            )
-            # PM-with
-            or (
-                self.narrow[0][0] == "pm_with"
-                and message["type"] == "private"
-                and len(self.narrow) == 1
-                and self.recipients
-                == frozenset([user["id"] for user in message["display_recipient"]])
-            )
-        )
+        return self.compiled_narrow.contains_message(message)
 
     def _notify_server_of_presence(self) -> Dict[str, Any]:
         response = self.client.update_presence(
@@ -433,6 +533,8 @@ class Model:
         while True:
             response = self._notify_server_of_presence()
             if response["result"] == "success":
+                # The network is restored, if events could not be fetched
+                self.reconnect_backoff.retry_now()
                 self.initial_data["presences"] = response["presences"]
                 self.users = self.get_all_users()
                 if hasattr(self.controller, "view"):
@@ -631,7 +733,7 @@ class Model:
         self, stream_id: int, topic_name: str
     ) -> Optional[Message]:
         request: Dict[str, Any] = {
-            "anchor": 10000000000000000,
+            "anchor": NEWEST_MESSAGE_ID,
             "num_before": 1,
             "num_after": 0,
             "narrow": [
@@ -736,6 +838,7 @@ class Model:
         active_emoji_data = OrderedDict(sorted(all_emoji_data.items()))
         return active_emoji_data, all_emoji_names
 
+    @metrics.timed("fetch:get_messages")
     def get_messages(
         self, *, num_after: int, num_before: int, anchor: Optional[int]
     ) -> str:
@@ -743,6 +846,10 @@ class Model:
         first_anchor = anchor is None
         anchor_value = anchor if anchor is not None else 0
 
+        # The narrow may change while fetching
+        narrow_generation = self.narrow_generation
+        narrow = self.compiled_narrow
+
         request = {
             "anchor": anchor_value,
             "num_before": num_before,
@@ -758,10 +865,16 @@ class Model:
                 self.modernize_message_response(msg) for msg in response["messages"]
             ]
 
+            # Messages fetched for a previous narrow are still indexed, so they
+            # are not fetched again, unless they would be indexed as results
+            # of the wrong search
+            if narrow_generation != self.narrow_generation and (
+                narrow.search is not None or self.is_search_narrow()
+            ):
+                return ""
             self.index = index_messages(response["messages"], self, self.index)
-            narrow_str = repr(self.narrow)
-            if first_anchor and response["anchor"] != 10000000000000000:
-                self.index["pointer"][narrow_str] = response["anchor"]
+            if first_anchor and response["anchor"] != NEWEST_MESSAGE_ID:
+                self.index["pointer"][narrow] = response["anchor"]
             if "found_newest" in response:
                 just_found_last_msg = response["found_newest"]
             else:
@@ -770,8 +883,23 @@ class Model:
                 query_range = num_after + num_before + 1
                 just_found_last_msg = len(response["messages"]) < query_range
 
-            had_last_msg = self._have_last_message.get(narrow_str, False)
-            self._have_last_message[narrow_str] = had_last_msg or just_found_last_msg
+            # Messages are returned without gaps up to the anchor, if given
+            fetched_ids = [msg["id"] for msg in response["messages"]]
+            if anchor is not None:
+                fetched_ids.append(anchor)
+            found_oldest = response.get("found_oldest", False)
+            if narrow.search is None and (
+                fetched_ids or (found_oldest and just_found_last_msg)
+            ):
+                update_contiguous_ranges(
+                    self.index,
+                    narrow.key,
+                    response["messages"],
+                    first_id=0 if found_oldest else min(fetched_ids),
+                    last_id=NEWEST_MESSAGE_ID
+                    if just_found_last_msg
+                    else max(fetched_ids),
+                )
 
             return ""
         display_error_if_present(response, self.controller)
@@ -914,10 +1042,13 @@ class Model:
         with ThreadPoolExecutor(max_workers=1) as executor:
             futures: Dict[str, Future[str]] = {
                 "get_messages": executor.submit(
-                    self.get_messages, num_after=10, num_before=30, anchor=None
+                    startup_trace.traced("Fetch messages")(self.get_messages),
+                    num_after=10,
+                    num_before=30,
+                    anchor=None,
                 ),
                 "register": executor.submit(
-                    self._register_desired_events, fetch_data=True
+                    startup_trace.traced("Register")(self._resume_or_register_events)
                 ),
             }
 
@@ -1457,6 +1588,8 @@ class Model:
             if hidden_content:
                 text = content
             else:
+                from bs4 import BeautifulSoup
+
                 soup = BeautifulSoup(content, "lxml")
                 for spoiler_tag in soup.find_all(
                     "div", attrs={"class": "spoiler-block"}
@@ -1535,14 +1668,20 @@ class Model:
             self.controller.update_screen()
             self._notified_user_of_notification_failure = True
 
+        self.max_message_id = max(self.max_message_id, message["id"])
+
+        # Whether the newest messages are shown, so this one is shown after them
+        contiguous_range = self.get_contiguous_range_in_current_narrow()
+        shows_newest_messages = (
+            contiguous_range is not None and contiguous_range[1] == NEWEST_MESSAGE_ID
+        )
+
         # Index messages before calling set_count.
         self.index = index_messages([message], self, self.index)
         if "read" not in message["flags"]:
             set_count([message["id"]], self.controller, 1)
 
-        if hasattr(self.controller, "view") and self._have_last_message.get(
-            repr(self.narrow), False
-        ):
+        if hasattr(self.controller, "view") and shows_newest_messages:
             msg_log = self.controller.view.message_view.log
             if msg_log:
                 last_message = msg_log[-1].original_widget.message
@@ -1595,7 +1734,10 @@ class Model:
 
         # Update the rendered content, if the message is indexed
         if "rendered_content" in event and indexed_message:
+            remove_search_terms(self.index, indexed_message)
             indexed_message["content"] = event["rendered_content"]
+            add_search_terms(self.index, indexed_message)
+            self.search_results.clear()  # May no longer match searches
             self.index["messages"][message_id] = indexed_message
             self._update_rendered_view(message_id)
 
@@ -1628,8 +1770,11 @@ class Model:
                 # Update and re-render indexed messages.
                 indexed_msg = self.index["messages"].get(msg_id)
                 if indexed_msg:
+                    remove_search_terms(self.index, indexed_msg)
                     indexed_msg["subject"] = new_subject
+                    add_search_terms(self.index, indexed_msg)
                     self._update_rendered_view(msg_id)
+            self.search_results.clear()  # May no longer match searches
 
             # If topic view is open, reload list else reset cache.
             if stream_id in self.index["topics"]:  # noqa: SIM102
@@ -1760,6 +1905,8 @@ class Model:
         """
         Helper method called by various _handle_* methods
         """
+        self.message_box_cache.invalidate(msg_id)
+
         # Update new content in the rendered view
         view = self.controller.view
         for msg_w in view.message_view.log:
@@ -1838,6 +1985,7 @@ class Model:
         view = self.controller.view
         if event["setting_name"] == "twenty_four_hour_time":
             self._user_settings["twenty_four_hour_time"] = event["setting"]
+            self.message_box_cache.clear()
             for msg_w in view.message_view.log:
                 msg_box = msg_w.original_widget
                 msg_id = msg_box.message["id"]
@@ -1863,48 +2011,405 @@ class Model:
                         realm_user.update(updated_details)
                     break
 
-    def _register_desired_events(self, *, fetch_data: bool = False) -> str:
-        fetch_types = None if not fetch_data else self.initial_data_to_fetch
+    def _resume_or_register_events(self) -> str:
+        if self._resume_saved_session():
+            return ""
+        return self._register_desired_events(
+            fetch_event_types=self.initial_data_to_fetch
+        )
+
+    def _resume_saved_session(self) -> bool:
+        """
+        Resumes the event queue of the saved session, if still on the server,
+        with its state updated by the events since it was saved
+        """
+        if self.session_path is None:
+            return False
+        session = load_session(self.session_path)
+        if (
+            session is None
+            or session["event_types"] != list(self.event_actions)
+            or session["fetch_event_types"] != self.initial_data_to_fetch
+        ):
+            return False
+        try:
+            response = self.client.get_events(
+                queue_id=session["queue_id"],
+                last_event_id=session["last_event_id"],
+                dont_block=True,
+            )
+        except zulip.ZulipError:
+            return False
+        if response["result"] != "success":
+            # eg. BAD_EVENT_QUEUE_ID, once the server has removed the queue
+            return False
+
+        state = session["state"]
+        last_event_id = session["last_event_id"]
+        try:
+            session_state = SessionState(state)
+            for event in response["events"]:
+                session_state.apply_event(event)
+                last_event_id = max(last_event_id, int(event["id"]))
+        except (KeyError, TypeError, ValueError):
+            return False  # The state cannot be brought up to date
+        self.initial_data.update(state)
+        self.session_state = SessionState(self.initial_data)
+        self.max_message_id = self.initial_data["max_message_id"]
+        self.queue_id = session["queue_id"]
+        self.last_event_id = last_event_id
+        return True
+
+    def save_session(self) -> bool:
+        """
+        Saves the event queue and state, to be resumed on restarting, returning
+        if saved
+        """
+        if self.session_path is None or not self.initial_data_is_current:
+            return False
+        return save_session(
+            self.session_path,
+            {
+                "event_types": list(self.event_actions),
+                "fetch_event_types": self.initial_data_to_fetch,
+                "queue_id": self.queue_id,
+                "last_event_id": self.last_event_id,
+                "state": self.initial_data,
+            },
+        )
+
+    def _register_desired_events(
+        self, *, fetch_event_types: Optional[List[str]] = None
+    ) -> str:
         event_types = list(self.event_actions)
         try:
             response = self.client.register(
                 event_types=event_types,
-                fetch_event_types=fetch_types,
+                fetch_event_types=fetch_event_types,
                 client_gravatar=True,
                 apply_markdown=True,
                 include_subscribers=True,
             )
-        except zulip.ZulipError as e:
+        except (zulip.ZulipError, requests.exceptions.RequestException) as e:
             return str(e)
 
         if response["result"] == "success":
-            if fetch_data:
+            if fetch_event_types is not None:
                 # FIXME: Improve methods to avoid updating `realm_users` on
                 # every cycle. Add support for `realm_users` events too.
                 self.initial_data.update(response)
+                self.session_state = SessionState(self.initial_data)
             self.max_message_id = response["max_message_id"]
             self.queue_id = response["queue_id"]
             self.last_event_id = response["last_event_id"]
             return ""
+        self.reconnect_backoff.honour_retry_after(response)
         return response["msg"]
 
+    def _catch_up_on_missed_events(self, last_message_id: int) -> None:
+        """
+        Applies what changed while events were missed, after registering again
+        for the catch-up data; changes are applied to the existing index and
+        view, rather than rebuilding them
+        """
+        contiguous_range = self.get_contiguous_range_in_current_narrow()
+        showed_newest_messages = (
+            contiguous_range is not None and contiguous_range[1] == NEWEST_MESSAGE_ID
+        )
+
+        # Narrows known to include the newest messages may now be missing some
+        narrow_keys = truncate_newest_contiguous_ranges(self.index, last_message_id)
+
+        # Messages are indexed in every narrow containing them, so fetching all
+        # missed messages catches up every indexed narrow at once
+        messages, found_newest = self._fetch_missed_messages(last_message_id)
+        search_msg_ids = self.index["search"]
+        self.index = index_messages(messages, self, self.index)
+        self.index["search"] = search_msg_ids  # Missed messages are not results
+        if messages or found_newest:
+            last_id = (
+                NEWEST_MESSAGE_ID
+                if found_newest
+                else max(message["id"] for message in messages)
+            )
+            # Fetching all messages only fetches those of subscribed streams
+            caught_up_keys = [
+                key
+                for key in narrow_keys
+                if key[:1] != ("stream",) or key[1] in self.stream_dict
+            ]
+            no_messages: List[Message] = []
+            for key, narrow_messages in [((), messages)] + [
+                (key, no_messages) for key in caught_up_keys
+            ]:
+                update_contiguous_ranges(
+                    self.index,
+                    key,
+                    narrow_messages,
+                    first_id=last_message_id,
+                    last_id=last_id,
+                )
+        for message in messages:
+            # Topics not yet fetched are fetched with the new messages anyway
+            if message["type"] == "stream" and message["stream_id"] in (
+                self.index["topics"]
+            ):
+                self._update_topic_index(message["stream_id"], message["subject"])
+
+        subscriptions_changed = self._catch_up_on_subscriptions(
+            self.initial_data["subscriptions"]
+        )
+        changed_message_ids = self._catch_up_on_message_flags()
+        self._catch_up_on_unread_counts(rebuild_stream_view=subscriptions_changed)
+
+        if not hasattr(self.controller, "view"):
+            for message_id in changed_message_ids:
+                self.message_box_cache.invalidate(message_id)
+            return
+        for message_id in changed_message_ids:
+            self._update_rendered_view(message_id)
+        if showed_newest_messages:
+            msg_log = self.controller.view.message_view.log
+            last_message = msg_log[-1].original_widget.message if msg_log else None
+            msg_w_list = create_msg_box_list(
+                self,
+                [
+                    message["id"]
+                    for message in messages
+                    if self.current_narrow_contains_message(message)
+                ],
+                last_message=last_message,
+            )
+            msg_log.extend(msg_w_list)
+        self.controller.update_screen()
+
+    def _fetch_missed_messages(
+        self, last_message_id: int
+    ) -> Tuple[List[Message], bool]:
+        """
+        Fetches messages after last_message_id, up to those existing when
+        registering, returning them and whether they include the newest message
+        """
+        messages: List[Message] = []
+        anchor = last_message_id
+        while len(messages) < CATCH_UP_MAX_MESSAGES:
+            request = {
+                "anchor": anchor,
+                "num_before": 0,
+                "num_after": CATCH_UP_BATCH_SIZE,
+                "apply_markdown": True,
+                "client_gravatar": True,
+                "narrow": json.dumps([]),
+            }
+            try:
+                response = self.client.get_messages(message_filters=request)
+            except zulip.ZulipError:
+                return messages, False
+            if response["result"] != "success":
+                return messages, False
+            # Newer messages are received as events on the new queue
+            fetched = [
+                self.modernize_message_response(message)
+                for message in response["messages"]
+                if anchor < message["id"] <= self.max_message_id
+            ]
+            messages.extend(fetched)
+            if fetched:
+                anchor = fetched[-1]["id"]
+            if (
+                response.get("found_newest", False)
+                or not fetched
+                or anchor == self.max_message_id
+            ):
+                return messages, True
+        return messages, False
+
+    def _catch_up_on_subscriptions(self, subscriptions: List[Subscription]) -> bool:
+        """
+        Applies changes in the subscribed streams, returning whether the
+        streams list needs to be shown again
+        """
+        new_subscriptions = {
+            subscription["stream_id"]: subscription for subscription in subscriptions
+        }
+        removed_stream_ids = set(self.stream_dict) - set(new_subscriptions)
+        added_subscriptions = [
+            subscription
+            for stream_id, subscription in new_subscriptions.items()
+            if stream_id not in self.stream_dict
+        ]
+        changed = bool(removed_stream_ids or added_subscriptions)
+
+        for stream_id in removed_stream_ids:
+            del self.stream_dict[stream_id]
+            self.muted_streams.discard(stream_id)
+            self.visual_notified_streams.discard(stream_id)
+        # Lists are updated in place, as they are shared with the view
+        for streams in (self.pinned_streams, self.unpinned_streams):
+            streams[:] = [
+                stream for stream in streams if stream["id"] not in removed_stream_ids
+            ]
+
+        for stream_id, subscription in new_subscriptions.items():
+            if stream_id not in self.stream_dict:
+                continue
+            subscription["color"] = canonicalize_color(subscription["color"])
+            self.stream_dict[stream_id] = subscription
+            if subscription["is_muted"] != (stream_id in self.muted_streams):
+                if subscription["is_muted"]:
+                    self.muted_streams.add(stream_id)
+                else:
+                    self.muted_streams.discard(stream_id)
+                changed = True
+            if subscription["pin_to_top"] != self.is_pinned_stream(stream_id):
+                source, target = (
+                    (self.unpinned_streams, self.pinned_streams)
+                    if subscription["pin_to_top"]
+                    else (self.pinned_streams, self.unpinned_streams)
+                )
+                for stream in source:
+                    if stream["id"] == stream_id:
+                        source.remove(stream)
+                        target.append(stream)
+                        sort_streams(target)
+                        break
+                changed = True
+            if subscription["desktop_notifications"]:
+                self.visual_notified_streams.add(stream_id)
+            else:
+                self.visual_notified_streams.discard(stream_id)
+
+        self._subscribe_to_streams(added_subscriptions)
+        return changed
+
+    def _catch_up_on_message_flags(self) -> List[int]:
+        """
+        Updates the read and starred flags of indexed messages, returning the
+        ids of those changed
+        """
+        unread_msgs = self.initial_data["unread_msgs"]
+        unread_msg_ids = {
+            message_id
+            for conversations in ("streams", "pms", "huddles")
+            for conversation in unread_msgs[conversations]
+            for message_id in conversation["unread_message_ids"]
+        }
+        # Only the newest unread messages are returned, if there are too many,
+        # so messages older than those are not known to have been read
+        if unread_msgs.get("old_unreads_missing", False):
+            oldest_known_id = min(unread_msg_ids, default=NEWEST_MESSAGE_ID)
+        else:
+            oldest_known_id = 0
+        starred_msg_ids = set(self.initial_data["starred_messages"])
+
+        changed_message_ids = []
+        for message_id, message in self.index["messages"].items():
+            flags = set(message["flags"])
+            new_flags = set(flags)
+            if message_id in unread_msg_ids:
+                new_flags.discard("read")
+            elif message_id > oldest_known_id:
+                new_flags.add("read")
+            if message_id in starred_msg_ids:
+                new_flags.add("starred")
+                self.index["starred_msg_ids"].add(message_id)
+            else:
+                new_flags.discard("starred")
+                self.index["starred_msg_ids"].discard(message_id)
+            if new_flags != flags:
+                message["flags"] = [
+                    flag for flag in message["flags"] if flag in new_flags
+                ] + sorted(new_flags - flags)
+                changed_message_ids.append(message_id)
+        return changed_message_ids
+
+    def _catch_up_on_unread_counts(self, *, rebuild_stream_view: bool) -> None:
+        """
+        Recalculates unread counts, updating only the buttons whose counts
+        changed, unless the streams list is shown again
+        """
+        unread_counts = classify_unread_counts(self)
+        self.unread_counts = unread_counts
+        if not hasattr(self.controller, "view"):
+            return
+        view = self.controller.view
+
+        if rebuild_stream_view:
+            view.left_panel.update_stream_view()
+        else:
+            for stream_id, stream_button in view.stream_id_to_button.items():
+                count = unread_counts["streams"].get(stream_id, 0)
+                if not self.is_muted_stream(stream_id) and stream_button.count != count:
+                    stream_button.update_count(count)
+        if view.left_panel.is_in_topic_view:
+            stream_id = view.topic_w.stream_button.stream_id
+            for topic_button in view.topic_w.topics_btn_list:
+                count = unread_counts["unread_topics"].get(
+                    (stream_id, topic_button.topic_name), 0
+                )
+                if topic_button.count != count:
+                    topic_button.update_count(count)
+        for user_button in view.user_w.users_btn_list:
+            count = unread_counts["unread_pms"].get(user_button.user_id, 0)
+            if user_button.count != count:
+                user_button.update_count(count)
+
+        for button, count in [
+            (view.home_button, unread_counts["all_msg"]),
+            (view.pm_button, unread_counts["all_pms"]),
+            (view.mentioned_button, unread_counts["all_mentions"]),
+            (view.starred_button, len(self.initial_data["starred_messages"])),
+        ]:
+            if button.count != count:
+                button.update_count(count)
+
+    def _wait_to_reconnect(self) -> None:
+        delay = self.reconnect_backoff.failed()
+        if hasattr(self.controller, "view"):
+            self.controller.view.set_footer_text(
+                [f"Connection to the server lost; reconnecting in {delay:.0f}s"],
+                "task:warning",
+            )
+        self.reconnect_backoff.wait(delay)
+
+    def _reconnected(self) -> None:
+        was_disconnected = self.reconnect_backoff.is_disconnected
+        self.reconnect_backoff.succeeded()
+        if was_disconnected and hasattr(self.controller, "view"):
+            self.controller.view.set_footer_text()
+
     @asynch
     def poll_for_events(self) -> None:
-        reregister_timeout = 10
         queue_id = self.queue_id
         last_event_id = self.last_event_id
         while True:
             if queue_id is None:
+                last_message_id = self.max_message_id
                 while True:
-                    if not self._register_desired_events():
+                    if not self._register_desired_events(
+                        fetch_event_types=self.catch_up_data_to_fetch
+                    ):
                         queue_id = self.queue_id
                         last_event_id = self.last_event_id
                         break
-                    time.sleep(reregister_timeout)
+                    self._wait_to_reconnect()
+                try:
+                    with metrics.timer("fetch:catch_up"):
+                        self._catch_up_on_missed_events(last_message_id)
+                except Exception:
+                    import sys
+
+                    self.controller.raise_exception_in_main_thread(
+                        sys.exc_info(), critical=False
+                    )
 
-            response = self.client.get_events(
-                queue_id=queue_id, last_event_id=last_event_id
-            )
+            try:
+                response = self.client.get_events(
+                    queue_id=queue_id, last_event_id=last_event_id
+                )
+            except (zulip.ZulipError, requests.exceptions.RequestException):
+                self._wait_to_reconnect()
+                continue
 
             if "error" in response["result"]:
                 if response.get("code") == "BAD_EVENT_QUEUE_ID":
@@ -1912,23 +2417,32 @@ class Model:
                     # we were asleep or the server restarted
                     # abnormally.  We may have missed some
                     # events while the network was down or
-                    # something, but there's not really anything
-                    # we can do about it other than resuming
-                    # getting new ones.
+                    # something, so we catch up with the messages,
+                    # flags and subscriptions that they changed.
                     #
                     # Reset queue_id to register a new event queue.
                     queue_id = None
-                time.sleep(1)
+                    self.initial_data_is_current = False
+                self.reconnect_backoff.honour_retry_after(response)
+                self._wait_to_reconnect()
                 continue
 
+            self._reconnected()
             for event in response["events"]:
                 last_event_id = max(last_event_id, int(event["id"]))
                 if event["type"] in self.event_actions:
                     try:
-                        self.event_actions[event["type"]](event)
+                        with metrics.timer("event:" + event["type"]):
+                            self.event_actions[event["type"]](event)
                     except Exception:
                         import sys
 
                         self.controller.raise_exception_in_main_thread(
                             sys.exc_info(), critical=False
                         )
+                # Keep the state to be saved up to date, unless not understood
+                try:
+                    self.session_state.apply_event(event)
+                except (KeyError, TypeError, ValueError):
+                    self.initial_data_is_current = False
+                self.last_event_id = last_event_id
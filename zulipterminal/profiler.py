@@ -0,0 +1,145 @@
+"""
+Profiling of the running application between starting and stopping a capture
+"""
+
+import cProfile
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Iterator, Optional, Set, Union
+
+
+PROFILE_MODES = ("sampling", "deterministic")
+PROFILE_THREADS = ("main", "events", "all")
+
+# Name of the thread polling for events, as started by the asynch decorator
+EVENTS_THREAD_NAME = "poll_for_events"
+
+# Seconds between samples of thread stacks
+SAMPLING_INTERVAL = 0.005
+
+
+class SamplingProfiler:
+    """
+    Counts the stacks of threads, sampled periodically from a separate thread,
+    which has a low overhead on the threads being profiled
+    """
+
+    def __init__(self, thread: str, interval: float = SAMPLING_INTERVAL) -> None:
+        self.thread = thread
+        self.interval = interval
+        self.stack_counts: "Counter[str]" = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def enable(self) -> None:
+        self._sampler.start()
+
+    def disable(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def dump_stats(self, path: str) -> None:
+        """
+        Writes stacks in the 'collapsed' format, with frames separated by
+        semicolons and followed by the number of samples, as read by eg.
+        speedscope and flamegraph.pl
+        """
+        with open(path, "w") as profile_file:
+            for stack, count in self.stack_counts.most_common():
+                profile_file.write(f"{stack} {count}\n")
+
+    def _sampled_threads(self) -> Set[int]:
+        if self.thread == "main":
+            return {threading.main_thread().ident or 0}
+        return {
+            thread.ident or 0
+            for thread in threading.enumerate()
+            if thread is not self._sampler
+            and (self.thread == "all" or thread.name == EVENTS_THREAD_NAME)
+        }
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            thread_names = {
+                thread.ident: thread.name for thread in threading.enumerate()
+            }
+            sampled_threads = self._sampled_threads()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id not in sampled_threads:
+                    continue
+                stack = [thread_names.get(thread_id, str(thread_id))]
+                stack.extend(reversed(list(_frame_labels(frame))))
+                self.stack_counts[";".join(stack)] += 1
+
+
+def _frame_labels(frame: Optional[FrameType]) -> Iterator[str]:
+    while frame is not None:
+        code = frame.f_code
+        yield f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+        frame = frame.f_back
+
+
+class RuntimeProfiler:
+    """
+    Profiles between each start and stop, saving each capture to a new file
+
+    Deterministic profiling (using cProfile) can only profile the thread in
+    which it is started, which for this application is the main loop thread.
+    """
+
+    def __init__(self, *, mode: str, thread: str) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}'")
+        if thread not in PROFILE_THREADS:
+            raise ValueError(f"Unknown thread to profile '{thread}'")
+        if mode == "deterministic" and thread != "main":
+            raise ValueError(
+                "Deterministic profiling is only possible of the 'main' thread"
+            )
+        self.mode = mode
+        self.thread = thread
+        self.capture_count = 0
+        self._profile: Optional[Union[cProfile.Profile, SamplingProfiler]] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        if self._profile is not None:
+            return
+        profile: Union[cProfile.Profile, SamplingProfiler]
+        if self.mode == "deterministic":
+            profile = cProfile.Profile()
+        else:
+            profile = SamplingProfiler(self.thread)
+        profile.enable()
+        self._profile = profile
+
+    def stop(self) -> Optional[str]:
+        """
+        Stops profiling, returning the path of the saved profile, if started
+        """
+        profile = self._profile
+        if profile is None:
+            return None
+        profile.disable()
+        self._profile = None
+        self.capture_count += 1
+
+        label = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}.{self.capture_count}"
+            f".{self.mode}.{self.thread}"
+        )
+        suffix = ".dat" if self.mode == "deterministic" else ".txt"
+        with tempfile.NamedTemporaryFile(
+            prefix=f"zulip_term_profile.{label}.", suffix=suffix, delete=False
+        ) as profile_file:
+            profile_path = profile_file.name
+        # Dump stats only after temporary file is closed (for Win NT+ case)
+        profile.dump_stats(profile_path)
+        return profile_path
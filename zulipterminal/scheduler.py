@@ -0,0 +1,198 @@
+"""
+Scheduling of requests to the server within its rate limits
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Union
+
+import requests
+import zulip
+from typing_extensions import Literal
+
+from zulipterminal.event_log import RecordingClient
+
+
+Priority = Literal[0, 1, 2]
+USER_ACTION: Priority = 0
+BACKGROUND: Priority = 1
+LOW: Priority = 2
+
+# Calls which are scheduled, by priority; others (eg. the long-polling
+# get_events, or deregister when exiting) are made immediately
+CALL_PRIORITIES: Dict[str, Priority] = {
+    "send_message": USER_ACTION,
+    "update_message": USER_ACTION,
+    "update_message_flags": USER_ACTION,
+    "add_reaction": USER_ACTION,
+    "remove_reaction": USER_ACTION,
+    "update_subscription_settings": USER_ACTION,
+    "get_raw_message": USER_ACTION,
+    "get_message_history": USER_ACTION,
+    "register": BACKGROUND,
+    "get_messages": BACKGROUND,
+    "get_stream_topics": BACKGROUND,
+    "update_presence": LOW,
+    "set_typing_status": LOW,
+}
+
+# Requests left in the rate limit window which only higher priorities may use
+RESERVED_REQUESTS: Dict[Priority, int] = {USER_ACTION: 0, BACKGROUND: 10, LOW: 20}
+
+# Seconds for which a request may be delayed by rate limits, including retries
+MAX_WAIT = 120.0
+
+
+class ScheduledClient:
+    """
+    Wraps a client, delaying requests while the rate limit of the user would
+    be exceeded, as read from the X-RateLimit-* headers of responses, with
+    higher priority requests going first, and retrying rate-limited requests
+
+    Once the UI runs in the main thread, requests made from it are never
+    delayed, returning a rate-limited error to be shown instead.
+    """
+
+    def __init__(self, client: Union[zulip.Client, RecordingClient]) -> None:
+        self._client = client
+        self._condition = threading.Condition()
+        self._waiting: "Counter[int]" = Counter()
+        self._in_flight = 0
+        # Rate limit state, with times as from time.time()
+        self._remaining: Optional[int] = None
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+        # Cleared once the main thread runs the UI, which must not be blocked
+        self.wait_in_main_thread = True
+
+        client.ensure_session()
+        session = client.session
+        if isinstance(session, requests.Session):
+            session.hooks["response"].append(self._read_rate_limit_headers)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if name not in CALL_PRIORITIES:
+            return attribute
+        priority = CALL_PRIORITIES[name]
+
+        def scheduled_call(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            return self._call(priority, attribute, *args, **kwargs)
+
+        return scheduled_call
+
+    def _call(
+        self,
+        priority: Priority,
+        call: Callable[..., Dict[str, Any]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        fail_fast = (
+            not self.wait_in_main_thread
+            and threading.current_thread() is threading.main_thread()
+        )
+        deadline = time.time() + MAX_WAIT
+        while True:
+            if fail_fast:
+                delay = self._take_turn_now(priority)
+                if delay > 0:
+                    return _rate_limited_response(delay)
+            else:
+                self._wait_for_turn(priority, deadline)
+            try:
+                response = call(*args, **kwargs)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._condition.notify_all()
+            retry_after = _retry_after(response)
+            if retry_after is None:
+                return response
+            with self._condition:
+                self._remaining = 0
+                self._blocked_until = max(
+                    self._blocked_until, time.time() + retry_after
+                )
+            if fail_fast or self._blocked_until > deadline:
+                return response
+
+    def _take_turn_now(self, priority: Priority) -> float:
+        """
+        Takes a turn to make a request of this priority if it may be made now,
+        or else returns the seconds until it may be
+        """
+        with self._condition:
+            delay = self._delay(priority, time.time())
+            if delay <= 0:
+                self._in_flight += 1
+            return delay
+
+    def _wait_for_turn(self, priority: Priority, deadline: float) -> None:
+        """
+        Waits until a request of this priority may be made, or the deadline
+        """
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.time()
+                    delay = self._delay(priority, now)
+                    if delay <= 0 or now >= deadline:
+                        self._in_flight += 1
+                        return
+                    self._condition.wait(min(delay, deadline - now))
+            finally:
+                self._waiting[priority] -= 1
+
+    def _delay(self, priority: Priority, now: float) -> float:
+        """
+        Returns the seconds until a request of this priority may be made,
+        which is only an upper bound if waiting for other requests
+        """
+        if self._blocked_until > now:
+            return self._blocked_until - now
+        if any(self._waiting[higher] for higher in range(priority)):
+            return self._reset_at - now if self._reset_at > now else 1.0
+        if self._remaining is None or self._reset_at <= now:
+            return 0
+        if self._remaining - self._in_flight > RESERVED_REQUESTS[priority]:
+            return 0
+        return self._reset_at - now
+
+    def _read_rate_limit_headers(
+        self, response: requests.Response, *args: Any, **kwargs: Any
+    ) -> None:
+        try:
+            remaining = int(response.headers["X-RateLimit-Remaining"])
+            reset_at = float(response.headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        with self._condition:
+            self._remaining = remaining
+            self._reset_at = reset_at
+            self._condition.notify_all()
+
+
+def _rate_limited_response(delay: float) -> Dict[str, Any]:
+    """
+    Returns an error response for a request not made due to rate limits
+    """
+    return {
+        "result": "error",
+        "code": "RATE_LIMIT_HIT",
+        "msg": f"Rate limited by the server; try again in {math.ceil(delay)}s",
+        "retry-after": delay,
+    }
+
+
+def _retry_after(response: Dict[str, Any]) -> Optional[float]:
+    """
+    Returns the seconds after which to retry a rate-limited request, if so
+    """
+    if response.get("code") != "RATE_LIMIT_HIT" and "retry-after" not in response:
+        return None
+    retry_after = response.get("retry-after")
+    return float(retry_after) if isinstance(retry_after, (int, float)) else 1.0
@@ -0,0 +1,345 @@
+"""
+Saving of the event queue and state of a session, to be resumed on restarting
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from zulipterminal.version import ZT_VERSION
+
+
+# Sessions are saved on exiting, and resumed on the next start while the server
+# keeps their event queue (by default, for 10 minutes since last polled)
+SESSION_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"))
+    / "zulip-terminal"
+    / "sessions"
+)
+
+
+def saved_session_path(server_url: str, email: str) -> Path:
+    account = hashlib.sha256(f"{server_url} {email}".encode()).hexdigest()
+    return SESSION_DIR / f"{account}.json"
+
+
+def load_session(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Returns the session saved at path by this version, if any, removing it so
+    that the event queue of a session is only ever resumed once
+    """
+    try:
+        with open(path) as session_file:
+            session = json.load(session_file)
+        os.remove(path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(session, dict) or session.get("version") != ZT_VERSION:
+        return None
+    return session
+
+
+def save_session(path: Path, session: Dict[str, Any]) -> bool:
+    """
+    Saves the session to path, only readable by the user, returning if saved
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a separate file first, so a partial session is never loaded
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False
+        ) as new_session_file:
+            try:
+                json.dump({"version": ZT_VERSION, **session}, new_session_file)
+            except (TypeError, ValueError, RuntimeError):
+                os.remove(new_session_file.name)
+                return False
+        os.replace(new_session_file.name, path)
+    except OSError:
+        return False
+    return True
+
+
+ConversationKey = Tuple[Any, ...]
+
+
+class SessionState:
+    """
+    State as returned by registering for events, kept updated with the events
+    since, so that it can be saved with the event queue
+
+    Only events affecting the state which is used when starting are applied,
+    so the state is only current if every event of the queue is applied.
+    Applying an event more than once leaves the state the same.
+
+    Unread messages are updated in place, finding their conversations by the
+    unread messages and conversations indexed here, rather than by searching
+    all unread messages for every event.
+    """
+
+    def __init__(self, state: Dict[str, Any]) -> None:
+        self.state = state
+        self._unread_conversations: Dict[ConversationKey, Dict[str, Any]] = {}
+        self._unread_message_conversations: Dict[int, ConversationKey] = {}
+        self._unread_mentions: Set[int] = set()
+        if "unread_msgs" in state:
+            self._index_unreads()
+
+    def _index_unreads(self) -> None:
+        unread = self.state["unread_msgs"]
+        self._unread_conversations = {}
+        self._unread_message_conversations = {}
+        for conversations in ("streams", "pms", "huddles"):
+            for conversation in unread[conversations]:
+                key = _conversation_key(conversations, conversation)
+                self._unread_conversations[key] = conversation
+                for message_id in conversation["unread_message_ids"]:
+                    self._unread_message_conversations[message_id] = key
+        self._unread_mentions = set(unread["mentions"])
+
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        state = self.state
+        event_type = event["type"]
+        if event_type == "message":
+            self._apply_message_event(event)
+        elif event_type == "update_message":
+            self._apply_update_message_event(event)
+        elif event_type == "update_message_flags":
+            self._apply_update_message_flags_event(event)
+        elif event_type == "subscription":
+            _apply_subscription_event(state, event)
+        elif event_type == "realm_user":
+            _apply_realm_user_event(state, event)
+        elif event_type == "realm_emoji" and event["op"] == "update":
+            state["realm_emoji"] = event["realm_emoji"]
+        elif event_type == "update_global_notifications":
+            state[event["notification_name"]] = event["setting"]
+        elif event_type == "update_display_settings":
+            state[event["setting_name"]] = event["setting"]
+        elif event_type == "user_settings" and event["op"] == "update":
+            setting = event["property"]
+            if "user_settings" in state:
+                state["user_settings"][setting] = event["value"]
+            if setting in state:  # Also returned directly, before ZFL 89
+                state[setting] = event["value"]
+
+    def _apply_message_event(self, event: Dict[str, Any]) -> None:
+        state = self.state
+        message = event["message"]
+        state["max_message_id"] = max(state.get("max_message_id", -1), message["id"])
+        if "read" in event["flags"] or "unread_msgs" not in state:
+            return
+
+        if message["type"] == "stream":
+            key: ConversationKey = (
+                "streams",
+                message["stream_id"],
+                message["subject"],
+            )
+        else:
+            user_ids = sorted(
+                recipient["id"] for recipient in message["display_recipient"]
+            )
+            if len(user_ids) <= 2:
+                # Keyed by the other user, or the user if messaging themself
+                own_user_id = state["user_id"]
+                other_user_ids = [id for id in user_ids if id != own_user_id]
+                key = ("pms", other_user_ids[0] if other_user_ids else own_user_id)
+            else:
+                key = ("huddles", ",".join(map(str, user_ids)))
+        self._add_unread(key, message["id"])
+
+        mentioned = {"mentioned", "wildcard_mentioned"} & set(event["flags"])
+        if mentioned and message["id"] not in self._unread_mentions:
+            self._unread_mentions.add(message["id"])
+            state["unread_msgs"]["mentions"].append(message["id"])
+
+    def _apply_update_message_event(self, event: Dict[str, Any]) -> None:
+        if "unread_msgs" not in self.state:
+            return
+        new_stream_id = event.get("new_stream_id")
+        new_topic = event.get("subject")
+        if new_stream_id is None and new_topic is None:
+            return  # Only the content was edited
+
+        # Unread messages moved to another stream or topic
+        for message_id in event["message_ids"]:
+            key = self._unread_message_conversations.get(message_id)
+            if key is None or key[0] != "streams":
+                continue
+            _, stream_id, topic = key
+            self._remove_unread(message_id)
+            self._add_unread(
+                (
+                    "streams",
+                    stream_id if new_stream_id is None else new_stream_id,
+                    topic if new_topic is None else new_topic,
+                ),
+                message_id,
+            )
+
+    def _apply_update_message_flags_event(self, event: Dict[str, Any]) -> None:
+        state = self.state
+        # NOTE: 'operation' was renamed to 'op' in ZFL 32
+        operation = event.get("op", event.get("operation"))
+        flag = event["flag"]
+        if flag == "read" and operation == "add" and "unread_msgs" in state:
+            unread = state["unread_msgs"]
+            if event["all"]:
+                for conversations in ("streams", "pms", "huddles", "mentions"):
+                    unread[conversations] = []
+                unread["count"] = 0
+                self._index_unreads()
+                return
+            message_ids = set(event["messages"])
+            for message_id in message_ids:
+                self._remove_unread(message_id)
+            if message_ids & self._unread_mentions:
+                self._unread_mentions -= message_ids
+                unread["mentions"] = [
+                    message_id
+                    for message_id in unread["mentions"]
+                    if message_id in self._unread_mentions
+                ]
+        elif flag == "starred" and "starred_messages" in state:
+            starred = state["starred_messages"]
+            if operation == "add":
+                starred.extend(set(event["messages"]) - set(starred))
+            elif operation == "remove":
+                state["starred_messages"] = [
+                    message_id
+                    for message_id in starred
+                    if message_id not in event["messages"]
+                ]
+
+    def _add_unread(self, key: ConversationKey, message_id: int) -> None:
+        if message_id in self._unread_message_conversations:
+            return
+        unread = self.state["unread_msgs"]
+        conversation = self._unread_conversations.get(key)
+        if conversation is None:
+            conversation = _new_conversation(key)
+            self._unread_conversations[key] = conversation
+            unread[key[0]].append(conversation)
+        conversation["unread_message_ids"].append(message_id)
+        self._unread_message_conversations[message_id] = key
+        unread["count"] += 1
+
+    def _remove_unread(self, message_id: int) -> None:
+        key = self._unread_message_conversations.pop(message_id, None)
+        if key is None:
+            return
+        unread = self.state["unread_msgs"]
+        conversation = self._unread_conversations[key]
+        conversation["unread_message_ids"].remove(message_id)
+        if not conversation["unread_message_ids"]:
+            del self._unread_conversations[key]
+            unread[key[0]].remove(conversation)
+        unread["count"] -= 1
+
+
+def _apply_subscription_event(state: Dict[str, Any], event: Dict[str, Any]) -> None:
+    if "subscriptions" not in state:
+        return
+    op = event["op"]
+    if op == "add":
+        subscribed = {
+            subscription["stream_id"] for subscription in state["subscriptions"]
+        }
+        for subscription in event["subscriptions"]:
+            if subscription["stream_id"] not in subscribed:
+                state["subscriptions"].append(subscription)
+        return
+    if op == "remove":
+        removed = {subscription["stream_id"] for subscription in event["subscriptions"]}
+        state["subscriptions"] = [
+            subscription
+            for subscription in state["subscriptions"]
+            if subscription["stream_id"] not in removed
+        ]
+        return
+
+    # NOTE: Subscriptions are updated by copying, as the model shares them
+    if op == "update":
+        stream_ids = [event["stream_id"]]
+        updated = {event["property"]: event["value"]}
+        # NOTE: in_home_view was replaced by its opposite, is_muted, in ZFL 139
+        if event["property"] == "in_home_view":
+            updated["is_muted"] = not event["value"]
+        elif event["property"] == "is_muted":
+            updated["in_home_view"] = not event["value"]
+    elif op in ("peer_add", "peer_remove"):
+        # NOTE: ZFL 35 commit was not atomic with API change
+        #       (ZFL >=35 can use new plural style)
+        if "stream_ids" not in event or "user_ids" not in event:
+            stream_ids = [event["stream_id"]]
+            user_ids = [event["user_id"]]
+        else:
+            stream_ids = event["stream_ids"]
+            user_ids = event["user_ids"]
+    else:
+        return
+    for position, subscription in enumerate(state["subscriptions"]):
+        if subscription["stream_id"] not in stream_ids:
+            continue
+        if op in ("peer_add", "peer_remove"):
+            if "subscribers" not in subscription:
+                continue
+            subscribers = [
+                user_id
+                for user_id in subscription["subscribers"]
+                if user_id not in user_ids
+            ]
+            if op == "peer_add":
+                subscribers.extend(user_ids)
+            updated = {"subscribers": subscribers}
+        state["subscriptions"][position] = dict(subscription, **updated)
+
+
+def _apply_realm_user_event(state: Dict[str, Any], event: Dict[str, Any]) -> None:
+    if "realm_users" not in state:
+        return
+    person = event["person"]
+    realm_users = state["realm_users"]
+    if event["op"] == "add":
+        if all(user["user_id"] != person["user_id"] for user in realm_users):
+            realm_users.append(person)
+    elif event["op"] == "remove":
+        state["realm_users"] = [
+            user for user in realm_users if user["user_id"] != person["user_id"]
+        ]
+    elif event["op"] == "update":
+        for realm_user in realm_users:
+            if realm_user["user_id"] == person["user_id"]:
+                # realm_users has 'email' attribute and not 'new_email'
+                if "new_email" in person:
+                    realm_user["email"] = person["new_email"]
+                else:
+                    realm_user.update(person)
+                break
+
+
+def _conversation_key(
+    conversations: str, conversation: Dict[str, Any]
+) -> ConversationKey:
+    if conversations == "streams":
+        return ("streams", conversation["stream_id"], conversation["topic"])
+    if conversations == "pms":
+        # NOTE: sender_id was replaced by other_user_id in ZFL 119
+        return ("pms", conversation.get("other_user_id", conversation["sender_id"]))
+    return ("huddles", conversation["user_ids_string"])
+
+
+def _new_conversation(key: ConversationKey) -> Dict[str, Any]:
+    conversation: Dict[str, Any]
+    if key[0] == "streams":
+        conversation = {"stream_id": key[1], "topic": key[2]}
+    elif key[0] == "pms":
+        conversation = {"other_user_id": key[1], "sender_id": key[1]}
+    else:
+        conversation = {"user_ids_string": key[1]}
+    conversation["unread_message_ids"] = []
+    return conversation
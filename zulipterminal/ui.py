@@ -306,6 +306,18 @@ class View(urwid.WidgetWrap):
         elif is_command_key("ABOUT", key):
             self.controller.show_about()
             return key
+        elif is_command_key("PERFORMANCE_METRICS", key):
+            self.controller.show_performance_metrics()
+            return key
+        elif is_command_key("TOGGLE_PROFILER", key):
+            self.controller.toggle_profiler()
+            return key
+        elif is_command_key("CYCLE_THEME", key):
+            self.controller.cycle_theme()
+            return key
+        elif is_command_key("CYCLE_COLOR_DEPTH", key):
+            self.controller.cycle_color_depth()
+            return key
         elif is_command_key("HELP", key):
             # Show help menu
             self.controller.show_help()
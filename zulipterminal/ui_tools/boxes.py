@@ -44,6 +44,7 @@ from zulipterminal.helper import (
     match_user,
     match_user_name_and_email,
 )
+from zulipterminal.instrumentation import metrics
 from zulipterminal.ui_tools.buttons import EditModeButton
 from zulipterminal.urwid_types import urwid_Size
 
@@ -211,7 +212,7 @@ class WriteBox(urwid.Pile):
             multiline=True, max_char=self.model.max_message_length
         )
         self.msg_write_box.enable_autocomplete(
-            func=self.generic_autocomplete,
+            func=metrics.timed("input:autocomplete")(self.generic_autocomplete),
             key=primary_key_for_command("AUTOCOMPLETE"),
             key_reverse=primary_key_for_command("AUTOCOMPLETE_REVERSE"),
         )
@@ -328,7 +329,7 @@ class WriteBox(urwid.Pile):
             multiline=True, max_char=self.model.max_message_length
         )
         self.msg_write_box.enable_autocomplete(
-            func=self.generic_autocomplete,
+            func=metrics.timed("input:autocomplete")(self.generic_autocomplete),
             key=primary_key_for_command("AUTOCOMPLETE"),
             key_reverse=primary_key_for_command("AUTOCOMPLETE_REVERSE"),
         )
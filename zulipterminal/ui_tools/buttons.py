@@ -14,6 +14,7 @@ from zulipterminal.api_types import RESOLVED_TOPIC_PREFIX, EditPropagateMode
 from zulipterminal.config.keys import is_command_key, primary_key_for_command
 from zulipterminal.config.regexes import REGEX_INTERNAL_LINK_STREAM_ID
 from zulipterminal.config.symbols import CHECK_MARK, MUTE_MARKER
+from zulipterminal.config.themes import StyleSpec, ThemeSpec
 from zulipterminal.config.ui_mappings import EDIT_MODE_CAPTIONS, STREAM_ACCESS_TYPE
 from zulipterminal.helper import Message, StreamData, hash_util_decode, process_media
 from zulipterminal.urwid_types import urwid_MarkupTuple, urwid_Size
@@ -168,6 +169,22 @@ class StarredButton(TopButton):
         )
 
 
+def stream_color_styles(color: str, palette: ThemeSpec) -> List[StyleSpec]:
+    """
+    Returns the styles for text in a stream color, and inverted, on the
+    default background of the palette
+    """
+    for entry in palette:
+        if entry[0] is None:
+            background = entry[5] if len(entry) > 4 else entry[2]  # type: ignore[misc]
+            inverse_text = background if background else "black"
+            break
+    return [
+        (color, "", "", "bold", f"{color}, bold", background),
+        ("s" + color, "", "", "standout", inverse_text, color),
+    ]
+
+
 class StreamButton(TopButton):
     def __init__(
         self,
@@ -189,17 +206,7 @@ class StreamButton(TopButton):
         self.count = count
         self.view = view
 
-        for entry in view.palette:
-            if entry[0] is None:
-                background = entry[5] if len(entry) > 4 else entry[2]
-                inverse_text = background if background else "black"
-                break
-        view.palette.append(
-            (self.color, "", "", "bold", f"{self.color}, bold", background)
-        )
-        view.palette.append(
-            ("s" + self.color, "", "", "standout", inverse_text, self.color)
-        )
+        view.palette.extend(stream_color_styles(self.color, view.palette))
 
         stream_marker = STREAM_ACCESS_TYPE[stream_access_type]["icon"]
 
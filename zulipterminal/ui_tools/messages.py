@@ -5,14 +5,13 @@ UI to render a Zulip message for display, and respond contextually to actions
 import typing
 from collections import OrderedDict, defaultdict
 from datetime import date, datetime
+from functools import partial
 from time import time
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
 
-import dateutil.parser
 import urwid
-from bs4 import BeautifulSoup
-from bs4.element import NavigableString, Tag
+from lxml import etree
 from tzlocal import get_localzone
 
 from zulipterminal.config.keys import is_command_key, primary_key_for_command
@@ -23,10 +22,16 @@ from zulipterminal.config.symbols import (
     STREAM_TOPIC_SEPARATOR,
     TIME_MENTION_MARKER,
 )
+from zulipterminal.config.themes import PYGMENTS_ATTRIBUTES
 from zulipterminal.config.ui_mappings import STATE_ICON
 from zulipterminal.helper import Message, get_unused_fence
+from zulipterminal.instrumentation import metrics
 from zulipterminal.server_url import near_message_url
-from zulipterminal.ui_tools.tables import render_table
+from zulipterminal.ui_tools.tables import (
+    parse_etree_table,
+    parse_html_table,
+    render_html_table,
+)
 from zulipterminal.urwid_types import urwid_MarkupTuple, urwid_Size
 
 
@@ -36,19 +41,138 @@ if typing.TYPE_CHECKING:
 # Usernames to show before just showing reaction counts
 MAXIMUM_USERNAMES_VISIBLE = 3
 
+# Table body rows to show in the message list; all are shown in the full view
+MAXIMUM_TABLE_ROWS_VISIBLE = 30
+# Characters per line in truncated message content, so that long content
+# without newlines is also truncated
+MAXIMUM_PREVIEW_LINE_LENGTH = 200
+TRUNCATED_CONTENT_TEMPLATE = "[{} MORE LINES: see full rendered message]"
+# Widths for which to keep the layout of message content, eg. for the widths
+# with and without the side panels shown
+MAXIMUM_CACHED_LAYOUTS = 4
+# Errors from the fast renderer on unexpected HTML, which is then rendered by
+# the BeautifulSoup (legacy) renderer
+RENDERER_FALLBACK_ERRORS = (
+    etree.LxmlError,
+    AttributeError,
+    IndexError,
+    KeyError,
+    TypeError,
+    ValueError,
+)
+
+# Elements in message HTML which are rendered specially, for the markup generators
+UNRENDERED_TAGS = {  # In pairs of 'tag_name': 'text'
+    # TODO: Some of these could be implemented
+    "br": "",  # No indicator of absence
+    "hr": "RULER",
+    "img": "IMAGE",
+}
+UNRENDERED_DIV_CLASSES = {  # In pairs of 'div_class': 'text'
+    # TODO: Support embedded content & twitter preview?
+    "message_embed": "EMBEDDED CONTENT",
+    "inline-preview-twitter": "TWITTER PREVIEW",
+    "message_inline_ref": "",  # Duplicate of other content
+    "message_inline_image": "",  # Duplicate of other content
+}
+UNRENDERED_TEMPLATE = "[{} NOT RENDERED]"
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+MATH_CLASSES = frozenset({"katex-display", "katex"})
+MENTION_CLASSES = frozenset({"user-group-mention", "user-mention"})
+# As treated by BeautifulSoup (and so soup2markup) when parsing HTML
+HTML_ASCII_SPACES = " \n\t\x0c\r"
+WHITESPACE_PRESERVING_TAGS = frozenset({"pre", "textarea"})
+LIST_BULLETS = (
+    "\N{BULLET}",
+    "\N{RING OPERATOR}",  # small hollow
+    "\N{HYPHEN}",
+)
+
 
 class _MessageEditState(NamedTuple):
     message_id: int
     old_topic: str
 
 
+class _LayoutCachingText(urwid.Text):
+    """
+    Text widget keeping its layout (line breaks) for several recent widths,
+    rather than only the last one, until its content changes
+    """
+
+    def __init__(self, markup: Any) -> None:
+        self._layouts: "OrderedDict[int, Any]" = OrderedDict()
+        super().__init__(markup)
+
+    def _invalidate(self) -> None:
+        self._layouts.clear()
+        super()._invalidate()
+
+    def get_line_translation(self, maxcol: int, ta: Any = None) -> Any:
+        if maxcol in self._layouts:
+            self._layouts.move_to_end(maxcol)
+            return self._layouts[maxcol]
+        layout = super().get_line_translation(maxcol, ta)
+        self._layouts[maxcol] = layout
+        if len(self._layouts) > MAXIMUM_CACHED_LAYOUTS:
+            self._layouts.popitem(last=False)
+        return layout
+
+
+def need_recipient_header(narrow: List[Any], message: Message, last_msg: Any) -> bool:
+    """
+    Returns whether a message is shown with a recipient header, when shown after
+    the last message (a defaultdict, for the first message) in the narrow
+    """
+    # Prevent redundant information in recipient bar
+    if len(narrow) == 1 and narrow[0][0] == "pm_with":
+        return False
+    if len(narrow) == 2 and narrow[1][0] == "topic":
+        return False
+
+    if message["type"] == "stream":
+        return not (
+            last_msg["type"] == "stream"
+            and message["subject"] == last_msg["subject"]
+            and message["display_recipient"] == last_msg["display_recipient"]
+        )
+    elif message["type"] == "private":
+        recipient_ids = [
+            {
+                recipient["id"]
+                for recipient in msg["display_recipient"]
+                if "id" in recipient
+            }
+            for msg in (message, last_msg)
+            if "display_recipient" in msg
+        ]
+        return not (
+            len(recipient_ids) == 2
+            and recipient_ids[0] == recipient_ids[1]
+            and last_msg["type"] == "private"
+        )
+    else:
+        raise RuntimeError("Invalid message type")
+
+
 class MessageBox(urwid.Pile):
     # type of last_message is Optional[Message], but needs refactoring
-    def __init__(self, message: Message, model: "Model", last_message: Any) -> None:
+    @metrics.timed("render:MessageBox")
+    def __init__(
+        self,
+        message: Message,
+        model: "Model",
+        last_message: Any,
+        *,
+        full_content: bool = False,
+    ) -> None:
         self.model = model
         self.message = message
+        # Long content is truncated unless the full content is requested
+        self.full_content = full_content
         self.header: List[Any] = []
-        self.content: urwid.Text = urwid.Text("")
+        # Content is re-rendered at different widths, eg. on toggling panels
+        self.content: urwid.Text = _LayoutCachingText("")
         self.footer: List[Any] = []
         self.stream_name = ""
         self.stream_id: Optional[int] = None
@@ -110,36 +234,7 @@ class MessageBox(urwid.Pile):
         super().__init__(self.main_view())
 
     def need_recipient_header(self) -> bool:
-        # Prevent redundant information in recipient bar
-        if len(self.model.narrow) == 1 and self.model.narrow[0][0] == "pm_with":
-            return False
-        if len(self.model.narrow) == 2 and self.model.narrow[1][0] == "topic":
-            return False
-
-        last_msg = self.last_message
-        if self.message["type"] == "stream":
-            return not (
-                last_msg["type"] == "stream"
-                and self.topic_name == last_msg["subject"]
-                and self.stream_name == last_msg["display_recipient"]
-            )
-        elif self.message["type"] == "private":
-            recipient_ids = [
-                {
-                    recipient["id"]
-                    for recipient in message["display_recipient"]
-                    if "id" in recipient
-                }
-                for message in (self.message, last_msg)
-                if "display_recipient" in message
-            ]
-            return not (
-                len(recipient_ids) == 2
-                and recipient_ids[0] == recipient_ids[1]
-                and last_msg["type"] == "private"
-            )
-        else:
-            raise RuntimeError("Invalid message type")
+        return need_recipient_header(self.model.narrow, self.message, self.last_message)
 
     def _is_private_message_to_self(self) -> bool:
         recipient_list = self.message["display_recipient"]
@@ -354,159 +449,201 @@ class MessageBox(urwid.Pile):
         else:
             return text_widget, footlinks_width
 
+    @staticmethod
+    def _link_markup(
+        href: str, link_text: str, metadata: Dict[str, Any]
+    ) -> List[Union[str, Tuple[Optional[str], Any]]]:
+        """
+        Returns the markup for a link, registering it in metadata["message_links"]
+        """
+        # Use rstrip to avoid anomalies and edge cases like
+        # https://google.com vs https://google.com/.
+        link = href.rstrip("/")
+        text = link_text.rstrip("/")
+
+        parsed_link = urlparse(link)
+        if not parsed_link.scheme:  # => relative link
+            # Prepend org url to convert it to an absolute link
+            link = urljoin(metadata["server_url"], link)
+
+        text = text if text else link
+
+        show_footlink = True
+        # Only use the last segment if the text is redundant.
+        # NOTE: The 'without scheme' excerpt is to deal with the case
+        # where a user puts a link without any scheme and the server
+        # uses http as the default scheme but keeps the text as-is.
+        # For instance, see how example.com/some/path becomes
+        # <a href="http://example.com">example.com/some/path</a>.
+        link_without_scheme, text_without_scheme = (
+            data.split("://")[1] if "://" in data else data for data in [link, text]
+        )  # Split on '://' is for cases where text == link.
+        if link_without_scheme == text_without_scheme:
+            last_segment = text.split("/")[-1]
+            if "." in last_segment:
+                new_text = last_segment  # Filename.
+            elif text.startswith(metadata["server_url"]):
+                # Relative URL.
+                new_text = text.split(metadata["server_url"])[-1]
+            else:
+                new_text = (
+                    parsed_link.netloc if parsed_link.netloc else text.split("/")[0]
+                )  # Domain name.
+            if new_text != text_without_scheme:
+                text = new_text
+            else:
+                # Do not show as a footlink as the text is sufficient
+                # to represent the link.
+                show_footlink = False
+
+        # Detect duplicate links to save screen real estate.
+        if link not in metadata["message_links"]:
+            metadata["message_links"][link] = (
+                text,
+                len(metadata["message_links"]) + 1,
+                show_footlink,
+            )
+        else:
+            # Append the text if its link already exist with a
+            # different text.
+            saved_text, saved_link_index, saved_footlink_status = metadata[
+                "message_links"
+            ][link]
+            if saved_text != text:
+                metadata["message_links"][link] = (
+                    f"{saved_text}, {text}",
+                    saved_link_index,
+                    show_footlink or saved_footlink_status,
+                )
+
+        return [
+            ("msg_link", text),
+            " ",
+            ("msg_link_index", f"[{metadata['message_links'][link][1]}]"),
+        ]
+
+    @staticmethod
+    def _time_markup(
+        timestamp: Optional[str], tag_text: str, metadata: Dict[str, Any]
+    ) -> urwid_MarkupTuple:
+        """
+        Returns the markup for a time mention, registering it in
+        metadata["time_mentions"]
+        """
+        # New in feature level 16, server version 3.0.
+        # Render time in current user's local time zone.
+
+        # This should not happen. Regardless, we are interested in
+        # debugging and reporting it to zulip/zulip if it does.
+        assert timestamp is not None, "Could not find datetime attr"
+
+        import dateutil.parser
+
+        utc_time = dateutil.parser.parse(timestamp)
+        local_time = utc_time.astimezone(get_localzone())
+        # TODO: Address 12-hour format support with application-wide
+        # support for different formats.
+        time_string = local_time.strftime("%a, %b %-d %Y, %-H:%M (%Z)")
+
+        source_text = f"Original text was {tag_text.strip()}"
+        metadata["time_mentions"].append((time_string, source_text))
+        return ("msg_time", f" {TIME_MENTION_MARKER} {time_string} ")
+
+    @staticmethod
+    def _list_item_prefix(state: Dict[str, Any]) -> str:
+        indent = state.get("indent_level", 1)
+        if "list_index" in state:
+            prefix = f"{'  ' * indent}{state['list_index']}. "
+            state["list_index"] += 1
+            return prefix
+        return f"{'  ' * indent}{LIST_BULLETS[(indent - 1) % 3]} "
+
+    @staticmethod
+    def _enter_list(state: Dict[str, Any], tag: str, start: Optional[str]) -> None:
+        if "indent_level" not in state:
+            state["indent_level"] = 1
+            state["list_start"] = True
+        else:
+            state["indent_level"] += 1
+            state["list_start"] = False
+        if tag == "ol":
+            state["list_index"] = int(start if start is not None else 1)
+        elif "list_index" in state:
+            del state["list_index"]  # this is unordered
+
     @classmethod
     def soup2markup(
         cls, soup: Any, metadata: Dict[str, Any], **state: Any
     ) -> Tuple[
         List[Any], "OrderedDict[str, Tuple[str, int, bool]]", List[Tuple[str, str]]
     ]:
+        from bs4.element import NavigableString, Tag
+
         # Ensure a string is provided, in case the soup finds none
         # This could occur if eg. an image is removed or not shown
         markup: List[Union[str, Tuple[Optional[str], Any]]] = [""]
         if soup is None:  # This is not iterable, so return promptly
             return markup, metadata["message_links"], metadata["time_mentions"]
-        unrendered_tags = {  # In pairs of 'tag_name': 'text'
-            # TODO: Some of these could be implemented
-            "br": "",  # No indicator of absence
-            "hr": "RULER",
-            "img": "IMAGE",
-        }
-        unrendered_div_classes = {  # In pairs of 'div_class': 'text'
-            # TODO: Support embedded content & twitter preview?
-            "message_embed": "EMBEDDED CONTENT",
-            "inline-preview-twitter": "TWITTER PREVIEW",
-            "message_inline_ref": "",  # Duplicate of other content
-            "message_inline_image": "",  # Duplicate of other content
-        }
-        unrendered_template = "[{} NOT RENDERED]"
         for element in soup:
-            if isinstance(element, Tag):
-                # Caching element variables for use in the
-                # if/elif/else chain below for improving legibility.
-                tag = element.name
-                tag_attrs = element.attrs
-                tag_classes = tag_attrs.get("class", [])
-                tag_text = element.text
-
             if isinstance(element, NavigableString):
                 # NORMAL STRINGS
                 if element == "\n" and metadata.get("bq_len", 0) > 0:
                     metadata["bq_len"] -= 1
                     continue
                 markup.append(element)
-            elif tag == "div" and (set(tag_classes) & set(unrendered_div_classes)):
+                continue
+
+            # Caching element variables for use in the
+            # if/elif/else chain below for improving legibility.
+            # NOTE: element.text is only generated in the branches using it
+            tag = element.name
+            tag_attrs = element.attrs
+            tag_classes = tag_attrs.get("class", [])
+
+            if tag == "div" and not UNRENDERED_DIV_CLASSES.keys().isdisjoint(
+                tag_classes
+            ):
                 # UNRENDERED DIV CLASSES
                 # NOTE: Though `matches` is generalized for multiple
                 # matches it is very unlikely that there would be any.
-                matches = set(unrendered_div_classes) & set(tag_classes)
-                text = unrendered_div_classes[matches.pop()]
+                matches = UNRENDERED_DIV_CLASSES.keys() & set(tag_classes)
+                text = UNRENDERED_DIV_CLASSES[matches.pop()]
                 if text:
-                    markup.append(unrendered_template.format(text))
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
             elif tag == "img" and tag_classes == ["emoji"]:
                 # CUSTOM EMOJIS AND ZULIP_EXTRA_EMOJI
                 emoji_name = tag_attrs.get("title", [])
                 markup.append(("msg_emoji", f":{emoji_name}:"))
-            elif tag in unrendered_tags:
+            elif tag in UNRENDERED_TAGS:
                 # UNRENDERED SIMPLE TAGS
-                text = unrendered_tags[tag]
+                text = UNRENDERED_TAGS[tag]
                 if text:
-                    markup.append(unrendered_template.format(text))
-            elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
+            elif tag in HEADING_TAGS:
                 # HEADING STYLE (h1 to h6)
-                markup.append(("msg_heading", tag_text))
+                markup.append(("msg_heading", element.text))
             elif tag in ("p", "del"):
                 # PARAGRAPH, STRIKE-THROUGH
                 markup.extend(cls.soup2markup(element, metadata)[0])
             elif tag == "span" and "emoji" in tag_classes:
                 # EMOJI
-                markup.append(("msg_emoji", tag_text))
-            elif tag == "span" and ({"katex-display", "katex"} & set(tag_classes)):
+                markup.append(("msg_emoji", element.text))
+            elif tag == "span" and not MATH_CLASSES.isdisjoint(tag_classes):
                 # MATH TEXT
                 # FIXME: Add html -> urwid client-side logic for rendering KaTex text.
                 # Avoid displaying multiple markups, and show only the source
                 # as of now.
-                if element.find("annotation"):
-                    tag_text = element.find("annotation").text
+                annotation = element.find("annotation")
+                tag_text = annotation.text if annotation else element.text
 
                 markup.append(("msg_math", tag_text))
-            elif tag == "span" and (
-                {"user-group-mention", "user-mention"} & set(tag_classes)
-            ):
+            elif tag == "span" and not MENTION_CLASSES.isdisjoint(tag_classes):
                 # USER MENTIONS & USER-GROUP MENTIONS
-                markup.append(("msg_mention", tag_text))
+                markup.append(("msg_mention", element.text))
             elif tag == "a":
                 # LINKS
-                # Use rstrip to avoid anomalies and edge cases like
-                # https://google.com vs https://google.com/.
-                link = tag_attrs["href"].rstrip("/")
-                text = element.img["src"] if element.img else tag_text
-                text = text.rstrip("/")
-
-                parsed_link = urlparse(link)
-                if not parsed_link.scheme:  # => relative link
-                    # Prepend org url to convert it to an absolute link
-                    link = urljoin(metadata["server_url"], link)
-
-                text = text if text else link
-
-                show_footlink = True
-                # Only use the last segment if the text is redundant.
-                # NOTE: The 'without scheme' excerpt is to deal with the case
-                # where a user puts a link without any scheme and the server
-                # uses http as the default scheme but keeps the text as-is.
-                # For instance, see how example.com/some/path becomes
-                # <a href="http://example.com">example.com/some/path</a>.
-                link_without_scheme, text_without_scheme = (
-                    data.split("://")[1] if "://" in data else data
-                    for data in [link, text]
-                )  # Split on '://' is for cases where text == link.
-                if link_without_scheme == text_without_scheme:
-                    last_segment = text.split("/")[-1]
-                    if "." in last_segment:
-                        new_text = last_segment  # Filename.
-                    elif text.startswith(metadata["server_url"]):
-                        # Relative URL.
-                        new_text = text.split(metadata["server_url"])[-1]
-                    else:
-                        new_text = (
-                            parsed_link.netloc
-                            if parsed_link.netloc
-                            else text.split("/")[0]
-                        )  # Domain name.
-                    if new_text != text_without_scheme:
-                        text = new_text
-                    else:
-                        # Do not show as a footlink as the text is sufficient
-                        # to represent the link.
-                        show_footlink = False
-
-                # Detect duplicate links to save screen real estate.
-                if link not in metadata["message_links"]:
-                    metadata["message_links"][link] = (
-                        text,
-                        len(metadata["message_links"]) + 1,
-                        show_footlink,
-                    )
-                else:
-                    # Append the text if its link already exist with a
-                    # different text.
-                    saved_text, saved_link_index, saved_footlink_status = metadata[
-                        "message_links"
-                    ][link]
-                    if saved_text != text:
-                        metadata["message_links"][link] = (
-                            f"{saved_text}, {text}",
-                            saved_link_index,
-                            show_footlink or saved_footlink_status,
-                        )
-
-                markup.extend(
-                    [
-                        ("msg_link", text),
-                        " ",
-                        ("msg_link_index", f"[{metadata['message_links'][link][1]}]"),
-                    ]
-                )
+                text = element.img["src"] if element.img else element.text
+                markup.extend(cls._link_markup(tag_attrs["href"], text, metadata))
             elif tag == "blockquote":
                 # BLOCKQUOTE TEXT
                 markup.append(("msg_quote", cls.soup2markup(element, metadata)[0]))
@@ -517,7 +654,7 @@ class MessageBox(urwid.Pile):
                 Use the same style as plain text codeblocks
                 which is the `whitespace` token of pygments.
                 """
-                markup.append(("pygments:w", tag_text))
+                markup.append(("pygments:w", element.text))
             elif tag == "div" and "codehilite" in tag_classes:
                 """
                 CODE BLOCK
@@ -540,43 +677,29 @@ class MessageBox(urwid.Pile):
                     code_soup = element.pre
 
                 for code_element in code_soup.contents:
-                    code_text = (
-                        code_element.text
-                        if isinstance(code_element, Tag)
-                        else code_element.string
-                    )
-
-                    if code_element.name == "span":
-                        if len(code_text) == 0:
-                            continue
-                        css_style = code_element.attrs.get("class", ["w"])
-                        markup.append((f"pygments:{css_style[0]}", code_text))
+                    if not isinstance(code_element, Tag):
+                        markup.append(("pygments:w", code_element.string))
+                    elif code_element.name == "span":
+                        code_text = code_element.text
+                        if code_text:
+                            css_style = code_element.attrs.get("class", ["w"])
+                            markup.append(
+                                (PYGMENTS_ATTRIBUTES[css_style[0]], code_text)
+                            )
                     else:
-                        markup.append(("pygments:w", code_text))
+                        markup.append(("pygments:w", code_element.text))
             elif tag in ("strong", "em"):
                 # BOLD & ITALIC
-                markup.append(("msg_bold", tag_text))
+                markup.append(("msg_bold", element.text))
             elif tag in ("ul", "ol"):
                 # LISTS (UL & OL)
                 for part in element.contents:
                     if part == "\n":
                         part.replace_with("")
 
-                if "indent_level" not in state:
-                    state["indent_level"] = 1
-                    state["list_start"] = True
-                else:
-                    state["indent_level"] += 1
-                    state["list_start"] = False
-                if tag == "ol":
-                    start_number = int(tag_attrs.get("start", 1))
-                    state["list_index"] = start_number
-                    markup.extend(cls.soup2markup(element, metadata, **state)[0])
-                    del state["list_index"]  # reset at end of this list
-                else:
-                    if "list_index" in state:
-                        del state["list_index"]  # this is unordered
-                    markup.extend(cls.soup2markup(element, metadata, **state)[0])
+                cls._enter_list(state, tag, tag_attrs.get("start"))
+                markup.extend(cls.soup2markup(element, metadata, **state)[0])
+                state.pop("list_index", None)  # reset at end of this list
                 del state["indent_level"]  # reset indents after any list
             elif tag == "li":
                 # LIST ITEMS (LI)
@@ -586,43 +709,221 @@ class MessageBox(urwid.Pile):
                 if not state.get("list_start", False):
                     markup.append("\n")
 
-                indent = state.get("indent_level", 1)
-                if "list_index" in state:
-                    markup.append(f"{'  ' * indent}{state['list_index']}. ")
-                    state["list_index"] += 1
-                else:
-                    chars = [
-                        "\N{BULLET}",
-                        "\N{RING OPERATOR}",  # small hollow
-                        "\N{HYPHEN}",
-                    ]
-                    markup.append(f"{'  ' * indent}{chars[(indent - 1) % 3]} ")
+                markup.append(cls._list_item_prefix(state))
                 state["list_start"] = False
                 markup.extend(cls.soup2markup(element, metadata, **state)[0])
             elif tag == "table":
-                markup.extend(render_table(element))
+                maximum_rows = metadata.get("maximum_table_rows")
+                markup.extend(
+                    render_html_table(
+                        cls._next_table_key(metadata),
+                        maximum_rows,
+                        partial(parse_html_table, element, maximum_rows),
+                    )
+                )
             elif tag == "time":
-                # New in feature level 16, server version 3.0.
-                # Render time in current user's local time zone.
-                timestamp = element.get("datetime")
-
-                # This should not happen. Regardless, we are interested in
-                # debugging and reporting it to zulip/zulip if it does.
-                assert timestamp is not None, "Could not find datetime attr"
-
-                utc_time = dateutil.parser.parse(timestamp)
-                local_time = utc_time.astimezone(get_localzone())
-                # TODO: Address 12-hour format support with application-wide
-                # support for different formats.
-                time_string = local_time.strftime("%a, %b %-d %Y, %-H:%M (%Z)")
-                markup.append(("msg_time", f" {TIME_MENTION_MARKER} {time_string} "))
-
-                source_text = f"Original text was {tag_text.strip()}"
-                metadata["time_mentions"].append((time_string, source_text))
+                markup.append(
+                    cls._time_markup(element.get("datetime"), element.text, metadata)
+                )
             else:
                 markup.extend(cls.soup2markup(element, metadata)[0])
         return markup, metadata["message_links"], metadata["time_mentions"]
 
+    @staticmethod
+    def _etree_contents(element: Any) -> Iterator[Any]:
+        """
+        Yields the children of an lxml element in the same order and form as
+        the `contents` of the equivalent BeautifulSoup tag: text is yielded as
+        strings, other nodes as elements
+        """
+        if element.text is not None:
+            yield element.text
+        for child in element:
+            if isinstance(child.tag, str):
+                yield child
+            elif child.tag is etree.Comment:
+                yield child.text
+            if child.tail is not None:
+                yield child.tail
+
+    @classmethod
+    def _collapse_etree_whitespace(cls, element: Any, preserve: bool = False) -> None:
+        """
+        Replaces whitespace-only text by a single newline or space, as
+        BeautifulSoup does while parsing (outside of <pre> and <textarea>)
+        """
+
+        def collapsed(text: Optional[str]) -> Optional[str]:
+            if not text or text.strip(HTML_ASCII_SPACES):
+                return text
+            return "\n" if "\n" in text else " "
+
+        preserve = preserve or element.tag in WHITESPACE_PRESERVING_TAGS
+        if not preserve:
+            element.text = collapsed(element.text)
+        for child in element:
+            cls._collapse_etree_whitespace(child, preserve)
+            if not preserve:
+                child.tail = collapsed(child.tail)
+
+    @staticmethod
+    def _etree_text(element: Any) -> str:
+        """
+        Returns the text of an lxml element, as generated by `Tag.text`
+        """
+        return "".join(element.itertext())
+
+    @classmethod
+    def _etree_blank_newlines(cls, element: Any) -> None:
+        """
+        Replaces text which is only a newline with empty text, as the lists in
+        soup2markup do for their direct contents
+        """
+        if element.text == "\n":
+            element.text = ""
+        for child in element:
+            if child.tail == "\n":
+                child.tail = ""
+
+    @classmethod
+    def etree2markup(
+        cls, root: Any, metadata: Dict[str, Any], **state: Any
+    ) -> Tuple[
+        List[Any], "OrderedDict[str, Tuple[str, int, bool]]", List[Tuple[str, str]]
+    ]:
+        """
+        Generates the same markup as soup2markup, but from an lxml element tree,
+        which is much faster to build and traverse than BeautifulSoup objects
+        """
+        markup: List[Union[str, Tuple[Optional[str], Any]]] = [""]
+        if root is None:
+            return markup, metadata["message_links"], metadata["time_mentions"]
+        for element in cls._etree_contents(root):
+            if isinstance(element, str):
+                # NORMAL STRINGS
+                if element == "\n" and metadata.get("bq_len", 0) > 0:
+                    metadata["bq_len"] -= 1
+                    continue
+                markup.append(element)
+                continue
+
+            tag = element.tag
+            tag_classes = element.get("class", "").split()
+
+            if tag == "div" and not UNRENDERED_DIV_CLASSES.keys().isdisjoint(
+                tag_classes
+            ):
+                # UNRENDERED DIV CLASSES
+                matches = UNRENDERED_DIV_CLASSES.keys() & set(tag_classes)
+                text = UNRENDERED_DIV_CLASSES[matches.pop()]
+                if text:
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
+            elif tag == "img" and tag_classes == ["emoji"]:
+                # CUSTOM EMOJIS AND ZULIP_EXTRA_EMOJI
+                emoji_name = element.get("title", [])
+                markup.append(("msg_emoji", f":{emoji_name}:"))
+            elif tag in UNRENDERED_TAGS:
+                # UNRENDERED SIMPLE TAGS
+                text = UNRENDERED_TAGS[tag]
+                if text:
+                    markup.append(UNRENDERED_TEMPLATE.format(text))
+            elif tag in HEADING_TAGS:
+                # HEADING STYLE (h1 to h6)
+                markup.append(("msg_heading", cls._etree_text(element)))
+            elif tag in ("p", "del"):
+                # PARAGRAPH, STRIKE-THROUGH
+                markup.extend(cls.etree2markup(element, metadata)[0])
+            elif tag == "span" and "emoji" in tag_classes:
+                # EMOJI
+                markup.append(("msg_emoji", cls._etree_text(element)))
+            elif tag == "span" and not MATH_CLASSES.isdisjoint(tag_classes):
+                # MATH TEXT
+                annotation = element.find(".//annotation")
+                tag_text = cls._etree_text(
+                    annotation if annotation is not None else element
+                )
+                markup.append(("msg_math", tag_text))
+            elif tag == "span" and not MENTION_CLASSES.isdisjoint(tag_classes):
+                # USER MENTIONS & USER-GROUP MENTIONS
+                markup.append(("msg_mention", cls._etree_text(element)))
+            elif tag == "a":
+                # LINKS
+                image = element.find(".//img")
+                text = (
+                    image.attrib["src"]
+                    if image is not None
+                    else cls._etree_text(element)
+                )
+                markup.extend(cls._link_markup(element.attrib["href"], text, metadata))
+            elif tag == "blockquote":
+                # BLOCKQUOTE TEXT
+                markup.append(("msg_quote", cls.etree2markup(element, metadata)[0]))
+            elif tag == "code":
+                # CODE INLINE (see soup2markup)
+                markup.append(("pygments:w", cls._etree_text(element)))
+            elif tag == "div" and "codehilite" in tag_classes:
+                # CODE BLOCK (see soup2markup)
+                pre = element.find(".//pre")
+                code = pre.find(".//code")
+                # NOTE: Old messages don't have the additional `code` tag.
+                if code is None:
+                    code = pre
+
+                for code_element in cls._etree_contents(code):
+                    if isinstance(code_element, str):
+                        markup.append(("pygments:w", code_element))
+                    elif code_element.tag == "span":
+                        # Highlighted spans very rarely contain other elements
+                        code_text = (
+                            cls._etree_text(code_element)
+                            if len(code_element)
+                            else code_element.text
+                        )
+                        if code_text:
+                            css_style = code_element.get("class", "w").split()
+                            markup.append(
+                                (PYGMENTS_ATTRIBUTES[css_style[0]], code_text)
+                            )
+                    else:
+                        markup.append(("pygments:w", cls._etree_text(code_element)))
+            elif tag in ("strong", "em"):
+                # BOLD & ITALIC
+                markup.append(("msg_bold", cls._etree_text(element)))
+            elif tag in ("ul", "ol"):
+                # LISTS (UL & OL)
+                cls._etree_blank_newlines(element)
+                cls._enter_list(state, tag, element.get("start"))
+                markup.extend(cls.etree2markup(element, metadata, **state)[0])
+                state.pop("list_index", None)  # reset at end of this list
+                del state["indent_level"]  # reset indents after any list
+            elif tag == "li":
+                # LIST ITEMS (LI)
+                cls._etree_blank_newlines(element)
+                if not state.get("list_start", False):
+                    markup.append("\n")
+
+                markup.append(cls._list_item_prefix(state))
+                state["list_start"] = False
+                markup.extend(cls.etree2markup(element, metadata, **state)[0])
+            elif tag == "table":
+                maximum_rows = metadata.get("maximum_table_rows")
+                markup.extend(
+                    render_html_table(
+                        cls._next_table_key(metadata),
+                        maximum_rows,
+                        partial(parse_etree_table, element, maximum_rows),
+                    )
+                )
+            elif tag == "time":
+                markup.append(
+                    cls._time_markup(
+                        element.get("datetime"), cls._etree_text(element), metadata
+                    )
+                )
+            else:
+                markup.extend(cls.etree2markup(element, metadata)[0])
+        return markup, metadata["message_links"], metadata["time_mentions"]
+
     def main_view(self) -> List[Any]:
         # Recipient Header
         if self.need_recipient_header():
@@ -719,10 +1020,28 @@ class MessageBox(urwid.Pile):
                 "/me", f"<strong>{self.message['sender_full_name']}</strong>", 1
             )
 
+        # Limit the size of long content, unless showing it in full
+        if self.full_content:
+            maximum_table_rows, maximum_lines = None, 0
+        else:
+            maximum_table_rows = MAXIMUM_TABLE_ROWS_VISIBLE
+            maximum_lines = self.model.controller.maximum_message_lines
+
         # Transform raw message content into markup (As needed by urwid.Text)
         content, self.message_links, self.time_mentions = self.transform_content(
-            self.message["content"], self.model.server_url
+            self.message["content"],
+            self.model.server_url,
+            self.model.controller.renderer,
+            maximum_table_rows=maximum_table_rows,
+            message_id=self.message["id"],
         )
+        if maximum_lines:
+            content, hidden_lines = self.truncate_content(content, maximum_lines)
+            if hidden_lines:
+                content = (
+                    None,
+                    [content, "\n" + TRUNCATED_CONTENT_TEMPLATE.format(hidden_lines)],
+                )
         self.content.set_text(content)
 
         if self.message["id"] in self.model.index["edited_messages"]:
@@ -802,14 +1121,95 @@ class MessageBox(urwid.Pile):
 
         return author_is_present
 
+    @staticmethod
+    def truncate_content(content: Any, maximum_lines: int) -> Tuple[Any, int]:
+        """
+        Returns content markup limited to `maximum_lines` lines (each of limited
+        length), with the number of lines which were removed
+        """
+        text, attributes = urwid.util.decompose_tagmarkup(content)
+        lines = text.split("\n", maximum_lines)
+        end = min(
+            len(text) - len(lines[-1]) - 1 if len(lines) > maximum_lines else len(text),
+            maximum_lines * MAXIMUM_PREVIEW_LINE_LENGTH,
+        )
+        if not text[end:].strip():
+            return content, 0
+
+        hidden_lines = text.count("\n", end) + (text[end] != "\n")
+
+        markup: List[Union[str, Tuple[Optional[str], str]]] = []
+        start = 0
+        for attribute, length in attributes:
+            if start >= end:
+                break
+            markup.append((attribute, text[start : min(start + length, end)]))
+            start += length
+        if start < end:
+            markup.append(text[start:end])
+        return markup, hidden_lines
+
     @classmethod
     def transform_content(
-        cls, content: Any, server_url: str
+        cls,
+        content: Any,
+        server_url: str,
+        renderer: str = "fast",
+        *,
+        maximum_table_rows: Optional[int] = None,
+        message_id: Optional[int] = None,
     ) -> Tuple[
         Tuple[None, Any],
         "OrderedDict[str, Tuple[str, int, bool]]",
         List[Tuple[str, str]],
     ]:
+        """
+        Rendered tables of a message are cached if message_id is given
+        """
+        # NOTE: Strings cache their hash, so this is only computed once
+        table_key = None if message_id is None else (message_id, hash(content))
+        if renderer != "legacy":
+            try:
+                return cls._transform_content_with_etree(
+                    content, server_url, maximum_table_rows, table_key
+                )
+            except RENDERER_FALLBACK_ERRORS:
+                # Fall back to the BeautifulSoup renderer for any HTML which the
+                # fast renderer cannot handle, timing it so that this is visible
+                with metrics.timer("render:legacy_fallback"):
+                    return cls._transform_content_with_soup(
+                        content, server_url, maximum_table_rows, table_key
+                    )
+        return cls._transform_content_with_soup(
+            content, server_url, maximum_table_rows, table_key
+        )
+
+    @staticmethod
+    def _next_table_key(metadata: Dict[str, Any]) -> Optional[Tuple[int, int, int]]:
+        """
+        Returns the cache key of the next table in the content, if cached
+        """
+        table_index = metadata.get("table_count", 0)
+        metadata["table_count"] = table_index + 1
+        if metadata.get("table_key") is None:
+            return None
+        message_id, content_hash = metadata["table_key"]
+        return (message_id, content_hash, table_index)
+
+    @classmethod
+    def _transform_content_with_soup(
+        cls,
+        content: Any,
+        server_url: str,
+        maximum_table_rows: Optional[int],
+        table_key: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[
+        Tuple[None, Any],
+        "OrderedDict[str, Tuple[str, int, bool]]",
+        List[Tuple[str, str]],
+    ]:
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(content, "lxml")
         body = soup.find(name="body")
 
@@ -817,6 +1217,9 @@ class MessageBox(urwid.Pile):
             server_url=server_url,
             message_links=OrderedDict(),
             time_mentions=list(),
+            maximum_table_rows=maximum_table_rows,
+            table_key=table_key,
+            table_count=0,
         )  # type: Dict[str, Any]
 
         if body and body.find(name="blockquote"):
@@ -825,6 +1228,47 @@ class MessageBox(urwid.Pile):
         markup, message_links, time_mentions = cls.soup2markup(body, metadata)
         return (None, markup), message_links, time_mentions
 
+    @classmethod
+    def _transform_content_with_etree(
+        cls,
+        content: Any,
+        server_url: str,
+        maximum_table_rows: Optional[int],
+        table_key: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[
+        Tuple[None, Any],
+        "OrderedDict[str, Tuple[str, int, bool]]",
+        List[Tuple[str, str]],
+    ]:
+        # NOTE: This is the same parser, fed in the same way, as BeautifulSoup
+        # uses for "lxml", so that malformed HTML is recovered identically
+        parser = etree.HTMLParser()
+        parser.feed(content)
+        try:
+            root = parser.close()
+        except etree.XMLSyntaxError:  # eg. empty document
+            root = None
+        body = root.find("body") if root is not None else None
+        if body is not None:
+            cls._collapse_etree_whitespace(body)
+
+        metadata = dict(
+            server_url=server_url,
+            message_links=OrderedDict(),
+            time_mentions=list(),
+            maximum_table_rows=maximum_table_rows,
+            table_key=table_key,
+            table_count=0,
+        )  # type: Dict[str, Any]
+
+        if body is not None and body.find(".//blockquote") is not None:
+            metadata["bq_len"] = cls.indent_etree_quoted_content(
+                root, QUOTED_TEXT_MARKER
+            )
+
+        markup, message_links, time_mentions = cls.etree2markup(body, metadata)
+        return (None, markup), message_links, time_mentions
+
     @staticmethod
     def indent_quoted_content(soup: Any, padding_char: str) -> int:
         """
@@ -877,6 +1321,71 @@ class MessageBox(urwid.Pile):
             pad_count += 1
         return bq_len
 
+    @staticmethod
+    def _etree_string(element: Any) -> Optional[str]:
+        """
+        Returns the text of an lxml element, as generated by `Tag.string`; that
+        is, the text only if there is a single (possibly nested) child string
+        """
+        contents = list(MessageBox._etree_contents(element))
+        if len(contents) != 1:
+            return None
+        if isinstance(contents[0], str):
+            return contents[0]
+        return MessageBox._etree_string(contents[0])
+
+    @staticmethod
+    def indent_etree_quoted_content(root: Any, padding_char: str) -> int:
+        """
+        Pads quoted text in an lxml element tree, exactly as
+        indent_quoted_content does for BeautifulSoup
+        """
+
+        def new_paragraph(text: str) -> Any:
+            paragraph = etree.Element("p")
+            paragraph.text = text
+            return paragraph
+
+        pad_count = 1
+        blockquote_list = list(root.iter("blockquote"))
+        bq_len = len(blockquote_list)
+        for tag in blockquote_list:
+            child_list = [child for child in tag if isinstance(child.tag, str)]
+            has_child_block = tag.find(".//blockquote") is not None
+            actual_padding = f"{padding_char} " * pad_count
+            if len(child_list) == 1:
+                pad_count -= 1
+                child_iterator = child_list
+            else:
+                if not has_child_block:
+                    child_iterator = child_list
+                else:
+                    # If there is some text at the beginning of a
+                    # quote, we pad it separately.
+                    if child_list[0].tag == "p":
+                        child_list[0].addprevious(new_paragraph(f"\n{actual_padding}"))
+                    child_iterator = child_list[1:]
+            for child in child_iterator:
+                # If the quoted message is multi-line message
+                # we deconstruct it and pad it at break-points (<br/>)
+                for br in list(child.iterdescendants("br")):
+                    if br.tail is not None:
+                        text = br.tail.strip()
+                        if text:
+                            br.tail = None
+                            br.addnext(new_paragraph(f"\n{padding_char} {text}"))
+                    else:
+                        next_element = br.getnext()
+                        # NOTE: As with BeautifulSoup, this fails without a sibling
+                        text = str(MessageBox._etree_string(next_element)).strip()
+                        if text:
+                            insert_tag = new_paragraph(f"\n{padding_char} {text}")
+                            insert_tag.tail, next_element.tail = next_element.tail, None
+                            next_element.getparent().replace(next_element, insert_tag)
+                child.addprevious(new_paragraph(actual_padding))
+            pad_count += 1
+        return bq_len
+
     def selectable(self) -> bool:
         # Returning True, indicates that this widget
         # is designed to take focus.
@@ -2,12 +2,26 @@
 Helper functions which render tables in the UI
 """
 
-from typing import Any, List, Optional, Tuple, Union, cast
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union, cast
 
 from zulipterminal.urwid_types import urwid_MarkupTuple
 
 
-def parse_html_table(table_element: Any) -> Tuple[List[str], List[List[str]]]:
+# Number of distinct rendered tables to keep, to avoid re-parsing and
+# re-rendering them
+TABLE_CACHE_SIZE = 128
+
+HIDDEN_ROWS_TEMPLATE = "[{} MORE ROWS: see full rendered message]"
+
+# Column alignments, cells (with the header row first) and hidden row count
+ParsedTable = Tuple[List[str], List[List[str]], int]
+
+
+def parse_html_table(
+    table_element: Any, maximum_rows: Optional[int] = None
+) -> ParsedTable:
     """
     Parses an HTML table to extract cell items and column alignments.
 
@@ -15,13 +29,17 @@ def parse_html_table(table_element: Any) -> Tuple[List[str], List[List[str]]]:
     cells = [[row0, row0, row0],
              [row1, row1, row1],
              [row2, row2, row2]]
+
+    Only the first `maximum_rows` body rows are extracted, if specified; the
+    number of remaining rows is returned as the hidden row count.
     """
     headers = table_element.thead.tr.find_all("th")
     rows = table_element.tbody.find_all("tr")
+    hidden_rows = hidden_row_count(len(rows), maximum_rows)
     column_alignments = []
 
     # Add +1 to count the header row as well.
-    cells: List[List[str]] = [[] for _ in range(len(rows) + 1)]
+    cells: List[List[str]] = [[] for _ in range(len(rows) - hidden_rows + 1)]
 
     # Fill up `cells` with the header/0th row and extract alignments.
     for header in headers:
@@ -29,10 +47,35 @@ def parse_html_table(table_element: Any) -> Tuple[List[str], List[List[str]]]:
         column_alignments.append(header.get(("align"), "left"))
 
     # Fill up `cells` with body rows.
-    for index, row in enumerate(rows, start=1):
+    for index, row in enumerate(rows[: len(rows) - hidden_rows], start=1):
         for tdata in row.find_all("td"):
             cells[index].append(tdata.text)
-    return (column_alignments, cells)
+    return (column_alignments, cells, hidden_rows)
+
+
+def parse_etree_table(
+    table_element: Any, maximum_rows: Optional[int] = None
+) -> ParsedTable:
+    """
+    Parses an HTML table from an lxml element tree, as for parse_html_table.
+    """
+    headers = table_element.find(".//thead").find(".//tr").findall(".//th")
+    rows = table_element.find(".//tbody").findall(".//tr")
+    hidden_rows = hidden_row_count(len(rows), maximum_rows)
+
+    column_alignments = [header.get("align", "left") for header in headers]
+    cells = [["".join(header.itertext()) for header in headers]]
+    cells.extend(
+        ["".join(tdata.itertext()) for tdata in row.findall(".//td")]
+        for row in rows[: len(rows) - hidden_rows]
+    )
+    return (column_alignments, cells, hidden_rows)
+
+
+def hidden_row_count(total_rows: int, maximum_rows: Optional[int]) -> int:
+    if maximum_rows is None:
+        return 0
+    return max(0, total_rows - maximum_rows)
 
 
 StyledTableData = List[Union[str, urwid_MarkupTuple]]
@@ -76,8 +119,8 @@ def pad_row_strip(
 
 
 def row_with_styled_content(
-    row: List[str],
-    column_alignments: List[str],
+    row: Sequence[str],
+    column_alignments: Sequence[str],
     column_widths: List[int],
     vertical_bar: str,
     row_style: Optional[str] = None,
@@ -120,12 +163,49 @@ def row_with_only_border(
     return pad_row_strip(border, fill_char=line)
 
 
-def render_table(table_element: Any) -> StyledTableData:
-    """
-    A helper function for rendering a markup table in the MessageBox.
+# Rendered tables, by the message id, hash of its content and position of each
+# table in it, and the maximum rows parsed
+_rendered_tables: (
+    "OrderedDict[Tuple[Tuple[int, int, int], Optional[int]], StyledTableData]"
+) = OrderedDict()
+_rendered_tables_lock = threading.Lock()
+
+
+def render_html_table(
+    table_key: Optional[Tuple[int, int, int]],
+    maximum_rows: Optional[int],
+    parse_table: Callable[[], ParsedTable],
+) -> StyledTableData:
     """
-    column_alignments, cells = parse_html_table(table_element)
+    Renders a table from message HTML, parsing it using `parse_table`.
 
+    Rendered tables are cached by table_key, if given, so re-rendering the same
+    table (eg. when its message is rebuilt on changing narrow) neither parses
+    nor renders it again, and only copies the result. Both renderers render
+    tables identically, so share cached tables.
+    """
+    if table_key is None:
+        return render_table(*parse_table())
+    key = (table_key, maximum_rows)
+    with _rendered_tables_lock:
+        if key in _rendered_tables:
+            _rendered_tables.move_to_end(key)
+            return list(_rendered_tables[key])
+
+    table = render_table(*parse_table())
+    with _rendered_tables_lock:
+        _rendered_tables[key] = table
+        if len(_rendered_tables) > TABLE_CACHE_SIZE:
+            _rendered_tables.popitem(last=False)
+    return list(table)
+
+
+def render_table(
+    column_alignments: List[str], cells: List[List[str]], hidden_rows: int = 0
+) -> StyledTableData:
+    """
+    A helper function for rendering a parsed markup table in the MessageBox.
+    """
     # Calculate the width required for each column.
     column_widths = [
         len(max(column, key=lambda string: len(string))) for column in zip(*cells)
@@ -141,20 +221,25 @@ def render_table(table_element: Any) -> StyledTableData:
     table: StyledTableData = []
 
     # Add the header/0th row and the borders that surround it to the table.
+    header_row, *body_rows = cells
     table.extend(top_border)
     table.extend(
         row_with_styled_content(
-            cells.pop(0), column_alignments, column_widths, "│", row_style="table_head"
+            header_row, column_alignments, column_widths, "│", row_style="table_head"
         )
     )
     table.extend(middle_border)
 
     # Add the body rows to the table followed by the bottom-most border in the
     # end.
-    for row in cells:
+    for row in body_rows:
         table.extend(
             row_with_styled_content(row, column_alignments, column_widths, "│")
         )
     table.extend(bottom_border)
 
+    # Indicate any rows which were not parsed, so are not displayed.
+    if hidden_rows:
+        table.append("\n" + HIDDEN_ROWS_TEMPLATE.format(hidden_rows))
+
     return table
@@ -2,14 +2,82 @@
 The `MessageBox` for every message displayed is created here
 """
 
-from typing import Any, Iterable, List, Optional
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Iterable, List, Optional, Tuple
 
 import urwid
 
 from zulipterminal.api_types import Message
-from zulipterminal.ui_tools.messages import MessageBox
+from zulipterminal.instrumentation import metrics
+from zulipterminal.ui_tools.messages import MessageBox, need_recipient_header
 
 
+# Maximum number of MessageBox widgets kept for reuse, eg. on switching narrows
+MESSAGE_BOX_CACHE_SIZE = 1000
+
+# Previous message id, whether a recipient header is shown, and sender status
+_MessageBoxKey = Tuple[Optional[int], bool, Optional[str]]
+
+
+class MessageBoxCache:
+    """
+    MessageBox for recently shown messages, reused when shown again after the
+    same message and with the same recipient header, eg. on returning to a narrow
+    or switching between a stream and one of its topics
+
+    Messages are invalidated (with any shown after them) when they change.
+    """
+
+    def __init__(self, maximum_size: int = MESSAGE_BOX_CACHE_SIZE) -> None:
+        self.maximum_size = maximum_size
+        # Widgets are created from both the main and event threads
+        self._lock = threading.Lock()
+        self._boxes: "OrderedDict[int, Tuple[_MessageBoxKey, MessageBox]]" = (
+            OrderedDict()
+        )
+
+    def get(self, message: Message, model: Any, last_message: Any) -> MessageBox:
+        user = model.user_dict.get(message.get("sender_email", ""))
+        key: _MessageBoxKey = (
+            last_message.get("id") if last_message else None,
+            need_recipient_header(
+                model.narrow, message, last_message or defaultdict(dict)
+            ),
+            user.get("status") if user else None,
+        )
+        message_id = message["id"]
+        with self._lock:
+            cached = self._boxes.get(message_id)
+            if cached is not None and cached[0] == key:
+                self._boxes.move_to_end(message_id)
+                return cached[1]
+
+        message_box = MessageBox(message, model, last_message)
+        with self._lock:
+            self._boxes[message_id] = (key, message_box)
+            self._boxes.move_to_end(message_id)
+            if len(self._boxes) > self.maximum_size:
+                self._boxes.popitem(last=False)
+        return message_box
+
+    def invalidate(self, message_id: int) -> None:
+        with self._lock:
+            self._boxes.pop(message_id, None)
+            # Content headers depend upon the previous message
+            for later_id in [
+                later_id
+                for later_id, (key, _) in self._boxes.items()
+                if key[0] == message_id
+            ]:
+                del self._boxes[later_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._boxes.clear()
+
+
+@metrics.timed("render:create_msg_box_list")
 def create_msg_box_list(
     model: Any,
     messages: Optional[Iterable[Any]] = None,
@@ -48,7 +116,11 @@ def create_msg_box_list(
         if msg["id"] == focus_msg_id:
             focus_msg = message_list.index(msg) - muted_msgs
         w_list.append(
-            urwid.AttrMap(MessageBox(msg, model, last_msg), msg_flag, "msg_selected")
+            urwid.AttrMap(
+                model.message_box_cache.get(msg, model, last_msg),
+                msg_flag,
+                "msg_selected",
+            )
         )
         last_msg = msg
     if focus_msg is not None:
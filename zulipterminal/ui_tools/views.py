@@ -3,6 +3,7 @@ UI views for larger elements such as Streams, Messages, Topics, Help, etc
 """
 
 import threading
+import time
 from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
@@ -35,6 +36,7 @@ from zulipterminal.config.ui_mappings import (
 )
 from zulipterminal.config.ui_sizes import LEFT_WIDTH
 from zulipterminal.helper import (
+    NEWEST_MESSAGE_ID,
     Message,
     TidiedUserInfo,
     asynch,
@@ -42,6 +44,7 @@ from zulipterminal.helper import (
     match_stream,
     match_user,
 )
+from zulipterminal.instrumentation import Histogram
 from zulipterminal.server_url import near_message_url
 from zulipterminal.ui_tools.boxes import PanelSearchBox
 from zulipterminal.ui_tools.buttons import (
@@ -57,12 +60,20 @@ from zulipterminal.ui_tools.buttons import (
 )
 from zulipterminal.ui_tools.messages import MessageBox
 from zulipterminal.ui_tools.utils import create_msg_box_list
-from zulipterminal.urwid_types import urwid_Size
+from zulipterminal.urwid_types import urwid_Box, urwid_Size
 
 
 MIDDLE_COLUMN_MOUSE_SCROLL_LINES = 1
 SIDE_PANELS_MOUSE_SCROLL_LINES = 5
 
+# Range of messages fetched per page of older/newer messages
+MIN_PAGE_MESSAGES = 30
+MAX_PAGE_MESSAGES = 100
+# Seconds taken to fetch a page, for each extra screen of messages per page
+PAGE_FETCH_SECONDS_PER_SCREEN = 0.5
+# Weight of the latest duration in the average duration of fetching a page
+PAGE_FETCH_DURATION_WEIGHT = 0.3
+
 
 class ModListWalker(urwid.SimpleFocusListWalker):
     def set_focus(self, position: int) -> None:
@@ -115,6 +126,12 @@ class MessageView(urwid.ListBox):
         # if loading new/old messages - True
         self.old_loading = False
         self.new_loading = False
+        # if reading ahead new/old messages - True; unlike loading, this does
+        # not stop moving through the messages already shown
+        self.old_reading_ahead = False
+        self.new_reading_ahead = False
+        # Average seconds to fetch a page of older/newer messages
+        self.page_fetch_duration = 0.0
 
     def main_view(self) -> List[Any]:
         msg_btn_list = create_msg_box_list(self.model)
@@ -124,11 +141,102 @@ class MessageView(urwid.ListBox):
         self.focus_msg = focus_msg
         return msg_btn_list
 
+    def has_older_messages(self, anchor: int) -> bool:
+        """
+        Returns whether older messages than those shown may exist in the narrow
+        """
+        contiguous_range = self.model.get_contiguous_range_in_current_narrow(anchor)
+        return contiguous_range is None or contiguous_range[0] != 0
+
+    def has_newer_messages(self, anchor: int) -> bool:
+        """
+        Returns whether newer messages than those shown may exist in the narrow
+        """
+        contiguous_range = self.model.get_contiguous_range_in_current_narrow(anchor)
+        return contiguous_range is None or contiguous_range[1] != NEWEST_MESSAGE_ID
+
+    def page_size(self, size: urwid_Box) -> int:
+        """
+        Returns the number of messages to fetch per page, being at least enough
+        to fill the screen (for messages of one line), and more when fetching
+        is slower, so that fewer fetches are needed while scrolling
+        """
+        _, rows = size
+        screens = 1 + int(self.page_fetch_duration / PAGE_FETCH_SECONDS_PER_SCREEN)
+        return max(MIN_PAGE_MESSAGES, min(MAX_PAGE_MESSAGES, rows * screens))
+
+    def _fetch_page(self, *, num_before: int, num_after: int, anchor: int) -> bool:
+        """
+        Returns whether the narrow is unchanged after fetching, since messages
+        fetched for a previous narrow must not be shown
+        """
+        narrow_generation = self.model.narrow_generation
+        start = time.perf_counter()
+        self.model.get_messages(
+            num_before=num_before, num_after=num_after, anchor=anchor
+        )
+        self.page_fetch_duration += PAGE_FETCH_DURATION_WEIGHT * (
+            time.perf_counter() - start - self.page_fetch_duration
+        )
+        return narrow_generation == self.model.narrow_generation
+
+    def read_ahead(self, size: urwid_Box) -> None:
+        """
+        Starts loading older/newer messages in the background, when the focus is
+        within half a page of the first/last message shown, so that scrolling
+        reaches them after they are loaded
+        """
+        if self.focus is None:
+            return
+        page_size = self.page_size(size)
+        if (
+            not self.old_loading
+            and not self.old_reading_ahead
+            and self.focus_position < page_size // 2
+        ):
+            top_message_id = self.log[0].original_widget.message["id"]
+            if self.has_older_messages(top_message_id):
+                self.old_reading_ahead = True
+                self.read_ahead_old_messages(top_message_id, page_size)
+        if (
+            not self.new_loading
+            and not self.new_reading_ahead
+            and len(self.log) - 1 - self.focus_position < page_size // 2
+        ):
+            bottom_message_id = self.log[-1].original_widget.message["id"]
+            if self.has_newer_messages(bottom_message_id):
+                self.new_reading_ahead = True
+                self.read_ahead_new_messages(bottom_message_id, page_size)
+
     @asynch
-    def load_old_messages(self, anchor: int) -> None:
+    def read_ahead_old_messages(self, anchor: int, num_messages: int) -> None:
+        try:
+            self._load_old_messages(anchor, num_messages)
+        finally:
+            self.old_reading_ahead = False
+
+    @asynch
+    def read_ahead_new_messages(self, anchor: int, num_messages: int) -> None:
+        try:
+            self._load_new_messages(anchor, num_messages)
+        finally:
+            self.new_reading_ahead = False
+
+    @asynch
+    def load_old_messages(
+        self, anchor: int, num_messages: int = MIN_PAGE_MESSAGES
+    ) -> None:
         self.old_loading = True
+        try:
+            self._load_old_messages(anchor, num_messages)
+        finally:
+            self.old_loading = False
+
+    def _load_old_messages(self, anchor: int, num_messages: int) -> None:
+        if not self.has_older_messages(anchor):
+            return  # The oldest message is already shown
 
-        ids_to_keep = self.model.get_message_ids_in_current_narrow()
+        ids_to_keep = self.model.get_message_ids_in_current_narrow(anchor)
         if self.log:
             top_message_id = self.log[0].original_widget.message["id"]
             ids_to_keep.remove(top_message_id)  # update this id
@@ -136,11 +244,16 @@ class MessageView(urwid.ListBox):
         else:
             no_update_baseline = set()
 
-        self.model.get_messages(num_before=30, num_after=0, anchor=anchor)
-        ids_to_process = self.model.get_message_ids_in_current_narrow() - ids_to_keep
+        if not self._fetch_page(num_before=num_messages, num_after=0, anchor=anchor):
+            return
+        ids_to_process = (
+            self.model.get_message_ids_in_current_narrow(anchor) - ids_to_keep
+        )
 
         # Only update if more messages are provided
         if ids_to_process != no_update_baseline:
+            # Focus may have moved while fetching
+            focus_position = self.focus_position if self.log else None
             if self.log:
                 self.log.remove(self.log[0])  # avoid duplication when updating
 
@@ -149,18 +262,32 @@ class MessageView(urwid.ListBox):
             for msg_w in message_list:
                 self.log.insert(0, msg_w)
 
-            self.set_focus(self.focus_msg)  # Return focus to original message
+            # Return focus to original message
+            if focus_position is not None:
+                self.set_focus(focus_position + len(message_list) - 1)
+            else:
+                self.set_focus(self.focus_msg)
 
             self.model.controller.update_screen()
 
-        self.old_loading = False
-
     @asynch
-    def load_new_messages(self, anchor: int) -> None:
+    def load_new_messages(
+        self, anchor: int, num_messages: int = MIN_PAGE_MESSAGES
+    ) -> None:
         self.new_loading = True
-        current_ids = self.model.get_message_ids_in_current_narrow()
-        self.model.get_messages(num_before=0, num_after=30, anchor=anchor)
-        new_ids = self.model.get_message_ids_in_current_narrow() - current_ids
+        try:
+            self._load_new_messages(anchor, num_messages)
+        finally:
+            self.new_loading = False
+
+    def _load_new_messages(self, anchor: int, num_messages: int) -> None:
+        if not self.has_newer_messages(anchor):
+            return  # The newest message is already shown
+
+        current_ids = self.model.get_message_ids_in_current_narrow(anchor)
+        if not self._fetch_page(num_before=0, num_after=num_messages, anchor=anchor):
+            return
+        new_ids = self.model.get_message_ids_in_current_narrow(anchor) - current_ids
         if self.log:
             last_message = self.log[-1].original_widget.message
         else:
@@ -172,10 +299,9 @@ class MessageView(urwid.ListBox):
         self.log.extend(message_list)
 
         self.model.controller.update_screen()
-        self.new_loading = False
 
     def mouse_event(
-        self, size: urwid_Size, event: str, button: int, col: int, row: int, focus: bool
+        self, size: urwid_Box, event: str, button: int, col: int, row: int, focus: bool
     ) -> bool:
         if event == "mouse press":
             if button == 4:
@@ -188,18 +314,20 @@ class MessageView(urwid.ListBox):
                 return True
         return super().mouse_event(size, event, button, col, row, focus)
 
-    def keypress(self, size: urwid_Size, key: str) -> Optional[str]:
+    def keypress(self, size: urwid_Box, key: str) -> Optional[str]:
         if is_command_key("GO_DOWN", key) and not self.new_loading:
             try:
                 position = self.log.next_position(self.focus_position)
                 self.set_focus(position, "above")
                 self.set_focus_valign("middle")
+                self.read_ahead(size)
 
                 return key
             except Exception:
-                if self.focus:
+                # Any messages being read ahead are shown once loaded
+                if self.focus and not self.new_reading_ahead:
                     id = self.focus.original_widget.message["id"]
-                    self.load_new_messages(id)
+                    self.load_new_messages(id, self.page_size(size))
                 return key
 
         elif is_command_key("GO_UP", key) and not self.old_loading:
@@ -207,24 +335,29 @@ class MessageView(urwid.ListBox):
                 position = self.log.prev_position(self.focus_position)
                 self.set_focus(position, "below")
                 self.set_focus_valign("middle")
+                self.read_ahead(size)
                 return key
             except Exception:
-                if self.focus:
+                if self.focus and not self.old_reading_ahead:
                     id = self.focus.original_widget.message["id"]
-                    self.load_old_messages(id)
+                    self.load_old_messages(id, self.page_size(size))
                 return key
 
         elif is_command_key("SCROLL_UP", key) and not self.old_loading:
             if self.focus is not None and self.focus_position == 0:
                 return self.keypress(size, primary_key_for_command("GO_UP"))
             else:
-                return super().keypress(size, primary_key_for_command("SCROLL_UP"))
+                key = super().keypress(size, primary_key_for_command("SCROLL_UP"))
+                self.read_ahead(size)
+                return key
 
         elif is_command_key("SCROLL_DOWN", key) and not self.old_loading:
             if self.focus is not None and self.focus_position == len(self.log) - 1:
                 return self.keypress(size, primary_key_for_command("GO_DOWN"))
             else:
-                return super().keypress(size, primary_key_for_command("SCROLL_DOWN"))
+                key = super().keypress(size, primary_key_for_command("SCROLL_DOWN"))
+                self.read_ahead(size)
+                return key
 
         elif is_command_key("THUMBS_UP", key) and self.focus is not None:
             message = self.focus.original_widget.message
@@ -1089,7 +1222,11 @@ class AboutView(PopUpView):
         color_depth: int,
         autohide_enabled: bool,
         maximum_footlinks: int,
+        maximum_message_lines: int,
         notify_enabled: bool,
+        renderer: str,
+        reconnect_count: int,
+        downtime: float,
     ) -> None:
         self.feature_level_content = (
             [("Feature level", str(server_feature_level))]
@@ -1105,8 +1242,17 @@ class AboutView(PopUpView):
                     ("Theme", theme_name),
                     ("Autohide", "enabled" if autohide_enabled else "disabled"),
                     ("Maximum footlinks", str(maximum_footlinks)),
+                    ("Maximum message lines", str(maximum_message_lines)),
                     ("Color depth", str(color_depth)),
                     ("Notifications", "enabled" if notify_enabled else "disabled"),
+                    ("Renderer", renderer),
+                ],
+            ),
+            (
+                "Connection",
+                [
+                    ("Reconnects", str(reconnect_count)),
+                    ("Downtime", f"{downtime:.0f}s"),
                 ],
             ),
         ]
@@ -1117,6 +1263,36 @@ class AboutView(PopUpView):
         super().__init__(controller, widgets, "ABOUT", popup_width, title)
 
 
+class PerformanceMetricsView(PopUpView):
+    def __init__(
+        self,
+        controller: Any,
+        title: str,
+        summary: List[Tuple[str, List[Tuple[str, Histogram]]]],
+    ) -> None:
+        contents: List[Tuple[str, Sequence[Union[str, Tuple[str, Any]]]]] = [
+            ("", [("", f"{'calls':>8}{'mean':>10}{'p95':>10}{'max':>10}")])
+        ]
+        for category, histograms in summary:
+            rows = [
+                (
+                    name,
+                    f"{histogram.count:>8}{histogram.mean_ms:>10.2f}"
+                    f"{histogram.percentile_ms(95):>10.2f}"
+                    f"{histogram.maximum_ms:>10.2f}",
+                )
+                for name, histogram in histograms
+            ]
+            contents.append((category, rows))
+        if not summary:
+            contents.append(("", ["No operations have been timed yet"]))
+
+        popup_width, column_widths = self.calculate_table_widths(contents, len(title))
+        widgets = self.make_table_with_categories(contents, column_widths)
+
+        super().__init__(controller, widgets, "PERFORMANCE_METRICS", popup_width, title)
+
+
 class UserInfoView(PopUpView):
     def __init__(self, controller: Any, user_id: int, title: str) -> None:
         display_data = self._fetch_user_data(controller, user_id)
@@ -1215,7 +1391,7 @@ class MarkdownHelpView(PopUpView):
             html_element = element["html_element"].format(**dict(user=user_name))
 
             rendered_content, *_ = MessageBox.transform_content(
-                html_element, controller.model.server_url
+                html_element, controller.model.server_url, controller.renderer
             )
 
             raw_menu_content.append((raw_content, raw_content))
@@ -1359,6 +1535,7 @@ class StreamInfoView(PopUpView):
         self.markup_desc, message_links, _ = MessageBox.transform_content(
             rendered_desc,
             self.controller.model.server_url,
+            self.controller.renderer,
         )
         desc = urwid.Text(self.markup_desc)
 
@@ -1853,7 +2030,7 @@ class FullRenderedMsgView(PopUpView):
         max_cols, max_rows = controller.maximum_popup_dimensions()
 
         # Get rendered message
-        msg_box = MessageBox(message, controller.model, None)
+        msg_box = MessageBox(message, controller.model, None, full_content=True)
 
         super().__init__(
             controller,